@@ -1,9 +1,15 @@
 import os
-from typing import List
-from fastapi import FastAPI, UploadFile, File, HTTPException
-from fastapi.responses import JSONResponse
+import json
+import shutil
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import List, Optional
+from fastapi import FastAPI, UploadFile, File, HTTPException, Header, Query, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from datetime import datetime
 
+from etl import metrics
 from . import runner
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
@@ -11,12 +17,56 @@ DATA_DIR = os.path.join(BASE, 'data')
 UPLOADS_DIR = os.path.join(DATA_DIR, 'uploads')
 os.makedirs(UPLOADS_DIR, exist_ok=True)
 
-app = FastAPI(title='ETL Runner API', version='0.1')
+# uploads are copied to disk in blocks of this size, never held whole in memory
+UPLOAD_COPY_BYTES = 1 << 20
+
+# SSE: how often an idle stream checks for new events, and how often it sends a keepalive comment
+EVENTS_POLL_INTERVAL = 0.5
+EVENTS_KEEPALIVE = 15.0
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # configured at startup, not on import: importing the app stays side-effect free (and
+    # etl.run_etl, which pulls in pandas, stays out of the import budget like in runner)
+    if not logging.getLogger().handlers:
+        from etl.run_etl import LOG_FORMAT
+        logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
+    # runs a crashed process left queued/running become resumable
+    await asyncio.to_thread(runner.recover_orphaned_runs)
+    yield
+    # checkpoint in-flight runs and mark queued ones interrupted; waits for the runs to stop,
+    # so it runs in a thread instead of blocking the event loop
+    await asyncio.to_thread(runner.shutdown, drain=False)
+
+
+app = FastAPI(title='ETL Runner API', version='0.1', lifespan=lifespan)
+
+
+def _store_upload(fileobj, upload_path: str, data_path: str) -> None:
+    """Write an upload once under uploads/ and link it into data/ (copy if links are not supported).
+
+    Compressed files (.csv.gz / .csv.zst) are stored as they are; the ETL decompresses
+    them while reading (etl.extract.open_input).
+    """
+    with open(upload_path, 'wb') as f:
+        shutil.copyfileobj(fileobj, f, UPLOAD_COPY_BYTES)
+    tmp = data_path + '.tmp'
+    if os.path.exists(tmp):
+        os.remove(tmp)
+    try:
+        os.link(upload_path, tmp)
+    except OSError:
+        shutil.copyfile(upload_path, tmp)
+    os.replace(tmp, data_path)
 
 
 @app.post('/upload')
-async def upload_and_start(files: List[UploadFile] = File(...)):
-    """Upload one or more files and start an ETL run. Returns run_id."""
+async def upload_and_start(files: List[UploadFile] = File(...), priority: int = 0, profile: bool = False):
+    """Upload one or more files and start an ETL run. Returns run_id.
+
+    profile=true samples the run and saves a folded-stack profile (see /status profile_path).
+    """
     if not files:
         raise HTTPException(status_code=400, detail='No files uploaded')
 
@@ -30,15 +80,10 @@ async def upload_and_start(files: List[UploadFile] = File(...)):
     for upload in files:
         target_upload_path = os.path.join(run_upload_dir, upload.filename)
         target_data_path = os.path.join(DATA_DIR, upload.filename)
-        contents = await upload.read()
-        with open(target_upload_path, 'wb') as f:
-            f.write(contents)
-        # also write to data/ so ETL sees file by name
-        with open(target_data_path, 'wb') as f:
-            f.write(contents)
+        await asyncio.to_thread(_store_upload, upload.file, target_upload_path, target_data_path)
 
-    # start the ETL in background
-    runner.start_run(run_id)
+    # queue the ETL; it runs when a scheduler slot is free
+    runner.start_run(run_id, priority=priority, profile=profile)
 
     return JSONResponse({'run_id': run_id}, status_code=202)
 
@@ -52,6 +97,89 @@ def get_status(run_id: str):
         raise HTTPException(status_code=404, detail='Run not found')
 
 
+def _sse(event: dict, event_id: Optional[int] = None) -> str:
+    head = f'id: {event_id}\n' if event_id is not None else ''
+    return f"{head}event: {event.get('type', 'message')}\ndata: {json.dumps(event, default=str, ensure_ascii=False)}\n\n"
+
+
+@app.get('/runs/{run_id}/events')
+async def stream_run_events(run_id: str, request: Request, last_event_id: Optional[str] = Header(None),
+                            since: Optional[int] = None):
+    """Server-sent events with the incremental progress of a run.
+
+    Sends a 'snapshot' event with the current status on connect, then one 'stage' event
+    per progress update and 'status' events on state changes; the stream ends when the
+    run finishes, fails or is interrupted. Reconnecting with Last-Event-ID (or ?since=)
+    replays only newer events. Events are pulled from a bounded per-run buffer as the
+    client reads them; a client that falls behind gets a 'gap' event.
+    """
+    try:
+        snapshot = runner.get_run(run_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail='Run not found')
+    try:
+        last = int(last_event_id) if last_event_id is not None else int(since or 0)
+    except ValueError:
+        last = 0
+
+    async def generate():
+        nonlocal last
+        if not last:
+            yield _sse({'type': 'snapshot', 'status': snapshot.get('status'), 'stages': snapshot.get('stages', {})})
+        if not runner.events.known(run_id):
+            # finished, or created by a previous process: nothing more will be published here
+            return
+        idle = 0.0
+        while True:
+            if await request.is_disconnected():
+                return
+            pending, closed, oldest = runner.events.since(run_id, last)
+            if oldest is not None and last and last + 1 < oldest:
+                yield _sse({'type': 'gap', 'missed_from': last + 1, 'resumed_at': oldest})
+            for event_id, event in pending:
+                yield _sse(event, event_id)
+                last = event_id
+            if pending:
+                idle = 0.0
+                continue
+            if closed:
+                return
+            await asyncio.sleep(EVENTS_POLL_INTERVAL)
+            idle += EVENTS_POLL_INTERVAL
+            if idle >= EVENTS_KEEPALIVE:
+                idle = 0.0
+                yield ': keepalive\n\n'
+
+    return StreamingResponse(generate(), media_type='text/event-stream',
+                             headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.post('/runs/{run_id}/resume')
+def resume_run(run_id: str, profile: bool = False):
+    """Resume a failed or interrupted run from its last checkpoint."""
+    try:
+        runner.get_run(run_id)
+    except KeyError:
+        raise HTTPException(status_code=404, detail='Run not found')
+    # a run left 'queued'/'running' on disk by a previous process is not in the scheduler
+    if run_id in runner.scheduler.queued() or run_id in runner.scheduler.active():
+        raise HTTPException(status_code=409, detail='Run is already queued or running')
+    runner.start_run(run_id, resume=True, profile=profile)
+    return JSONResponse({'run_id': run_id, 'resumed': True}, status_code=202)
+
+
 @app.get('/runs')
-def list_all_runs():
-    return {'runs': runner.list_runs()}
+def list_all_runs(status: Optional[str] = None, created_after: Optional[str] = None,
+                  created_before: Optional[str] = None, limit: int = Query(50, ge=1, le=500),
+                  offset: int = Query(0, ge=0)):
+    """Run summaries from the run index, newest first. status accepts a comma-separated list."""
+    statuses = [s.strip() for s in status.split(',') if s.strip()] if status else None
+    page = runner.list_runs(status=statuses, created_after=created_after, created_before=created_before,
+                            limit=limit, offset=offset)
+    return {'runs': page['items'], 'total': page['total'], 'limit': limit, 'offset': offset}
+
+
+@app.get('/metrics', include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus text exposition of ETL step counters and process gauges."""
+    return PlainTextResponse(metrics.render_prometheus(), media_type='text/plain; version=0.0.4')
@@ -0,0 +1,53 @@
+"""In-process event log for ETL run progress, consumed by the SSE endpoint.
+
+Each run keeps a bounded buffer of (event_id, event) pairs with increasing ids, so a
+client can resume with Last-Event-ID. A client that falls further behind than the
+buffer gets a 'gap' event and should re-read /status/{run_id}.
+"""
+import threading
+from collections import OrderedDict, deque
+from typing import Any, Dict, List, Optional, Tuple
+
+TERMINAL_STATUSES = ('finished', 'failed', 'interrupted')
+
+
+class RunEventBus:
+    def __init__(self, max_events: int = 1000, max_runs: int = 256):
+        self.max_events = max_events
+        self.max_runs = max_runs
+        self._lock = threading.Lock()
+        self._logs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+
+    def _log(self, run_id: str) -> Dict[str, Any]:
+        log = self._logs.get(run_id)
+        if log is None:
+            log = {'events': deque(maxlen=self.max_events), 'seq': 0, 'closed': False}
+            self._logs[run_id] = log
+            while len(self._logs) > self.max_runs:
+                self._logs.popitem(last=False)
+        self._logs.move_to_end(run_id)
+        return log
+
+    def publish(self, run_id: str, event: Dict[str, Any], terminal: bool = False) -> int:
+        """Append an event and return its id. terminal=True closes the stream after it."""
+        with self._lock:
+            log = self._log(run_id)
+            log['seq'] += 1
+            log['events'].append((log['seq'], event))
+            # a resumed run reopens its stream
+            log['closed'] = terminal
+            return log['seq']
+
+    def since(self, run_id: str, last_id: int = 0) -> Tuple[List[Tuple[int, Dict[str, Any]]], bool, Optional[int]]:
+        """Events after last_id, whether the stream is closed, and the oldest buffered id."""
+        with self._lock:
+            log = self._logs.get(run_id)
+            if log is None:
+                return [], False, None
+            events = [item for item in log['events'] if item[0] > last_id]
+            oldest = log['events'][0][0] if log['events'] else None
+            return events, log['closed'], oldest
+
+    def known(self, run_id: str) -> bool:
+        with self._lock:
+            return run_id in self._logs
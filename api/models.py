@@ -14,6 +14,9 @@ class RunStatus(BaseModel):
     started_at: Optional[str]
     finished_at: Optional[str]
     files: List[str]
-    stages: Dict[str, List[Dict[str, Any]]]
+    stages: Dict[str, Dict[str, Any]]
     errors: List[str]
     stats: Dict[str, Any]
+    checkpoints: Dict[str, Dict[str, Any]] = {}
+    metrics: Dict[str, Dict[str, Any]] = {}
+    profile_path: Optional[str] = None
@@ -1,12 +1,17 @@
 import os
+import copy
 import json
 import threading
+import time
 import traceback
 from datetime import datetime
-from typing import Callable, Dict, Any, List
+from collections import OrderedDict
+from typing import Callable, Dict, Any, List, Optional
 import uuid
 
-from etl import run_etl
+from etl import metrics, profiling
+from .events import RunEventBus, TERMINAL_STATUSES
+from .scheduler import RunScheduler
 
 BASE = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 DATA_DIR = os.path.join(BASE, 'data')
@@ -16,20 +21,224 @@ os.makedirs(ETL_RUNS_DIR, exist_ok=True)
 os.makedirs(DATA_DIR, exist_ok=True)
 
 # In-memory store of runs (mirrors disk JSON). Structure:
-# runs[run_id] = {status, created_at, started_at, finished_at, files, stages, errors, stats}
-runs: Dict[str, Dict[str, Any]] = {}
+# runs[run_id] = {status, created_at, started_at, finished_at, files, stages, errors, stats, checkpoints, metrics}
+# stages[stage] is a rolling aggregate (see _update_stage), not a list of every event.
+# Runs of this process that are queued/running (_in_flight) stay pinned; runs loaded from
+# disk are kept as an LRU of at most RUN_CACHE_SIZE entries.
+runs: 'OrderedDict[str, Dict[str, Any]]' = OrderedDict()
+RUN_CACHE_SIZE = int(os.environ.get('ETL_RUN_CACHE_SIZE', 128))
+
+# Compact summary of every run, kept on disk so /runs does not open each record.
+# list_runs reads the in-memory copy, which every persist keeps current; the file is
+# rewritten only when a run appears or changes status (queued -> running -> finished...),
+# not on stage progress, so it lags by at most the stage statuses of in-flight runs.
+# Single-process assumption: one API process owns reports/etl_runs. Several workers
+# (uvicorn --workers N) would each keep their own copy and overwrite each other's file.
+RUN_INDEX_FILE = '_index.json'
+INDEX_FIELDS = ('run_id', 'status', 'created_at', 'started_at', 'finished_at', 'files', 'priority')
+
+# Progress events are coalesced: a run is written at most every PERSIST_MIN_INTERVAL
+# seconds or every PERSIST_MAX_EVENTS events, whichever comes first. State changes
+# (created, started, finished, failed) are always written synchronously.
+PERSIST_MIN_INTERVAL = float(os.environ.get('ETL_PERSIST_MIN_INTERVAL', 2.0))
+PERSIST_MAX_EVENTS = int(os.environ.get('ETL_PERSIST_MAX_EVENTS', 50))
+
+# At most this many runs execute at once; the rest wait in the scheduler queue as 'queued'.
+MAX_CONCURRENT_RUNS = int(os.environ.get('ETL_MAX_CONCURRENT_RUNS', 2))
+scheduler = RunScheduler(MAX_CONCURRENT_RUNS)
+# Incremental progress events for push clients (SSE endpoint in api/app.py).
+events = RunEventBus()
+
+# Guards runs, _persist_state and the index cache. File writes happen outside it (see
+# _persist_run) so a slow disk never blocks progress callbacks or API reads.
+_lock = threading.RLock()
+# run_id -> {'pending': events not yet on disk, 'last_flush': monotonic time, 'timer': Timer|None}
+_persist_state: Dict[str, Dict[str, Any]] = {}
+# run_id -> {'lock': serializes that run's file writes, 'seq': last snapshot taken, 'written': last on disk}
+_run_writes: Dict[str, Dict[str, Any]] = {}
+# Runs created or requeued by this process that have not reached a terminal status. Their
+# workers look them up in `runs`, so _evict never drops them (however old their event log is).
+_in_flight: set = set()
 
 
 def _persist_run(run_id: str):
+    """Write the run record atomically (temp file + rename).
+
+    The record is serialized under _lock and written after releasing it. Snapshots are
+    numbered and written under a per-run lock; a snapshot older than the one already on
+    disk is dropped, so concurrent persists of one run keep their order.
+    """
     path = os.path.join(ETL_RUNS_DIR, f"{run_id}.json")
-    with open(path, 'w', encoding='utf8') as f:
-        json.dump(runs[run_id], f, default=str, ensure_ascii=False, indent=2)
+    tmp = path + '.tmp'
+    with _lock:
+        payload = json.dumps(runs[run_id], default=str, ensure_ascii=False, separators=(',', ':'))
+        summary = _summary(runs[run_id])
+        state = _persist_state.setdefault(run_id, {'pending': 0, 'last_flush': 0.0, 'timer': None})
+        state['pending'] = 0
+        state['last_flush'] = time.monotonic()
+        if state['timer'] is not None:
+            state['timer'].cancel()
+            state['timer'] = None
+        writes = _run_writes.setdefault(run_id, {'lock': threading.Lock(), 'seq': 0, 'written': 0})
+        writes['seq'] += 1
+        seq = writes['seq']
+    with writes['lock']:
+        if writes['written'] < seq:
+            with open(tmp, 'w', encoding='utf8') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+            writes['written'] = seq
+    _index_update(summary)
+
+
+# ---------------------------------------------------------------------------
+# Run index
+# ---------------------------------------------------------------------------
+
+_index_cache: Dict[str, Any] = {'dir': None, 'entries': {}}
+
+
+def _summary(run: Dict[str, Any]) -> Dict[str, Any]:
+    summary = {k: run.get(k) for k in INDEX_FIELDS}
+    summary['n_errors'] = len(run.get('errors') or [])
+    stages = run.get('stages') or {}
+    summary['stages'] = {name: (agg.get('status') if isinstance(agg, dict) else None) for name, agg in stages.items()}
+    return summary
+
+
+def _index_path() -> str:
+    return os.path.join(ETL_RUNS_DIR, RUN_INDEX_FILE)
+
+
+def _rebuild_index() -> Dict[str, Dict[str, Any]]:
+    """Scan run records once (old runs, or an index deleted by hand)."""
+    entries = {}
+    for name in os.listdir(ETL_RUNS_DIR):
+        if not name.endswith('.json') or name == RUN_INDEX_FILE:
+            continue
+        try:
+            with open(os.path.join(ETL_RUNS_DIR, name), 'r', encoding='utf8') as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            continue
+        # reports/etl_runs also holds app/services/etl metadata, which has no run status
+        if isinstance(data, dict) and 'run_id' in data and 'status' in data:
+            entries[data['run_id']] = _summary(data)
+    return entries
+
+
+def _index_entries() -> Dict[str, Dict[str, Any]]:
+    with _lock:
+        if _index_cache['dir'] != ETL_RUNS_DIR:
+            path = _index_path()
+            entries = None
+            if os.path.exists(path):
+                try:
+                    with open(path, 'r', encoding='utf8') as f:
+                        entries = json.load(f)
+                except (OSError, ValueError):
+                    entries = None
+            rebuilt = entries is None
+            if rebuilt:
+                entries = _rebuild_index()
+            _index_cache.update({'dir': ETL_RUNS_DIR, 'entries': entries})
+            if rebuilt:
+                _write_index()
+        return _index_cache['entries']
+
+
+_index_writes: Dict[str, Any] = {'lock': threading.Lock(), 'seq': 0, 'written': 0}
+
+
+def _write_index():
+    """Write the cached index. Serialized under _lock, written outside it (like _persist_run)."""
+    path = _index_path()
+    tmp = path + '.tmp'
+    with _lock:
+        payload = json.dumps(_index_cache['entries'], default=str, ensure_ascii=False, separators=(',', ':'))
+        _index_writes['seq'] += 1
+        seq = _index_writes['seq']
+    with _index_writes['lock']:
+        if _index_writes['written'] < seq:
+            with open(tmp, 'w', encoding='utf8') as f:
+                f.write(payload)
+            os.replace(tmp, path)
+            _index_writes['written'] = seq
+
+
+def _index_update(summary: Dict[str, Any]):
+    """Refresh a run's index entry; the file is only rewritten on a status transition."""
+    with _lock:
+        entries = _index_entries()
+        previous = entries.get(summary['run_id'])
+        entries[summary['run_id']] = summary
+        transition = previous is None or previous.get('status') != summary['status']
+    if transition:
+        _write_index()
+
+
+def _flush_if_pending(run_id: str):
+    with _lock:
+        state = _persist_state.get(run_id)
+        if state is None:
+            return
+        state['timer'] = None
+        flush = bool(state['pending']) and run_id in runs
+    if flush:
+        _persist_run(run_id)
+
+
+def _request_persist(run_id: str):
+    """Debounced persist for progress events. Call it without holding _lock."""
+    with _lock:
+        state = _persist_state.setdefault(run_id, {'pending': 0, 'last_flush': 0.0, 'timer': None})
+        state['pending'] += 1
+        elapsed = time.monotonic() - state['last_flush']
+        flush = state['pending'] >= PERSIST_MAX_EVENTS or elapsed >= PERSIST_MIN_INTERVAL
+        if not flush and state['timer'] is None:
+            # trailing write so the last events reach disk even if the run goes quiet
+            timer = threading.Timer(PERSIST_MIN_INTERVAL - elapsed, _flush_if_pending, args=(run_id,))
+            timer.daemon = True
+            state['timer'] = timer
+            timer.start()
+    if flush:
+        _persist_run(run_id)
+
+
+def _update_stage(agg: Dict[str, Any], entry: Dict[str, Any]) -> Dict[str, Any]:
+    """Fold one progress event into the stage aggregate.
+
+    Keeps the event count, first/last timestamps, per-status counts, started/finished
+    times, chunk row stats (count/sum/min/max) and the latest event as `last`.
+    """
+    ts = entry['ts']
+    status = entry.get('status')
+    agg['events'] = agg.get('events', 0) + 1
+    agg.setdefault('first_ts', ts)
+    agg['last_ts'] = ts
+    if status:
+        agg['status'] = status
+        counts = agg.setdefault('status_counts', {})
+        counts[status] = counts.get(status, 0) + 1
+        if status in ('started', 'resumed'):
+            agg.setdefault('started_at', ts)
+        elif status in ('finished', 'skipped', 'failed'):
+            agg['finished_at'] = ts
+    if 'chunk_rows' in entry:
+        rows = entry['chunk_rows']
+        chunks = agg.setdefault('chunk_rows', {'count': 0, 'sum': 0, 'min': rows, 'max': rows})
+        chunks['count'] += 1
+        chunks['sum'] += rows
+        chunks['min'] = min(chunks['min'], rows)
+        chunks['max'] = max(chunks['max'], rows)
+    agg['last'] = entry
+    return agg
 
 
 def create_run(files: List[str]) -> str:
     run_id = uuid.uuid4().hex
     now = datetime.utcnow().isoformat() + 'Z'
-    runs[run_id] = {
+    record = {
         'run_id': run_id,
         'status': 'queued',
         'created_at': now,
@@ -39,79 +248,280 @@ def create_run(files: List[str]) -> str:
         'stages': {},
         'errors': [],
         'stats': {},
+        'checkpoints': {},
+        'metrics': {},
     }
+    # _evict and the API readers iterate and reorder `runs` under _lock
+    with _lock:
+        runs[run_id] = record
+        _in_flight.add(run_id)
     _persist_run(run_id)
+    _publish_status(run_id)
+    _evict()
     return run_id
 
 
 def _progress_callback(run_id: str, stage: str, info: Dict[str, Any]):
-    # append stage info
-    entry = {'ts': datetime.utcnow().isoformat() + 'Z', **info}
-    stages = runs[run_id].setdefault('stages', {})
-    stages.setdefault(stage, []).append(entry)
-    # update high-level status
-    status = 'running'
-    if info.get('status') == 'finished':
-        # If all stages finished, we'll mark finished at end
-        pass
-    runs[run_id]['status'] = status
-    _persist_run(run_id)
+    entry = {'ts': datetime.utcnow().isoformat() + 'Z',
+             **{k: v for k, v in info.items() if k not in ('checkpoint', 'metrics')}}
+    with _lock:
+        run = runs[run_id]
+        # latest checkpoint per stage is kept apart so a failed run can be resumed
+        if 'checkpoint' in info:
+            run.setdefault('checkpoints', {})[stage] = info['checkpoint']
+        # per-step timing/throughput/memory totals (etl.metrics.StageMetrics.summary)
+        if 'metrics' in info:
+            run.setdefault('metrics', {})[stage] = info['metrics']
+        stages = run.setdefault('stages', {})
+        agg = stages.get(stage)
+        if not isinstance(agg, dict):
+            # records written before stages were aggregated hold a list of events
+            legacy, agg = agg or [], {}
+            for old in legacy:
+                _update_stage(agg, old)
+            stages[stage] = agg
+        _update_stage(agg, entry)
+        # update high-level status; finished is set by _mark_finished once every stage is done
+        run['status'] = 'running'
+    _request_persist(run_id)
+    events.publish(run_id, {'type': 'stage', 'stage': stage, **entry})
+
 
+def _publish_status(run_id: str):
+    run = runs[run_id]
+    status = run['status']
+    events.publish(run_id, {'type': 'status', 'status': status, 'ts': datetime.utcnow().isoformat() + 'Z',
+                            'errors': len(run.get('errors', []))},
+                   terminal=status in TERMINAL_STATUSES)
 
-def _mark_started(run_id: str):
-    runs[run_id]['started_at'] = datetime.utcnow().isoformat() + 'Z'
-    runs[run_id]['status'] = 'running'
+
+def _mark_started(run_id: str, resumed: bool = False):
+    now = datetime.utcnow().isoformat() + 'Z'
+    with _lock:
+        if resumed and runs[run_id].get('started_at'):
+            runs[run_id]['resumed_at'] = now
+        else:
+            runs[run_id]['started_at'] = now
+        runs[run_id]['finished_at'] = None
+        runs[run_id]['status'] = 'running'
     _persist_run(run_id)
+    _publish_status(run_id)
 
 
 def _mark_finished(run_id: str, success: bool = True):
-    runs[run_id]['finished_at'] = datetime.utcnow().isoformat() + 'Z'
-    runs[run_id]['status'] = 'finished' if success else 'failed'
+    with _lock:
+        runs[run_id]['finished_at'] = datetime.utcnow().isoformat() + 'Z'
+        runs[run_id]['status'] = 'finished' if success else 'failed'
+        _in_flight.discard(run_id)
+    _persist_run(run_id)
+    _publish_status(run_id)
+    metrics.REGISTRY.inc('etl_runs_completed_total', 1, 'ETL runs that reached a terminal state',
+                         status='finished' if success else 'failed')
+
+
+def _mark_interrupted(run_id: str):
+    with _lock:
+        runs[run_id]['status'] = 'interrupted'
+        runs[run_id]['finished_at'] = datetime.utcnow().isoformat() + 'Z'
+        _in_flight.discard(run_id)
     _persist_run(run_id)
+    _publish_status(run_id)
 
 
 def _mark_error(run_id: str, exc: Exception):
-    tb = traceback.format_exc()
-    runs[run_id]['errors'].append(tb)
-    runs[run_id]['status'] = 'failed'
-    runs[run_id]['finished_at'] = datetime.utcnow().isoformat() + 'Z'
+    from etl import run_etl
+
+    if isinstance(exc, run_etl.PipelineFailed):
+        # one entry per failed stage; the stages that succeeded keep their outputs
+        errors = [f"[{stage}] {r.get('traceback') or r['error']}" for stage, r in exc.failures.items()]
+    else:
+        errors = [traceback.format_exc()]
+    with _lock:
+        runs[run_id]['errors'].extend(errors)
+        runs[run_id]['status'] = 'failed'
+        runs[run_id]['finished_at'] = datetime.utcnow().isoformat() + 'Z'
+        _in_flight.discard(run_id)
     _persist_run(run_id)
+    _publish_status(run_id)
+
+
+def profile_path(run_id: str) -> str:
+    return os.path.join(ETL_RUNS_DIR, f"{run_id}.profile.folded")
 
 
-def start_run(run_id: str, pool_chunksize: int = 200000):
-    """Start ETL in a background thread. Assumes uploaded files are already placed in data/ with their names."""
+def _save_profile(run_id: str, profiler: profiling.SamplingProfiler):
+    profiler.stop()
+    path = profiler.write(profile_path(run_id))
+    with _lock:
+        runs[run_id]['profile_path'] = path
+        runs[run_id]['profile'] = profiler.summary()
+
+
+def start_run(run_id: str, pool_chunksize: int = 200000, resume: bool = False, priority: int = 0,
+              profile: bool = False):
+    """Queue the ETL for run_id. Assumes uploaded files are already placed in data/ with their names.
+
+    The run stays 'queued' until a scheduler slot is free (lower priority runs first, FIFO
+    within a priority). With resume=True the run continues from the checkpoints stored in
+    its run record: finished stages are skipped and pool_swaps restarts after its last
+    committed chunk. A run stopped by shutdown ends as 'interrupted' and can be resumed.
+    profile=True samples the run's stack (etl.profiling) and stores a folded-stack file next
+    to the run record; its path is reported as 'profile_path'.
+    """
+    record = get_run(run_id)
+    checkpoints = dict(record.get('checkpoints') or {}) if resume else None
+    # only the uploaded files are planned; each one gets its matching (or the generic) pipeline
+    files = list(record.get('files') or []) or None
+    with _lock:
+        _in_flight.add(run_id)
+        # a full cache may already have evicted the record get_run just loaded
+        run = runs.setdefault(run_id, record)
+        run['status'] = 'queued'
+        run['priority'] = priority
+    _persist_run(run_id)
+    _publish_status(run_id)
+
+    def target(stop_event):
+        # imported on first run: keeps pandas/pyarrow out of the API's startup
+        from etl import run_etl
 
-    def target():
         try:
-            _mark_started(run_id)
+            _mark_started(run_id, resumed=resume)
 
             def cb(rid, stage, info):
                 # wrap to ensure run_id is present
                 _progress_callback(rid, stage, info)
 
-            # call the ETL runner with our callback
-            run_etl.run_all(progress_callback=cb, run_id=run_id, pool_chunksize=pool_chunksize)
+            profiler = profiling.SamplingProfiler().start() if profile else None
+            try:
+                # call the ETL runner with our callback
+                run_etl.run_all(progress_callback=cb, run_id=run_id, pool_chunksize=pool_chunksize,
+                                resume=checkpoints, stop_event=stop_event, files=files, profiler=profiler)
+            finally:
+                if profiler is not None:
+                    _save_profile(run_id, profiler)
             _mark_finished(run_id, success=True)
+        except run_etl.RunInterrupted:
+            _mark_interrupted(run_id)
         except Exception as e:
             _mark_error(run_id, e)
+        finally:
+            with _lock:
+                _in_flight.discard(run_id)
 
-    t = threading.Thread(target=target, daemon=True)
-    t.start()
+    try:
+        scheduler.submit(run_id, target, priority=priority)
+    except Exception:
+        with _lock:
+            _in_flight.discard(run_id)
+        raise
     return True
 
 
+def shutdown(drain: bool = False, timeout: float = 30.0) -> List[str]:
+    """Stop the scheduler: drain the queue, or checkpoint and interrupt in-flight runs.
+
+    Queued runs dropped without draining are marked 'interrupted' so they can be resumed
+    (POST /runs/{id}/resume) instead of staying 'queued' on disk. Blocks until the
+    running ones stop: call it off the event loop.
+    """
+    dropped = scheduler.shutdown(drain=drain, timeout=timeout)
+    for run_id in dropped:
+        _interrupt_record(run_id)
+    return dropped
+
+
+def recover_orphaned_runs() -> List[str]:
+    """Mark runs left 'queued' or 'running' on disk by a previous process as 'interrupted'.
+
+    Called at startup: a process that died without shutdown() leaves them in a state no
+    scheduler will ever pick up. Returns the run ids marked.
+    """
+    in_flight = set(scheduler.queued()) | set(scheduler.active())
+    with _lock:
+        orphaned = [run_id for run_id, summary in _index_entries().items()
+                    if summary.get('status') in ('queued', 'running') and run_id not in in_flight]
+    for run_id in orphaned:
+        _interrupt_record(run_id)
+    return orphaned
+
+
+def _interrupt_record(run_id: str):
+    try:
+        record = get_run(run_id)
+    except KeyError:
+        return
+    with _lock:
+        # get_run may have evicted it again from a full cache
+        runs.setdefault(run_id, record)
+    _mark_interrupted(run_id)
+
+
+def _scheduler_gauge():
+    return {(('status', 'queued'),): len(scheduler.queued()),
+            (('status', 'running'),): len(scheduler.active())}
+
+
+metrics.REGISTRY.gauge('etl_runs_in_scheduler', _scheduler_gauge, 'ETL runs queued or running in this process')
+
+
+def _pinned(run_id: str) -> bool:
+    return run_id in _in_flight
+
+
+def _evict():
+    """Drop least recently used runs that are not in flight in this process."""
+    with _lock:
+        for run_id in list(runs):
+            if len(runs) <= RUN_CACHE_SIZE:
+                break
+            if not _pinned(run_id):
+                runs.pop(run_id, None)
+                _run_writes.pop(run_id, None)
+                state = _persist_state.pop(run_id, None)
+                if state and state.get('timer') is not None:
+                    state['timer'].cancel()
+
+
 def get_run(run_id: str) -> Dict[str, Any]:
-    if run_id in runs:
-        return runs[run_id]
+    """Return a snapshot of the run (safe to serialize while the run keeps updating)."""
+    with _lock:
+        if run_id in runs:
+            runs.move_to_end(run_id)
+            return copy.deepcopy(runs[run_id])
     # try load from disk
     path = os.path.join(ETL_RUNS_DIR, f"{run_id}.json")
     if os.path.exists(path):
         with open(path, 'r', encoding='utf8') as f:
             data = json.load(f)
-        runs[run_id] = data
-        return data
+        with _lock:
+            runs.setdefault(run_id, data)
+            snapshot = copy.deepcopy(runs[run_id])
+            _evict()
+            return snapshot
     raise KeyError(run_id)
 
 
-def list_runs() -> List[str]:
-    return list(runs.keys())
+def list_runs(status: Optional[List[str]] = None, created_after: Optional[str] = None,
+              created_before: Optional[str] = None, limit: int = 50, offset: int = 0) -> Dict[str, Any]:
+    """Page through run summaries from the on-disk index, newest first.
+
+    status filters by one or more statuses; created_after/created_before compare against
+    created_at as ISO strings (a bare date like '2025-11-30' works).
+    """
+    with _lock:
+        items = list(_index_entries().values())
+    if status:
+        wanted = set(status)
+        items = [r for r in items if r.get('status') in wanted]
+    if created_after:
+        items = [r for r in items if (r.get('created_at') or '') >= created_after]
+    if created_before:
+        items = [r for r in items if (r.get('created_at') or '') < created_before]
+    items.sort(key=lambda r: r.get('created_at') or '', reverse=True)
+    return {
+        'total': len(items),
+        'limit': limit,
+        'offset': offset,
+        'items': copy.deepcopy(items[offset:offset + limit]),
+    }
@@ -0,0 +1,100 @@
+"""Bounded scheduler for ETL runs.
+
+Runs are queued in a priority queue (lower number first, FIFO within a priority) and
+executed by at most `max_concurrent` worker threads. Each job receives a stop event;
+long stages check it between chunks so shutdown can checkpoint in-flight runs.
+"""
+import heapq
+import itertools
+import logging
+import threading
+from typing import Callable, Dict, List, Optional
+
+logger = logging.getLogger('etl')
+
+
+class SchedulerClosed(RuntimeError):
+    pass
+
+
+class RunScheduler:
+    def __init__(self, max_concurrent: int = 2):
+        self.max_concurrent = max(1, int(max_concurrent))
+        self._queue: List[tuple] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._workers: List[threading.Thread] = []
+        self._active: Dict[str, threading.Event] = {}
+        self._accepting = True
+
+    def submit(self, run_id: str, job: Callable[[threading.Event], None], priority: int = 0) -> None:
+        """Queue job(stop_event) for run_id."""
+        with self._cond:
+            if not self._accepting:
+                raise SchedulerClosed('Scheduler is shutting down')
+            heapq.heappush(self._queue, (priority, next(self._seq), run_id, job))
+            self._workers = [w for w in self._workers if w.is_alive()]
+            if len(self._workers) < self.max_concurrent:
+                worker = threading.Thread(target=self._work, name=f'etl-worker-{len(self._workers)}', daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._cond.notify()
+
+    def _work(self):
+        while True:
+            with self._cond:
+                while not self._queue and self._accepting:
+                    self._cond.wait()
+                if not self._queue:
+                    return
+                _, _, run_id, job = heapq.heappop(self._queue)
+                stop = threading.Event()
+                self._active[run_id] = stop
+            try:
+                job(stop)
+            except Exception:
+                logger.exception('Run %s failed in scheduler', run_id)
+            finally:
+                with self._cond:
+                    self._active.pop(run_id, None)
+                    self._cond.notify_all()
+
+    def queued(self) -> List[str]:
+        """Queued run ids in execution order."""
+        with self._cond:
+            return [item[2] for item in sorted(self._queue)]
+
+    def active(self) -> List[str]:
+        with self._cond:
+            return list(self._active)
+
+    def cancel(self, run_id: str) -> bool:
+        """Drop a queued run. Returns False if it is not queued (running or unknown)."""
+        with self._cond:
+            for i, item in enumerate(self._queue):
+                if item[2] == run_id:
+                    self._queue.pop(i)
+                    heapq.heapify(self._queue)
+                    return True
+        return False
+
+    def shutdown(self, drain: bool = False, timeout: Optional[float] = None) -> List[str]:
+        """Stop accepting runs.
+
+        drain=True waits for queued and running runs to finish. Otherwise queued runs are
+        dropped (they stay 'queued' on disk and can be started again) and running ones are
+        asked to stop at their next checkpoint. Returns the dropped run ids.
+        """
+        with self._cond:
+            self._accepting = False
+            dropped = []
+            if not drain:
+                dropped = [item[2] for item in sorted(self._queue)]
+                self._queue.clear()
+                for stop in self._active.values():
+                    stop.set()
+            self._cond.notify_all()
+            workers = list(self._workers)
+        for worker in workers:
+            worker.join(timeout)
+        return dropped
@@ -1,3 +1,8 @@
+import asyncio
+import os
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
 from fastapi import APIRouter, UploadFile, File, HTTPException
 
 from app.schemas.datasets import DatasetInfo, UploadURLRequest, DatasetPreview
@@ -5,20 +10,34 @@ from app.services import datasets as datasets_service
 
 router = APIRouter()
 
+# El trabajo bloqueante (lectura de CSV, descargas) corre fuera del event loop.
+# Dos pools acotados: las ingestas pesadas no pueden ocupar los hilos de las previews.
+INGEST_WORKERS = int(os.environ.get("DATASET_INGEST_WORKERS", "2"))
+PREVIEW_WORKERS = int(os.environ.get("DATASET_PREVIEW_WORKERS", "4"))
+_ingest_executor = ThreadPoolExecutor(max_workers=INGEST_WORKERS, thread_name_prefix="datasets-ingest")
+_preview_executor = ThreadPoolExecutor(max_workers=PREVIEW_WORKERS, thread_name_prefix="datasets-preview")
+
+
+async def _run_blocking(executor: ThreadPoolExecutor, fn, *args, **kwargs):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(executor, partial(fn, *args, **kwargs))
+
 
 @router.post("/upload-file", response_model=DatasetInfo)
 async def upload_file(file: UploadFile = File(...)):
     if not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Only CSV files are supported")
     content = await file.read()
-    entry = datasets_service.register_dataset_from_bytes(file.filename, content, source="upload")
+    entry = await _run_blocking(_ingest_executor, datasets_service.register_dataset_from_bytes,
+                                file.filename, content, source="upload")
     return DatasetInfo(**entry)
 
 
 @router.post("/upload-url", response_model=DatasetInfo)
 async def upload_url(payload: UploadURLRequest):
     try:
-        entry = datasets_service.download_from_url(str(payload.url), filename=payload.filename)
+        entry = await _run_blocking(_ingest_executor, datasets_service.download_from_url,
+                                    str(payload.url), filename=payload.filename)
     except datasets_service.DatasetError as e:
         raise HTTPException(status_code=400, detail=str(e))
     return DatasetInfo(**entry)
@@ -27,7 +46,7 @@ async def upload_url(payload: UploadURLRequest):
 @router.get("/{dataset_id}/preview", response_model=DatasetPreview)
 async def preview_dataset(dataset_id: str, rows: int = 5):
     try:
-        data = datasets_service.preview_dataset(dataset_id, n_rows=rows)
+        data = await _run_blocking(_preview_executor, datasets_service.preview_dataset, dataset_id, n_rows=rows)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Dataset not found")
     return DatasetPreview(**data)
@@ -14,11 +14,12 @@ def configure_etl(payload: ETLConfigRequest):
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Dataset not found")
 
-    df = datasets_service.load_dataset(payload.dataset_id)
-    if payload.target_col not in df.columns:
+    # solo el encabezado: el dataset puede no caber en memoria
+    columns = datasets_service.dataset_columns(payload.dataset_id)
+    if payload.target_col not in columns:
         raise HTTPException(status_code=400, detail="Target column not found in dataset")
-    feature_cols = payload.feature_cols or [c for c in df.columns if c != payload.target_col]
-    feature_cols = [c for c in feature_cols if c in df.columns and c != payload.target_col]
+    feature_cols = payload.feature_cols or [c for c in columns if c != payload.target_col]
+    feature_cols = [c for c in feature_cols if c in columns and c != payload.target_col]
     drop_cols = payload.drop_cols or []
     config = {
         "dataset_id": payload.dataset_id,
@@ -45,7 +46,7 @@ def configure_etl(payload: ETLConfigRequest):
 @router.post("/run", response_model=ETLRunResult)
 def run_etl(payload: ETLRunRequest):
     try:
-        meta = etl_service.run_etl_and_store(payload.etl_config_id)
+        meta = etl_service.run_etl_and_store(payload.etl_config_id, mode=payload.mode)
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="ETL config not found")
     except etl_service.ETLError as e:
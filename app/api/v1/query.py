@@ -0,0 +1,26 @@
+from typing import List
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
+
+from app.schemas.query import QueryRequest, QuerySource
+from app.services import query as query_service
+
+router = APIRouter()
+
+
+@router.get("/sources", response_model=List[QuerySource])
+def list_sources():
+    return query_service.list_sources()
+
+
+@router.post("")
+def run_query(payload: QueryRequest):
+    # el plan se valida antes de empezar a responder: los errores llegan como 400/404
+    try:
+        batches = query_service.execute(payload)
+    except FileNotFoundError:
+        raise HTTPException(status_code=404, detail="Source not found")
+    except query_service.QueryError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return StreamingResponse(query_service.to_ndjson(batches), media_type="application/x-ndjson")
@@ -15,6 +15,7 @@ def run_training(payload: TrainingRequest):
             test_size=payload.test_size,
             random_state=payload.random_state,
             metric_primary=payload.metric_primary,
+            profile=payload.profile,
         )
     except models_service.TrainingError as e:
         raise HTTPException(status_code=400, detail=str(e))
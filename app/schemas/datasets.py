@@ -15,6 +15,7 @@ class DatasetInfo(BaseModel):
     cols: Optional[int] = None
     created_at: str
     source: str
+    download: Optional[Dict[str, Any]] = None
 
 
 class DatasetPreview(BaseModel):
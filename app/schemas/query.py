@@ -0,0 +1,42 @@
+from typing import Any, List, Optional, Literal
+from pydantic import BaseModel, Field
+
+
+class QueryFilter(BaseModel):
+    column: str
+    op: Literal["==", "!=", "<", "<=", ">", ">=", "in", "not_in", "is_null", "not_null"]
+    value: Optional[Any] = None
+
+
+class QueryAggregate(BaseModel):
+    # count_all no lleva columna
+    func: Literal["sum", "mean", "min", "max", "count", "count_distinct", "count_all", "stddev",
+                  "approximate_median"]
+    column: Optional[str] = None
+    alias: Optional[str] = None
+
+
+class QueryOrder(BaseModel):
+    column: str
+    descending: bool = False
+
+
+class QueryRequest(BaseModel):
+    source: str  # archivo o directorio bajo data/processed (ver GET /query/sources)
+    columns: Optional[List[str]] = None  # proyeccion cuando no hay agregados
+    filters: List[QueryFilter] = []
+    # rango [start, end) sobre la columna de fecha; en salidas particionadas poda particiones
+    start: Optional[str] = None
+    end: Optional[str] = None
+    date_column: str = "date"
+    group_by: List[str] = []
+    aggregates: List[QueryAggregate] = []
+    order_by: List[QueryOrder] = []
+    limit: Optional[int] = Field(None, ge=1)
+
+
+class QuerySource(BaseModel):
+    name: str
+    format: str
+    partitioned: bool
+    columns: List[str]
@@ -28,6 +28,8 @@ class ETLConfigResponse(BaseModel):
 
 class ETLRunRequest(BaseModel):
     etl_config_id: str
+    # auto: streaming por chunks si el dataset supera ETL_STREAMING_THRESHOLD_MB
+    mode: Literal["auto", "in_memory", "streaming"] = "auto"
 
 
 class ETLRunResult(BaseModel):
@@ -40,6 +42,9 @@ class ETLRunResult(BaseModel):
     feature_cols: List[str]
     target_col: str
     normalization: Optional[Dict[str, Any]] = None
+    mode: Optional[str] = None
+    metrics: Optional[Dict[str, Any]] = None
+    memory: Optional[Dict[str, Any]] = None
 
 
 class TrainingRequest(BaseModel):
@@ -51,6 +56,9 @@ class TrainingRequest(BaseModel):
     # Igual, solo permite estas métricas
     metric_primary: Literal["rmse", "mae", "mse", "r2"] = "rmse"
 
+    # Perfil por muestreo del entrenamiento (reports/training_runs/<id>.profile.folded)
+    profile: bool = False
+
 
 class ModelMetrics(BaseModel):
     mae: float
@@ -85,3 +93,4 @@ class TrainingResult(BaseModel):
     best_model: BestModel
     plots: List[PlotInfo]
     explanation: str
+    profile_path: Optional[str] = None
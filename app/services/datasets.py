@@ -1,16 +1,39 @@
 import json
+import os
+import re
+import time
 import uuid
+import logging
+import threading
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Callable, Dict, Any, List, Optional
 
 import pandas as pd
-import requests
+
+from etl import extract
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 DATASETS_DIR = BASE_DIR / "data" / "datasets"
 DATASETS_DIR.mkdir(parents=True, exist_ok=True)
 INDEX_PATH = DATASETS_DIR / "index.json"
 
+# los registros pueden llegar en paralelo (pool de ingesta): leer-modificar-guardar bajo lock
+_index_lock = threading.Lock()
+
+logger = logging.getLogger(__name__)
+
+# descargas por URL: se escriben a disco por bloques, nunca se bufferea el cuerpo entero
+DOWNLOAD_CHUNK_BYTES = int(os.environ.get("DATASET_DOWNLOAD_CHUNK_BYTES", str(1024 * 1024)))
+DOWNLOAD_MAX_BYTES = int(float(os.environ.get("DATASET_DOWNLOAD_MAX_MB", "2048")) * 1024 * 1024)
+# timeout de conexion y entre bloques (no total): una descarga lenta pero viva no se corta
+DOWNLOAD_CONNECT_TIMEOUT = float(os.environ.get("DATASET_DOWNLOAD_CONNECT_TIMEOUT", "10"))
+DOWNLOAD_READ_TIMEOUT = float(os.environ.get("DATASET_DOWNLOAD_READ_TIMEOUT", "60"))
+# reintentos tras un corte; se retoma con Range desde el ultimo byte escrito
+DOWNLOAD_MAX_RESUMES = int(os.environ.get("DATASET_DOWNLOAD_MAX_RESUMES", "3"))
+DOWNLOAD_PROGRESS_EVERY_BYTES = 64 * 1024 * 1024
+
+_CONTENT_RANGE_RE = re.compile(r"bytes (\d+)-(\d+)/(\d+|\*)")
+
 
 class DatasetError(Exception):
     pass
@@ -24,21 +47,20 @@ def _load_index() -> Dict[str, Dict[str, Any]]:
 
 
 def _save_index(index: Dict[str, Dict[str, Any]]) -> None:
-    with open(INDEX_PATH, "w", encoding="utf-8") as f:
+    tmp = INDEX_PATH.with_suffix(".json.tmp")
+    with open(tmp, "w", encoding="utf-8") as f:
         json.dump(index, f, ensure_ascii=False, indent=2)
+    # reemplazo atomico: una preview concurrente nunca lee un indice a medio escribir
+    os.replace(tmp, INDEX_PATH)
 
 
 def _shape_from_csv(path: Path) -> Dict[str, int]:
-    df = pd.read_csv(path)
+    df = extract.read_csv_path(path)
     return {"rows": len(df), "cols": len(df.columns)}
 
 
-def register_dataset_from_bytes(filename: str, content: bytes, source: str) -> Dict[str, Any]:
-    index = _load_index()
-    dataset_id = uuid.uuid4().hex
-    safe_name = Path(filename).name or "dataset.csv"
-    stored_path = DATASETS_DIR / f"{dataset_id}_{safe_name}"
-    stored_path.write_bytes(content)
+def _register_stored_file(dataset_id: str, safe_name: str, stored_path: Path, source: str,
+                          extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
     shape = _shape_from_csv(stored_path)
     entry = {
         "dataset_id": dataset_id,
@@ -49,17 +71,126 @@ def register_dataset_from_bytes(filename: str, content: bytes, source: str) -> D
         "created_at": pd.Timestamp.utcnow().isoformat(),
         "source": source,
     }
-    index[dataset_id] = entry
-    _save_index(index)
+    if extra:
+        entry.update(extra)
+    with _index_lock:
+        index = _load_index()
+        index[dataset_id] = entry
+        _save_index(index)
     return entry
 
 
-def download_from_url(url: str, filename: Optional[str] = None) -> Dict[str, Any]:
-    resp = requests.get(url, timeout=30)
-    if not resp.ok:
-        raise DatasetError(f"Failed to download dataset. Status {resp.status_code}")
+def register_dataset_from_bytes(filename: str, content: bytes, source: str) -> Dict[str, Any]:
+    dataset_id = uuid.uuid4().hex
+    safe_name = Path(filename).name or "dataset.csv"
+    stored_path = DATASETS_DIR / f"{dataset_id}_{safe_name}"
+    stored_path.write_bytes(content)
+    return _register_stored_file(dataset_id, safe_name, stored_path, source)
+
+
+def _too_large(size: int, max_bytes: int) -> DatasetError:
+    return DatasetError(f"Dataset exceeds the download limit ({size} > {max_bytes} bytes)")
+
+
+def _stream_to_file(url: str, part_path: Path, max_bytes: int, chunk_bytes: int, max_resumes: int,
+                    progress_callback: Optional[Callable[[int, Optional[int]], None]] = None) -> Dict[str, Any]:
+    """Descarga `url` a `part_path` por bloques. Ante un corte reintenta con
+    `Range: bytes=<escritos>-`; si el servidor ignora el Range (200) se empieza de cero."""
+    import requests
+
+    written = 0
+    total: Optional[int] = None
+    resumes = 0
+    started = time.perf_counter()
+    next_report = DOWNLOAD_PROGRESS_EVERY_BYTES
+    with open(part_path, "wb") as f:
+        while True:
+            headers = {"Range": f"bytes={written}-"} if written else {}
+            try:
+                with requests.get(url, stream=True, headers=headers,
+                                  timeout=(DOWNLOAD_CONNECT_TIMEOUT, DOWNLOAD_READ_TIMEOUT)) as resp:
+                    if written and resp.status_code == 206:
+                        match = _CONTENT_RANGE_RE.match(resp.headers.get("Content-Range", ""))
+                        if not match or int(match.group(1)) != written:
+                            raise DatasetError(f"Unexpected Content-Range on resume: {resp.headers.get('Content-Range')}")
+                        if match.group(3) != "*":
+                            total = int(match.group(3))
+                    elif resp.status_code == 416 and total is not None and written == total:
+                        break  # ya estaba completo cuando se corto la conexion
+                    elif resp.ok:
+                        if written:
+                            logger.info("Server ignored Range for %s; restarting download", url)
+                            f.seek(0)
+                            f.truncate()
+                            written = 0
+                        length = resp.headers.get("Content-Length")
+                        total = int(length) if length and length.isdigit() else None
+                    else:
+                        raise DatasetError(f"Failed to download dataset. Status {resp.status_code}")
+                    if total is not None and total > max_bytes:
+                        raise _too_large(total, max_bytes)
+
+                    for chunk in resp.iter_content(chunk_size=chunk_bytes):
+                        if not chunk:
+                            continue
+                        written += len(chunk)
+                        if written > max_bytes:
+                            raise _too_large(written, max_bytes)
+                        f.write(chunk)
+                        if progress_callback:
+                            progress_callback(written, total)
+                        if written >= next_report:
+                            elapsed = time.perf_counter() - started
+                            logger.info("Downloading %s: %.1f MB (%.1f MB/s)", url, written / 1e6,
+                                        written / 1e6 / elapsed if elapsed else 0.0)
+                            next_report += DOWNLOAD_PROGRESS_EVERY_BYTES
+                if total is not None and written < total:
+                    # requests no siempre falla si el servidor cierra antes de tiempo
+                    raise requests.exceptions.ChunkedEncodingError(f"Connection closed at {written}/{total} bytes")
+                break
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout,
+                    requests.exceptions.ChunkedEncodingError) as e:
+                if resumes >= max_resumes:
+                    raise DatasetError(f"Download failed after {resumes} resumes: {e}") from e
+                resumes += 1
+                f.flush()
+                logger.warning("Download of %s interrupted at %d bytes (%s); resuming", url, written, e)
+    elapsed = time.perf_counter() - started
+    return {
+        "bytes": written,
+        "seconds": round(elapsed, 3),
+        "mb_per_s": round(written / 1e6 / elapsed, 2) if elapsed else None,
+        "resumes": resumes,
+    }
+
+
+def download_from_url(url: str, filename: Optional[str] = None, max_bytes: Optional[int] = None,
+                      chunk_bytes: Optional[int] = None, max_resumes: Optional[int] = None,
+                      progress_callback: Optional[Callable[[int, Optional[int]], None]] = None) -> Dict[str, Any]:
+    """Descarga en streaming a data/datasets/ y registra el dataset.
+
+    La entrada del indice incluye `download` con bytes, segundos, MB/s y reanudaciones.
+    """
     inferred_name = filename or Path(url).name or "dataset.csv"
-    return register_dataset_from_bytes(inferred_name, resp.content, source="url")
+    dataset_id = uuid.uuid4().hex
+    safe_name = Path(inferred_name).name or "dataset.csv"
+    stored_path = DATASETS_DIR / f"{dataset_id}_{safe_name}"
+    part_path = stored_path.with_name(stored_path.name + ".part")
+    try:
+        stats = _stream_to_file(
+            url, part_path,
+            max_bytes=DOWNLOAD_MAX_BYTES if max_bytes is None else max_bytes,
+            chunk_bytes=chunk_bytes or DOWNLOAD_CHUNK_BYTES,
+            max_resumes=DOWNLOAD_MAX_RESUMES if max_resumes is None else max_resumes,
+            progress_callback=progress_callback,
+        )
+    except Exception:
+        part_path.unlink(missing_ok=True)
+        raise
+    os.replace(part_path, stored_path)
+    logger.info("Downloaded %s: %d bytes in %.2fs (%s MB/s, %d resumes)", url, stats["bytes"],
+                stats["seconds"], stats["mb_per_s"], stats["resumes"])
+    return _register_stored_file(dataset_id, safe_name, stored_path, source="url", extra={"download": stats})
 
 
 def get_dataset_entry(dataset_id: str) -> Dict[str, Any]:
@@ -85,6 +216,11 @@ def preview_dataset(dataset_id: str, n_rows: int = 5) -> Dict[str, Any]:
     }
 
 
+def dataset_columns(dataset_id: str) -> List[str]:
+    path = get_dataset_path(dataset_id)
+    return pd.read_csv(path, nrows=0).columns.tolist()
+
+
 def load_dataset(dataset_id: str) -> pd.DataFrame:
     path = get_dataset_path(dataset_id)
-    return pd.read_csv(path)
+    return extract.read_csv_path(path)
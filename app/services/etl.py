@@ -1,11 +1,16 @@
+import os
 import json
 import uuid
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, List, Optional, Tuple
 
 import pandas as pd
 
 from app.services import datasets
+from app.services.stats import RunningStats
+from etl import extract
+from etl.metrics import StageMetrics
 
 BASE_DIR = Path(__file__).resolve().parents[2]
 ETL_CONFIGS_DIR = BASE_DIR / "data" / "etl_configs"
@@ -15,6 +20,24 @@ ETL_OUTPUTS_DIR.mkdir(parents=True, exist_ok=True)
 ETL_RUNS_DIR = BASE_DIR / "reports" / "etl_runs"
 ETL_RUNS_DIR.mkdir(parents=True, exist_ok=True)
 
+# Por encima de este tamano el dataset se procesa en dos pasadas por chunks (ver
+# run_etl_streaming) en lugar de cargarlo entero; 0 fuerza siempre el modo streaming.
+STREAMING_THRESHOLD_MB = float(os.environ.get("ETL_STREAMING_THRESHOLD_MB", "512"))
+STREAMING_CHUNK_ROWS = int(os.environ.get("ETL_STREAMING_CHUNK_ROWS", "200000"))
+ETL_MODES = ("auto", "in_memory", "streaming")
+
+
+def _copy_on_write_enabled() -> bool:
+    try:
+        return int(pd.__version__.split(".")[0]) >= 3 or pd.get_option("mode.copy_on_write") is True
+    except Exception:
+        return False
+
+
+# Con copy-on-write (siempre en pandas >= 3) los pasos comparten columnas sin copiarlas
+# hasta que se modifican; sin CoW se hace una sola copia profunda al inicio de run_etl.
+COPY_ON_WRITE = _copy_on_write_enabled()
+
 
 class ETLError(Exception):
     pass
@@ -36,74 +59,114 @@ def load_config(config_id: str) -> Dict[str, Any]:
         return json.load(f)
 
 
+def _step(metrics: Optional[StageMetrics], name: str):
+    return metrics.step(name, sample_memory=True) if metrics is not None else nullcontext()
+
+
 def handle_missing(df: pd.DataFrame, strategy: str, target_col: str) -> pd.DataFrame:
     if strategy == "drop":
         return df.dropna(subset=[target_col])
-    df_out = df.copy()
-    numeric_cols = df_out.select_dtypes(include=["number"]).columns
-    non_numeric = [c for c in df_out.columns if c not in numeric_cols]
-    if strategy == "mean":
-        df_out[numeric_cols] = df_out[numeric_cols].fillna(df_out[numeric_cols].mean())
-    elif strategy == "median":
-        df_out[numeric_cols] = df_out[numeric_cols].fillna(df_out[numeric_cols].median())
+    numeric_cols = df.select_dtypes(include=["number"]).columns
+    non_numeric = [c for c in df.columns if c not in numeric_cols]
+    fills: Dict[str, Any] = {}
+    if strategy in ("mean", "median") and len(numeric_cols):
+        # valores de relleno sobre todas las filas, antes del dropna (igual que antes)
+        fills = df[numeric_cols].agg(strategy).to_dict()
     elif strategy == "zero":
-        df_out[numeric_cols] = df_out[numeric_cols].fillna(0)
-    df_out = df_out.dropna(subset=[target_col])
-    for c in non_numeric:
-        df_out[c] = df_out[c].fillna("")
-    return df_out
+        fills = {c: 0 for c in numeric_cols}
+    if target_col in fills:
+        df = df.fillna({target_col: fills.pop(target_col)})
+    # primero se filtran filas y despues se rellena: el fillna recorre solo lo que queda
+    df = df.dropna(subset=[target_col])
+    fills.update({c: "" for c in non_numeric})
+    return df.fillna(fills) if fills else df
 
 
-def _normalize_numeric(df: pd.DataFrame, feature_cols: List[str]) -> Dict[str, Dict[str, float]]:
-    numeric_cols = df[feature_cols].select_dtypes(include=["number"]).columns
-    stats: Dict[str, Dict[str, float]] = {}
-    for col in numeric_cols:
-        mean = float(df[col].mean())
-        std = float(df[col].std()) if float(df[col].std()) != 0 else 0.0
-        stats[col] = {"mean": mean, "std": std}
-        if std != 0:
-            df[col] = (df[col] - mean) / std
-    return stats
-
+def _coerce_numeric(series: pd.Series) -> pd.Series:
+    """Texto -> numero si todos los valores convierten; si no, la columna queda igual."""
+    if not (pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)):
+        return series
+    try:
+        return pd.to_numeric(series)
+    except (ValueError, TypeError):
+        return series
 
-def run_etl(df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
-    df_out = df.copy()
-    date_cols = config.get("date_cols") or []
-    for col in date_cols:
-        if col in df_out.columns:
-            df_out[col] = pd.to_datetime(df_out[col], errors="coerce")
 
+def _select_columns(columns: List[str], config: Dict[str, Any]) -> Tuple[List[str], List[str], str]:
+    """(columnas a eliminar, features, target) a partir del encabezado y la config."""
     drop_cols = config.get("drop_cols") or []
-    to_drop = [c for c in drop_cols if c in df_out.columns]
-    if to_drop:
-        df_out = df_out.drop(columns=to_drop)
+    to_drop = [c for c in drop_cols if c in columns]
+    remaining = [c for c in columns if c not in to_drop]
 
     target_col = config["target_col"]
-    if target_col not in df_out.columns:
+    if target_col not in remaining:
         raise ETLError(f"Target column '{target_col}' not found in dataset")
 
     feature_cols = config.get("feature_cols")
     if not feature_cols:
-        feature_cols = [c for c in df_out.columns if c != target_col]
+        feature_cols = [c for c in remaining if c != target_col]
     else:
-        feature_cols = [c for c in feature_cols if c in df_out.columns and c != target_col]
+        feature_cols = [c for c in feature_cols if c in remaining and c != target_col]
 
     if not feature_cols:
         raise ETLError("No feature columns available after selection")
+    return to_drop, feature_cols, target_col
+
+
+def _prepare_chunk(df: pd.DataFrame, config: Dict[str, Any], to_drop: List[str],
+                   selected_cols: List[str]) -> pd.DataFrame:
+    for col in config.get("date_cols") or []:
+        if col in df.columns:
+            df[col] = pd.to_datetime(df[col], errors="coerce")
+    if to_drop:
+        df = df.drop(columns=to_drop)
+    return df[selected_cols]
 
+
+def _normalize_numeric(df: pd.DataFrame, feature_cols: List[str]) -> Dict[str, Dict[str, float]]:
+    numeric_cols = df[feature_cols].select_dtypes(include=["number"]).columns
+    stats: Dict[str, Dict[str, float]] = {}
+    if not len(numeric_cols):
+        return stats
+    agg = df[numeric_cols].agg(["mean", "std"])
+    for col in numeric_cols:
+        mean = float(agg.at["mean", col])
+        std = float(agg.at["std", col])
+        std = std if std != 0 else 0.0
+        stats[col] = {"mean": mean, "std": std}
+        if std != 0:
+            # un solo array nuevo por columna, normalizado in place
+            values = df[col].to_numpy(dtype="float64", na_value=float("nan"), copy=True)
+            values -= mean
+            values /= std
+            df[col] = values
+    return stats
+
+
+def run_etl(df: pd.DataFrame, config: Dict[str, Any], metrics: Optional[StageMetrics] = None) -> Dict[str, Any]:
+    """ETL en memoria. `df` no se modifica; con `metrics` se mide tiempo y RSS pico por paso."""
+    to_drop, feature_cols, target_col = _select_columns(list(df.columns), config)
     selected_cols = feature_cols + [target_col]
-    df_out = df_out[selected_cols]
+    with _step(metrics, "prepare"):
+        df_out = _prepare_chunk(df.copy(deep=not COPY_ON_WRITE), config, to_drop, selected_cols)
 
-    for col in selected_cols:
-        if df_out[col].dtype == object:
-            df_out[col] = pd.to_numeric(df_out[col], errors="ignore")
+    with _step(metrics, "coerce_numeric"):
+        for col in selected_cols:
+            series = df_out[col]
+            converted = _coerce_numeric(series)
+            if converted is not series:
+                df_out[col] = converted
 
     strategy = config.get("missing_strategy", "drop")
-    df_out = handle_missing(df_out, strategy=strategy, target_col=target_col)
+    with _step(metrics, "handle_missing") as step:
+        df_out = handle_missing(df_out, strategy=strategy, target_col=target_col)
+        if step is not None:
+            step.rows = len(df_out)
 
     normalization_info: Optional[Dict[str, Dict[str, float]]] = None
     if config.get("normalize_numeric"):
-        normalization_info = _normalize_numeric(df_out, feature_cols)
+        with _step(metrics, "normalize"):
+            normalization_info = _normalize_numeric(df_out, feature_cols)
 
     return {
         "df": df_out,
@@ -113,24 +176,173 @@ def run_etl(df: pd.DataFrame, config: Dict[str, Any]) -> Dict[str, Any]:
     }
 
 
-def run_etl_and_store(config_id: str) -> Dict[str, Any]:
+def _iter_dataset_chunks(path: Path, chunksize: int):
+    return extract.read_csv_chunks(path.name, chunksize=chunksize, path=str(path))
+
+
+def run_etl_streaming(path: Path, config: Dict[str, Any], output_path: Path,
+                      chunksize: Optional[int] = None, metrics: Optional[StageMetrics] = None) -> Dict[str, Any]:
+    """Mismo resultado que run_etl, en dos pasadas por chunks con memoria acotada.
+
+    Pasada 1: decide que columnas son numericas (deben convertir en todos los chunks) y
+    acumula RunningStats por columna, sobre todas las filas (imputacion) y sobre las que
+    sobreviven al dropna del target (normalizacion). Las estadisticas de normalizacion
+    despues de imputar se obtienen agregando el valor de relleno `n` veces, sin releer.
+    Pasada 2: aplica conversion, imputacion y normalizacion chunk a chunk y escribe
+    `output_path` en modo append.
+    """
+    chunksize = chunksize or STREAMING_CHUNK_ROWS
+    header = pd.read_csv(path, nrows=0).columns.tolist()
+    to_drop, feature_cols, target_col = _select_columns(header, config)
+    selected_cols = feature_cols + [target_col]
+    strategy = config.get("missing_strategy", "drop")
+
+    is_numeric = {c: True for c in selected_cols}
+    is_float = {c: False for c in selected_cols}
+    stats_all = {c: RunningStats() for c in selected_cols}
+    stats_kept = {c: RunningStats() for c in selected_cols}
+    nulls_all = {c: 0 for c in selected_cols}
+    nulls_kept = {c: 0 for c in selected_cols}
+    chunks = 0
+    with _step(metrics, "stats_pass"):
+        for chunk in _iter_dataset_chunks(path, chunksize):
+            chunks += 1
+            chunk = _prepare_chunk(chunk, config, to_drop, selected_cols)
+            kept = chunk[target_col].notna().to_numpy()
+            for col in selected_cols:
+                if not is_numeric[col]:
+                    continue
+                series = _coerce_numeric(chunk[col])
+                if not pd.api.types.is_numeric_dtype(series) or pd.api.types.is_bool_dtype(series):
+                    is_numeric[col] = False
+                    continue
+                values = series.to_numpy(dtype="float64", na_value=float("nan"))
+                nulls = series.isna().to_numpy()
+                is_float[col] = is_float[col] or series.dtype.kind == "f" or bool(nulls.any())
+                stats_all[col].update(values)
+                stats_kept[col].update(values[kept])
+                nulls_all[col] += int(nulls.sum())
+                nulls_kept[col] += int((nulls & kept).sum())
+
+    numeric_cols = [c for c in selected_cols if is_numeric[c]]
+    fill_values: Dict[str, float] = {}
+    if strategy == "mean":
+        fill_values = {c: stats_all[c].mean if stats_all[c].count else float("nan") for c in numeric_cols}
+    elif strategy == "median":
+        fill_values = {c: stats_all[c].median() for c in numeric_cols}
+    elif strategy == "zero":
+        fill_values = {c: 0.0 for c in numeric_cols}
+
+    normalization_info: Optional[Dict[str, Dict[str, float]]] = None
+    if config.get("normalize_numeric"):
+        # con imputacion un target numerico se rellena antes del dropna: no se descarta ninguna fila
+        keep_all = strategy != "drop" and target_col in fill_values
+        normalization_info = {}
+        for col in feature_cols:
+            if col not in numeric_cols:
+                continue
+            base, nulls = (stats_all[col], nulls_all[col]) if keep_all else (stats_kept[col], nulls_kept[col])
+            fill = fill_values.get(col)
+            col_stats = base.with_constant(fill, nulls) if fill is not None and fill == fill else base
+            std = col_stats.std()
+            normalization_info[col] = {"mean": float(col_stats.mean), "std": std if std != 0 else 0.0}
+
+    rows = 0
+    out_cols = selected_cols
+    tmp_path = output_path.with_name(output_path.name + ".tmp")
+    with _step(metrics, "write_pass") as step:
+        with open(tmp_path, "w", encoding="utf-8", newline="") as f:
+            first = True
+            for chunk in _iter_dataset_chunks(path, chunksize):
+                chunk = _prepare_chunk(chunk, config, to_drop, selected_cols)
+                for col in numeric_cols:
+                    chunk[col] = pd.to_numeric(chunk[col])
+                    if is_float[col]:
+                        chunk[col] = chunk[col].astype("float64")
+                if strategy == "drop":
+                    chunk = chunk.dropna(subset=[target_col])
+                else:
+                    if fill_values:
+                        chunk = chunk.fillna(value=fill_values)
+                    chunk = chunk.dropna(subset=[target_col])
+                    for col in selected_cols:
+                        if col not in numeric_cols:
+                            chunk[col] = chunk[col].fillna("")
+                for col, st in (normalization_info or {}).items():
+                    if st["std"] != 0:
+                        chunk[col] = (chunk[col] - st["mean"]) / st["std"]
+                chunk.to_csv(f, index=False, header=first)
+                first = False
+                rows += len(chunk)
+            if first:
+                pd.DataFrame(columns=out_cols).to_csv(f, index=False)
+        if step is not None:
+            step.rows = rows
+    os.replace(tmp_path, output_path)
+    return {
+        "rows": rows,
+        "cols": len(out_cols),
+        "feature_cols": feature_cols,
+        "target_col": target_col,
+        "normalization": normalization_info,
+        "chunks": chunks,
+    }
+
+
+def resolve_mode(path: Path, mode: Optional[str] = None) -> str:
+    mode = mode or "auto"
+    if mode not in ETL_MODES:
+        raise ETLError(f"Unknown ETL mode '{mode}'")
+    if mode != "auto":
+        return mode
+    size_mb = path.stat().st_size / (1024 * 1024)
+    return "streaming" if size_mb >= STREAMING_THRESHOLD_MB else "in_memory"
+
+
+def run_etl_and_store(config_id: str, mode: Optional[str] = None) -> Dict[str, Any]:
+    """Ejecuta el ETL de una config. `mode`: 'auto' (por tamano), 'in_memory' o 'streaming'."""
     config = load_config(config_id)
     dataset_id = config["dataset_id"]
-    df = datasets.load_dataset(dataset_id)
-    result = run_etl(df, config)
+    dataset_path = datasets.get_dataset_path(dataset_id)
+    mode = resolve_mode(dataset_path, mode)
     etl_run_id = uuid.uuid4().hex
     processed_path = ETL_OUTPUTS_DIR / f"{etl_run_id}.processed.csv"
-    result["df"].to_csv(processed_path, index=False, encoding="utf-8")
+    stage_metrics = StageMetrics("dataset_etl")
+    memory: Dict[str, Any] = {}
+    if mode == "streaming":
+        result = run_etl_streaming(dataset_path, config, processed_path, metrics=stage_metrics)
+        rows, cols = result["rows"], result["cols"]
+    else:
+        with _step(stage_metrics, "load_dataset") as step:
+            df = datasets.load_dataset(dataset_id)
+            step.rows = len(df)
+        memory["dataset_bytes"] = int(df.memory_usage(deep=True).sum())
+        with _step(stage_metrics, "run_etl"):
+            result = run_etl(df, config, metrics=stage_metrics)
+        del df
+        with _step(stage_metrics, "write_csv") as step:
+            result["df"].to_csv(processed_path, index=False, encoding="utf-8")
+            step.rows = len(result["df"])
+            step.bytes_written = processed_path.stat().st_size
+        rows, cols = len(result["df"]), len(result["df"].columns)
+        # RSS pico del ETL (sin carga ni escritura) relativo al tamano del dataset en memoria
+        peak = stage_metrics.steps["run_etl"].get("peak_rss_step_bytes")
+        if peak is not None and memory["dataset_bytes"]:
+            memory["run_etl_peak_bytes"] = peak
+            memory["run_etl_peak_ratio"] = round(peak / memory["dataset_bytes"], 2)
     meta = {
         "etl_run_id": etl_run_id,
         "etl_config_id": config_id,
         "dataset_id": dataset_id,
         "processed_path": str(processed_path),
-        "rows": len(result["df"]),
-        "cols": len(result["df"].columns),
+        "rows": rows,
+        "cols": cols,
         "feature_cols": result["feature_cols"],
         "target_col": result["target_col"],
         "normalization": result["normalization"],
+        "mode": mode,
+        "metrics": stage_metrics.summary(),
+        "memory": memory or None,
         "created_at": pd.Timestamp.utcnow().isoformat(),
     }
     run_meta_path = ETL_RUNS_DIR / f"{etl_run_id}.json"
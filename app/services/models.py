@@ -1,15 +1,18 @@
+from pathlib import Path
 from typing import Dict, Any, List, Optional, Tuple
 import uuid
 
 import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.linear_model import LinearRegression
-from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
-from sklearn import metrics
 
 from app.services import etl as etl_service
-from app.services import plots as plots_service
+from etl.profiling import SamplingProfiler
+
+# sklearn y app.services.plots (matplotlib/seaborn) se importan en el primer
+# entrenamiento, no al arrancar la API.
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+TRAINING_RUNS_DIR = BASE_DIR / "reports" / "training_runs"
 
 
 class TrainingError(Exception):
@@ -17,6 +20,9 @@ class TrainingError(Exception):
 
 
 def _select_algorithms(names: Optional[List[str]] = None):
+    from sklearn.linear_model import LinearRegression
+    from sklearn.ensemble import RandomForestRegressor, GradientBoostingRegressor
+
     registry = {
         "linear": LinearRegression,
         "rf": RandomForestRegressor,
@@ -57,6 +63,8 @@ def _ensure_numeric_features(df: pd.DataFrame, feature_cols: List[str]) -> Tuple
 
 
 def _compute_metrics(y_true: np.ndarray, y_pred: np.ndarray) -> Dict[str, float]:
+    from sklearn import metrics
+
     mae = metrics.mean_absolute_error(y_true, y_pred)
     mse = metrics.mean_squared_error(y_true, y_pred)
     rmse = np.sqrt(mse)
@@ -72,7 +80,7 @@ def _prepare_target(df: pd.DataFrame, target_col: str) -> Tuple[pd.Series, pd.Se
     - Si es categórico yes/no, lo mapea a 1/0.
     """
     s = df[target_col]
-    from pandas.api.types import is_numeric_dtype, is_object_dtype
+    from pandas.api.types import is_numeric_dtype, is_object_dtype, is_string_dtype
 
     # Caso 1: ya es numérico
     if is_numeric_dtype(s):
@@ -81,7 +89,8 @@ def _prepare_target(df: pd.DataFrame, target_col: str) -> Tuple[pd.Series, pd.Se
         return y.loc[mask], mask
 
     # Caso 2: categórico tipo yes/no
-    if is_object_dtype(s) or s.dtype == "category":
+    # pandas >= 3 lee el texto como dtype 'str', no object
+    if is_object_dtype(s) or is_string_dtype(s) or s.dtype == "category":
         s_str = s.astype(str).str.strip().str.lower()
         uniques = set(s_str.dropna().unique())
 
@@ -112,9 +121,31 @@ def train_and_evaluate_models(
     test_size: float = 0.2,
     random_state: int = 42,
     metric_primary: str = "rmse",
+    profile: bool = False,
 ) -> Dict[str, Any]:
     training_run_id = uuid.uuid4().hex
-
+    if not profile:
+        return _train_and_evaluate(training_run_id, etl_config_id, algorithms, test_size, random_state, metric_primary)
+
+    # Perfil por muestreo de todo el entrenamiento (ETL + fit + plots)
+    profiler = SamplingProfiler().start()
+    try:
+        result = _train_and_evaluate(training_run_id, etl_config_id, algorithms, test_size, random_state, metric_primary)
+    finally:
+        profiler.stop()
+        path = profiler.write(str(TRAINING_RUNS_DIR / f"{training_run_id}.profile.folded"))
+    result["profile_path"] = path
+    return result
+
+
+def _train_and_evaluate(
+    training_run_id: str,
+    etl_config_id: str,
+    algorithms: Optional[List[str]],
+    test_size: float,
+    random_state: int,
+    metric_primary: str,
+) -> Dict[str, Any]:
     # 1) Ejecutar ETL y cargar dataset procesado
     meta = etl_service.run_etl_and_store(etl_config_id)
     df = pd.read_csv(meta["processed_path"])
@@ -152,6 +183,8 @@ def train_and_evaluate_models(
         )
 
     # 4) Split de entrenamiento/prueba
+    from sklearn.model_selection import train_test_split
+
     X_train, X_test, y_train, y_test = train_test_split(
         X, y, test_size=test_size, random_state=random_state
     )
@@ -181,6 +214,8 @@ def train_and_evaluate_models(
     best_name, _ = min(results.items(), key=metric_key)
     best_preds = predictions.get(best_name, {})
 
+    from app.services import plots as plots_service
+
     plots = plots_service.generate_regression_plots(
         training_run_id=training_run_id,
         metric_primary=metric_primary,
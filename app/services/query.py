@@ -0,0 +1,305 @@
+"""Consultas de solo lectura sobre las salidas de data/processed.
+
+Un `QueryRequest` (filtros, rango de fechas, group by, agregados, orden, limite) se
+traduce a un plan de Acero, el motor columnar de pyarrow: scan -> filter ->
+project/aggregate -> order_by. Se ejecuta en proceso, vectorizado y multihilo, y el
+resultado se consume como un stream de record batches que la API devuelve en NDJSON
+sin materializarlo entero. Sin pyarrow las consultas no estan disponibles.
+
+Fuentes: archivos `.csv`, `.csv.gz`, `.csv.zst` y `.parquet` y directorios Parquet particionados
+(`day=`/`month=`, ver etl.read) directamente bajo data/processed. Los CSV comprimidos se
+leen de un stream descomprimido (etl.extract.open_input), no con el dataset de archivos.
+"""
+import os
+import json
+import logging
+import operator
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from etl import extract, load
+from etl import read as etl_read
+
+BASE_DIR = Path(__file__).resolve().parents[2]
+PROCESSED_DIR = BASE_DIR / "data" / "processed"
+# tope de filas devueltas por consulta (con o sin `limit`)
+QUERY_MAX_ROWS = int(os.environ.get("QUERY_MAX_ROWS", "1000000"))
+
+logger = logging.getLogger(__name__)
+
+_SUFFIXES = {".csv": "csv", ".gz": "csv", ".parquet": "parquet"}
+_AGGREGATES = {
+    "sum": "sum", "mean": "mean", "min": "min", "max": "max", "count": "count",
+    "count_distinct": "count_distinct", "count_all": "count_all", "stddev": "stddev",
+    "approximate_median": "approximate_median",
+}
+_COMPARISONS = {"==": operator.eq, "!=": operator.ne, "<": operator.lt, "<=": operator.le,
+                ">": operator.gt, ">=": operator.ge}
+
+
+class QueryError(Exception):
+    pass
+
+
+def _source_format(path: Path) -> Optional[str]:
+    name = path.name
+    if name.endswith((".part", ".tmp", ".old")):
+        return None
+    if path.is_dir():
+        try:
+            etl_read.partition_key(str(path))
+        except ValueError:
+            return None
+        return "parquet"
+    if name.endswith((".csv.gz", ".csv.zst")):
+        return "csv"
+    return _SUFFIXES.get(path.suffix) if path.suffix != ".gz" else None
+
+
+def _resolve(name: str) -> Path:
+    # solo nombres directos bajo data/processed: nada de rutas ni '..'
+    if not name or name != os.path.basename(name) or name in (".", ".."):
+        raise QueryError(f"Invalid source name '{name}'")
+    path = PROCESSED_DIR / name
+    if not path.exists():
+        raise FileNotFoundError(f"Source {name} not found")
+    if _source_format(path) is None:
+        raise QueryError(f"Source {name} is not a queryable output")
+    return path
+
+
+def open_dataset(name: str):
+    """Dataset de pyarrow de la fuente.
+
+    Un CSV comprimido es un dataset en memoria sobre el stream descomprimido: se escanea
+    una sola vez, asi que cada consulta abre el suyo.
+    """
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+
+    path = _resolve(name)
+    if path.is_dir():
+        return etl_read.dataset(str(path))
+    try:
+        if extract.compression_of(str(path)):
+            # el dataset CSV de arrow no lee bien los .csv.zst de varios frames de ProcessedWriter
+            return ds.dataset(pacsv.open_csv(extract.open_input(str(path))))
+        return ds.dataset(str(path), format=_source_format(path))
+    except pa.ArrowException as e:
+        raise QueryError(f"Source {name} could not be read: {e}") from e
+
+
+def list_sources() -> List[Dict[str, Any]]:
+    out = []
+    if not PROCESSED_DIR.exists():
+        return out
+    for path in sorted(PROCESSED_DIR.iterdir()):
+        fmt = _source_format(path)
+        if fmt is None:
+            continue
+        try:
+            columns = open_dataset(path.name).schema.names
+        except (OSError, QueryError) as e:
+            logger.warning("Skipping query source %s: %s", path.name, e)
+            continue
+        out.append({"name": path.name, "format": fmt, "partitioned": path.is_dir(), "columns": columns})
+    return out
+
+
+def _literal(value, field_type):
+    import pyarrow as pa
+    import pandas as pd
+
+    if pa.types.is_timestamp(field_type) or pa.types.is_date(field_type):
+        ts = pd.Timestamp(value)
+        if pa.types.is_date(field_type):
+            return pa.scalar(ts.date(), type=field_type)
+        return etl_read.timestamp_scalar(ts, field_type)
+    try:
+        return pa.scalar(value).cast(field_type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError, pa.ArrowTypeError) as e:
+        raise QueryError(f"Value {value!r} does not match column type {field_type}") from e
+
+
+def _check_columns(names: List[str], columns, what: str) -> None:
+    missing = [c for c in columns if c not in names]
+    if missing:
+        raise QueryError(f"Unknown {what} column(s): {missing}")
+
+
+def _filter_expression(data, request) -> Any:
+    import pyarrow.compute as pc
+
+    schema = data.schema
+    _check_columns(schema.names, [f.column for f in request.filters], "filter")
+    expr = None
+    if request.start is not None or request.end is not None:
+        _check_columns(schema.names, [request.date_column], "date")
+        partitioning = getattr(data, "partitioning", None)
+        if partitioning is not None and partitioning.schema.names:
+            expr = etl_read.build_filter(data, request.start, request.end, request.date_column)
+        else:
+            field_type = schema.field(request.date_column).type
+            if request.start is not None:
+                expr = pc.field(request.date_column) >= _literal(request.start, field_type)
+            if request.end is not None:
+                bound = pc.field(request.date_column) < _literal(request.end, field_type)
+                expr = bound if expr is None else expr & bound
+    for f in request.filters:
+        field = pc.field(f.column)
+        field_type = schema.field(f.column).type
+        if f.op == "is_null":
+            cond = field.is_null()
+        elif f.op == "not_null":
+            cond = field.is_valid()
+        elif f.op in ("in", "not_in"):
+            if not isinstance(f.value, list):
+                raise QueryError(f"Operator {f.op} needs a list value")
+            import pyarrow as pa
+            values = pa.array([_literal(v, field_type).as_py() for v in f.value], type=field_type)
+            cond = field.isin(values)
+            if f.op == "not_in":
+                cond = ~cond
+        else:
+            if f.value is None:
+                raise QueryError(f"Operator {f.op} needs a value")
+            cond = _COMPARISONS[f.op](field, _literal(f.value, field_type))
+        expr = cond if expr is None else expr & cond
+    return expr
+
+
+def plan(request) -> Any:
+    """Valida la consulta y devuelve la Declaration de Acero (aun sin ejecutar).
+
+    Los errores de Arrow al armar el plan (p.ej. un literal que no encaja con la clave de
+    particion) llegan como QueryError.
+    """
+    import pyarrow as pa
+
+    try:
+        return _plan(request)
+    except pa.ArrowException as e:
+        raise QueryError(str(e)) from e
+
+
+def _plan(request) -> Any:
+    import pyarrow.acero as ac
+    import pyarrow.dataset as ds
+
+    data = open_dataset(request.source)
+    schema = data.schema
+    expr = _filter_expression(data, request)
+
+    if request.aggregates:
+        _check_columns(schema.names, request.group_by, "group_by")
+        aggs, needed = [], set(request.group_by)
+        for a in request.aggregates:
+            if a.func == "count_all":
+                target = []
+            else:
+                if not a.column:
+                    raise QueryError(f"Aggregate {a.func} needs a column")
+                _check_columns(schema.names, [a.column], "aggregate")
+                target = a.column
+                needed.add(a.column)
+            name = _AGGREGATES[a.func]
+            func = f"hash_{name}" if request.group_by else name
+            alias = a.alias or (f"{a.func}_{a.column}" if a.column else a.func)
+            aggs.append((target, func, None, alias))
+        output_columns = list(request.group_by) + [agg[3] for agg in aggs]
+    else:
+        if request.group_by:
+            raise QueryError("group_by needs at least one aggregate")
+        needed = set(request.columns or schema.names)
+        _check_columns(schema.names, needed, "selected")
+        output_columns = list(request.columns or schema.names)
+    _check_columns(output_columns, [o.column for o in request.order_by], "order_by")
+
+    scan_columns = sorted(needed | ({f.column for f in request.filters}) |
+                          ({request.date_column} if request.start or request.end else set()))
+    nodes = [ac.Declaration("scan", ac.ScanNodeOptions(data, columns=scan_columns, filter=expr))]
+    if expr is not None:
+        # el scan solo poda archivos/row groups; el filtro exacto por fila va en su propio nodo
+        nodes.append(ac.Declaration("filter", ac.FilterNodeOptions(expr)))
+    if request.aggregates:
+        nodes.append(ac.Declaration("aggregate", ac.AggregateNodeOptions(aggs, keys=list(request.group_by))))
+    else:
+        nodes.append(ac.Declaration("project", ac.ProjectNodeOptions(
+            [ds.field(c) for c in output_columns], output_columns)))
+    if request.order_by:
+        keys = [(o.column, "descending" if o.descending else "ascending") for o in request.order_by]
+        nodes.append(ac.Declaration("order_by", ac.OrderByNodeOptions(keys)))
+    return ac.Declaration.from_sequence(nodes)
+
+
+class QueryResult:
+    """Iterador de record batches del resultado.
+
+    `truncated` pasa a True cuando se corto en QUERY_MAX_ROWS y quedaban filas (solo se
+    sabe al terminar de consumirlo); un `limit` propio por debajo del tope no cuenta.
+    """
+
+    def __init__(self, reader, limit: int, capped: bool):
+        self._reader = reader
+        self.limit = limit
+        self.capped = capped
+        self.truncated = False
+
+    def __iter__(self) -> Iterator[Any]:
+        remaining = self.limit
+        try:
+            for batch in self._reader:
+                if batch.num_rows == 0:
+                    continue
+                if remaining == 0:
+                    self.truncated = self.capped
+                    return
+                if batch.num_rows > remaining:
+                    self.truncated = self.capped
+                    yield batch.slice(0, remaining)
+                    return
+                remaining -= batch.num_rows
+                yield batch
+        finally:
+            self._reader.close()
+
+
+def execute(request) -> QueryResult:
+    """Record batches del resultado, respetando limit / QUERY_MAX_ROWS.
+
+    El plan se valida y arranca aqui (errores => QueryError); las filas se producen a
+    medida que se consume el iterador.
+    """
+    import pyarrow as pa
+
+    declaration = plan(request)
+    capped = request.limit is None or request.limit > QUERY_MAX_ROWS
+    limit = QUERY_MAX_ROWS if capped else request.limit
+    try:
+        reader = declaration.to_reader(use_threads=True)
+    except pa.ArrowException as e:
+        raise QueryError(str(e)) from e
+    return QueryResult(reader, limit, capped)
+
+
+def to_ndjson(batches) -> Iterator[bytes]:
+    """Una linea JSON por fila; fechas en ISO 8601 y NaN como null.
+
+    Si el resultado se corto en QUERY_MAX_ROWS se agrega una ultima linea
+    `{"_truncated": true, "max_rows": N}`.
+    """
+    for batch in batches:
+        text = batch.to_pandas().to_json(orient="records", lines=True, date_format="iso")
+        if text:
+            yield (text if text.endswith("\n") else text + "\n").encode("utf-8")
+    if getattr(batches, "truncated", False):
+        yield (json.dumps({"_truncated": True, "max_rows": batches.limit}) + "\n").encode("utf-8")
+
+
+def run_query(request) -> List[Dict[str, Any]]:
+    """Resultado completo como lista de dicts (para uso interno y tests)."""
+    rows: List[Dict[str, Any]] = []
+    for batch in execute(request):
+        rows.extend(batch.to_pylist())
+    return rows
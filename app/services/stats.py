@@ -0,0 +1,81 @@
+"""Estadisticas de columna combinables, para recorrer datasets por chunks.
+
+`RunningStats` acumula count/media/M2 (Welford, combinados con la formula de Chan) y
+una muestra uniforme de tamano fijo para la mediana aproximada: cada valor recibe una
+clave aleatoria y se conservan las `sample_size` claves menores, asi que dos muestras
+se combinan uniendo y recortando. Si la columna cabe en la muestra la mediana es exacta.
+"""
+import os
+from typing import Optional
+
+import numpy as np
+
+MEDIAN_SAMPLE_SIZE = int(os.environ.get("ETL_MEDIAN_SAMPLE_SIZE", "100000"))
+
+
+class RunningStats:
+    def __init__(self, sample_size: Optional[int] = None, seed: int = 0):
+        self.sample_size = sample_size or MEDIAN_SAMPLE_SIZE
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self._rng = np.random.default_rng(seed)
+        self._sample = np.empty(0, dtype="float64")
+        self._keys = np.empty(0, dtype="float64")
+
+    def update(self, values) -> "RunningStats":
+        """Agrega un bloque de valores (los NaN se ignoran, como en pandas)."""
+        arr = np.asarray(values, dtype="float64")
+        arr = arr[~np.isnan(arr)]
+        if arr.size == 0:
+            return self
+        other = RunningStats(self.sample_size)
+        other.count = int(arr.size)
+        other.mean = float(arr.mean())
+        other.m2 = float(((arr - other.mean) ** 2).sum())
+        other._sample = arr
+        other._keys = self._rng.random(arr.size)
+        return self.merge(other)
+
+    def merge(self, other: "RunningStats") -> "RunningStats":
+        if other.count == 0:
+            return self
+        if self.count == 0:
+            self.count, self.mean, self.m2 = other.count, other.mean, other.m2
+        else:
+            n = self.count + other.count
+            delta = other.mean - self.mean
+            self.mean += delta * other.count / n
+            self.m2 += other.m2 + delta * delta * self.count * other.count / n
+            self.count = n
+        sample = np.concatenate([self._sample, other._sample])
+        keys = np.concatenate([self._keys, other._keys])
+        if sample.size > self.sample_size:
+            keep = np.argpartition(keys, self.sample_size)[:self.sample_size]
+            sample, keys = sample[keep], keys[keep]
+        self._sample, self._keys = sample, keys
+        return self
+
+    def with_constant(self, value: float, n: int) -> "RunningStats":
+        """Copia de las estadisticas agregando `n` veces `value` (imputacion de faltantes)."""
+        out = RunningStats(self.sample_size)
+        out.merge(self)
+        if n:
+            const = RunningStats(self.sample_size)
+            const.count, const.mean, const.m2 = n, float(value), 0.0
+            out.merge(const)
+        return out
+
+    def std(self, ddof: int = 1) -> float:
+        if self.count - ddof <= 0:
+            return float("nan")
+        return float(np.sqrt(self.m2 / (self.count - ddof)))
+
+    def median(self) -> float:
+        if self._sample.size == 0:
+            return float("nan")
+        return float(np.median(self._sample))
+
+    @property
+    def exact_median(self) -> bool:
+        return self.count <= self.sample_size
@@ -0,0 +1,5 @@
+"""Micro-benchmarks de las rutas calientes del ETL.
+
+Uso:
+  python -m benchmarks.bench_clean_numeric
+"""
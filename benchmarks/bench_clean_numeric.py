@@ -0,0 +1,96 @@
+"""Micro-benchmark de transform.clean_numeric_column sobre los CSV de ejemplo del repo.
+
+Compara el limpiador fusionado contra la cadena original de operaciones `.str`
+(strip, dos replace y un regex) y verifica que ambos den el mismo resultado.
+
+Uso:
+  python -m benchmarks.bench_clean_numeric [--repeat 5] [--json salida.json]
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import pathlib
+
+import pandas as pd
+
+PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parents[1])
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from etl import transform  # noqa: E402
+
+SAMPLE_FILES = [
+    os.path.join(PROJECT_ROOT, 'data', 'Bank_Price_Data_China new.csv'),
+    os.path.join(PROJECT_ROOT, 'data', 'final_dataset_tata_motors.csv'),
+    os.path.join(PROJECT_ROOT, 'reports', 'sample_pool_swaps.csv.csv'),
+]
+SKIP_COLUMNS = {'Date', 'date', 'timestamp'}
+
+
+def legacy_clean_numeric_column(series: pd.Series) -> pd.Series:
+    """Implementacion previa, conservada como referencia."""
+    if series.dtype == object:
+        s = series.str.strip().str.replace(',', '').str.replace('\u00A0', '')
+        s = s.str.replace(r'^0+(?=\.)', '', regex=True)
+        return pd.to_numeric(s, errors='coerce')
+    return pd.to_numeric(series, errors='coerce')
+
+
+def _best_of(fn, frame: pd.DataFrame, repeat: int) -> float:
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for c in frame.columns:
+            fn(frame[c])
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_file(path: str, repeat: int = 5):
+    name = os.path.basename(path)
+    raw = pd.read_csv(path, dtype=object)
+    raw = raw[[c for c in raw.columns if c not in SKIP_COLUMNS]]
+    inferred = pd.read_csv(path)[raw.columns]
+    for c in raw.columns:
+        expected = legacy_clean_numeric_column(raw[c])
+        got = transform.clean_numeric_column(raw[c])
+        pd.testing.assert_series_equal(got.astype('float64'), expected.astype('float64'), check_names=False)
+    results = []
+    for label, frame in (('text', raw), ('inferred', inferred)):
+        legacy = _best_of(legacy_clean_numeric_column, frame, repeat)
+        fused = _best_of(transform.clean_numeric_column, frame, repeat)
+        results.append({
+            'file': name,
+            'input': label,
+            'rows': len(frame),
+            'cols': len(frame.columns),
+            'legacy_s': round(legacy, 6),
+            'fused_s': round(fused, 6),
+            'speedup': round(legacy / fused, 2) if fused > 0 else None,
+        })
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--json', dest='json_path', default=None)
+    args = parser.parse_args(argv)
+
+    results = []
+    for path in SAMPLE_FILES:
+        if os.path.exists(path):
+            results.extend(bench_file(path, repeat=args.repeat))
+    print(f"{'file':40} {'input':9} {'rows':>7} {'cols':>5} {'legacy_s':>10} {'fused_s':>10} {'speedup':>8}")
+    for r in results:
+        print(f"{r['file']:40} {r['input']:9} {r['rows']:>7} {r['cols']:>5} "
+              f"{r['legacy_s']:>10.4f} {r['fused_s']:>10.4f} {r['speedup']:>8}")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+    return results
+
+
+if __name__ == '__main__':
+    main()
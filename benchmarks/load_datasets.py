@@ -0,0 +1,123 @@
+"""Prueba de carga de /api/v1/datasets: latencia de /preview con subidas grandes en curso.
+
+Lanza `--uploads` subidas concurrentes de un CSV sintetico de readmisiones (`--rows`
+filas) y, mientras duran, pide previews sin parar con `--concurrency` clientes. Compara
+p50/p99 de /preview contra una linea base sin subidas; si el event loop se bloquea, el
+p99 bajo carga crece hasta la duracion de una subida.
+
+La app corre en proceso (httpx + ASGITransport) y escribe en un directorio temporal.
+
+Uso:
+  python -m benchmarks.load_datasets --rows 1m --uploads 4 [--json salida.json]
+"""
+import sys
+import json
+import time
+import asyncio
+import pathlib
+import argparse
+import tempfile
+
+PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parents[1])
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from benchmarks import synthetic  # noqa: E402
+from benchmarks.run import sandbox  # noqa: E402
+
+
+def _percentile(values, q):
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(q * (len(ordered) - 1))))]
+
+
+def _summary(latencies):
+    return {
+        'requests': len(latencies),
+        'p50_ms': round(_percentile(latencies, 0.5) * 1000, 2) if latencies else None,
+        'p99_ms': round(_percentile(latencies, 0.99) * 1000, 2) if latencies else None,
+        'max_ms': round(max(latencies) * 1000, 2) if latencies else None,
+    }
+
+
+async def _preview_loop(client, dataset_id, latencies, until):
+    while not until():
+        start = time.perf_counter()
+        resp = await client.get(f'/api/v1/datasets/{dataset_id}/preview')
+        resp.raise_for_status()
+        latencies.append(time.perf_counter() - start)
+
+
+async def run_load(csv_path: str, uploads: int, concurrency: int, baseline_requests: int):
+    import httpx
+    from main import app
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+        small = b'a,b\n1,2\n3,4\n'
+        resp = await client.post('/api/v1/datasets/upload-file', files={'file': ('small.csv', small, 'text/csv')})
+        resp.raise_for_status()
+        dataset_id = resp.json()['dataset_id']
+
+        baseline = []
+        count = {'n': 0}
+
+        def baseline_done():
+            count['n'] += 1
+            return count['n'] > baseline_requests
+
+        await asyncio.gather(*[_preview_loop(client, dataset_id, baseline, baseline_done)
+                               for _ in range(concurrency)])
+
+        with open(csv_path, 'rb') as f:
+            content = f.read()
+        upload_times = []
+        done = {'flag': False}
+
+        async def upload(i):
+            start = time.perf_counter()
+            r = await client.post('/api/v1/datasets/upload-file',
+                                  files={'file': (f'big_{i}.csv', content, 'text/csv')})
+            r.raise_for_status()
+            upload_times.append(time.perf_counter() - start)
+
+        async def uploads_then_stop():
+            await asyncio.gather(*[upload(i) for i in range(uploads)])
+            done['flag'] = True
+
+        loaded = []
+        await asyncio.gather(uploads_then_stop(),
+                             *[_preview_loop(client, dataset_id, loaded, lambda: done['flag'])
+                               for _ in range(concurrency)])
+    return {
+        'upload_bytes': len(content),
+        'uploads': uploads,
+        'upload_s': [round(t, 3) for t in upload_times],
+        'preview_baseline': _summary(baseline),
+        'preview_under_load': _summary(loaded),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', default='1m', help='filas del CSV subido (10k, 1m o un numero)')
+    parser.add_argument('--uploads', type=int, default=4)
+    parser.add_argument('--concurrency', type=int, default=4)
+    parser.add_argument('--baseline-requests', type=int, default=200)
+    parser.add_argument('--data-dir', default=None, help='cache de CSV sinteticos (benchmarks/.data)')
+    parser.add_argument('--json', dest='json_path', default=None)
+    args = parser.parse_args(argv)
+
+    csv_path = synthetic.ensure_csv('readmissions', synthetic.parse_scale(args.rows), data_dir=args.data_dir)
+    with tempfile.TemporaryDirectory(prefix='datasets_load_') as root, sandbox(root):
+        result = asyncio.run(run_load(csv_path, args.uploads, args.concurrency, args.baseline_requests))
+    print(json.dumps(result, indent=2))
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    return result
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,393 @@
+"""Suite de benchmarks de los caminos calientes (ETL, datasets, entrenamiento, EDA).
+
+Genera datos sinteticos (benchmarks/synthetic.py) a las escalas pedidas, mide cada caso
+(mejor y mediana de `--repeat` ejecuciones; la preparacion no se mide) y guarda los
+resultados en JSON para comparar entre commits. Todo lo que escriben las funciones
+medidas va a un directorio temporal: data/, reports/ y static/ no se tocan.
+
+Uso:
+  python -m benchmarks.run --scales 10k,1m --json bench_output.json
+  python -m benchmarks.run --scales 10k --only transform,write --compare base.json
+  python -m benchmarks.run --compare base.json --against new.json   # solo comparar
+
+Con --compare el proceso termina con codigo 1 si algun caso es mas lento que
+base * --threshold.
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import pathlib
+import platform
+import tempfile
+import contextlib
+import statistics
+import subprocess
+from datetime import datetime
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+
+PROJECT_ROOT = str(pathlib.Path(__file__).resolve().parents[1])
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from benchmarks import synthetic  # noqa: E402
+from etl import extract, load, metrics, transform  # noqa: E402
+
+DEFAULT_THRESHOLD = 1.15
+POOL_SWAPS_CHUNKSIZE = 200000
+
+
+class Case(NamedTuple):
+    name: str
+    kinds: tuple          # datasets sinteticos que necesita
+    max_rows: int         # escalas mayores se omiten (tiempo/memoria fuera de lo razonable)
+    setup: Callable[[Dict[str, Any]], Any]
+    run: Callable[[Any], int]   # devuelve las filas procesadas
+
+
+# ---------------------------------------------------------------------------
+# Aislamiento: las funciones medidas escriben bajo un directorio temporal
+# ---------------------------------------------------------------------------
+
+@contextlib.contextmanager
+def sandbox(root: str):
+    """Redirige los directorios de salida de los modulos medidos a `root`."""
+    patches = []
+
+    def patch(module, attr, value):
+        patches.append((module, attr, getattr(module, attr)))
+        setattr(module, attr, value)
+
+    def subdir(name):
+        path = os.path.join(root, name)
+        os.makedirs(path, exist_ok=True)
+        return path
+
+    patch(load, 'PROCESSED_DIR', subdir('processed'))
+    patch(extract, 'SCHEMA_CACHE_DIR', subdir('schema_cache'))
+    try:
+        from app.services import datasets, etl as etl_service
+        patch(datasets, 'DATASETS_DIR', pathlib.Path(subdir('datasets')))
+        patch(datasets, 'INDEX_PATH', pathlib.Path(root) / 'datasets' / 'index.json')
+        patch(etl_service, 'ETL_CONFIGS_DIR', pathlib.Path(subdir('etl_configs')))
+        patch(etl_service, 'ETL_OUTPUTS_DIR', pathlib.Path(subdir('processed')))
+        patch(etl_service, 'ETL_RUNS_DIR', pathlib.Path(subdir('etl_runs')))
+    except ImportError:
+        pass
+    try:
+        from app.services import plots
+        patch(plots, 'PLOTS_DIR', pathlib.Path(subdir('plots')))
+    except ImportError:
+        pass
+    try:
+        yield root
+    finally:
+        for module, attr, value in reversed(patches):
+            setattr(module, attr, value)
+
+
+def _load_eda():
+    """data/eda.py no es un paquete; se carga por ruta."""
+    import importlib.util
+    spec = importlib.util.spec_from_file_location('bench_eda', os.path.join(PROJECT_ROOT, 'data', 'eda.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# ---------------------------------------------------------------------------
+# Casos
+# ---------------------------------------------------------------------------
+
+def _read(ctx, kind):
+    return extract.read_csv_path(ctx['csv'][kind], use_cache=False)
+
+
+def _setup_clean_numeric(ctx):
+    frame = pd.read_csv(ctx['csv']['bank_prices'], dtype=str)
+    return frame.drop(columns=['Date'])
+
+
+def _run_clean_numeric(frame):
+    for c in frame.columns:
+        transform.clean_numeric_column(frame[c])
+    return len(frame)
+
+
+def _setup_pool_chunks(ctx):
+    return list(extract.read_csv_chunks('pool_swaps.csv', chunksize=POOL_SWAPS_CHUNKSIZE,
+                                        path=ctx['csv']['pool_swaps'], use_cache=False))
+
+
+def _run_pool_chunks(chunks):
+    for chunk in chunks:
+        transform.transform_pool_swaps_chunk(chunk)
+    return sum(len(c) for c in chunks)
+
+
+def _setup_write(ctx, filename):
+    df = transform.transform_bank_prices(_read(ctx, 'bank_prices'))
+    return {'df': df, 'filename': filename}
+
+
+def _run_write(state):
+    load.write_processed_df(state['df'], state['filename'], mode='w')
+    return len(state['df'])
+
+
+def _setup_append(ctx):
+    state = _setup_write(ctx, 'bench_append.processed.csv')
+    load.write_processed_df(state['df'], state['filename'], mode='w')
+    return state
+
+
+def _run_append(state):
+    load.write_processed_df(state['df'], state['filename'], mode='a')
+    return len(state['df'])
+
+
+def _setup_register(ctx):
+    with open(ctx['csv']['readmissions'], 'rb') as f:
+        return f.read()
+
+
+def _run_register(content):
+    from app.services import datasets
+    return datasets.register_dataset_from_bytes('readmissions.csv', content, source='benchmark')['rows']
+
+
+_READMISSIONS_CONFIG = {
+    'target_col': 'readmitted',
+    'feature_cols': ['time_in_hospital', 'n_lab_procedures', 'n_procedures', 'n_medications',
+                     'n_outpatient', 'n_inpatient', 'n_emergency'],
+    'drop_cols': ['age'],
+    'missing_strategy': 'mean',
+    'normalize_numeric': True,
+    'date_cols': [],
+}
+
+
+def _setup_run_etl(ctx):
+    return _read(ctx, 'readmissions')
+
+
+def _run_run_etl(df):
+    from app.services import etl as etl_service
+    return len(etl_service.run_etl(df, dict(_READMISSIONS_CONFIG))['df'])
+
+
+def _setup_training(ctx):
+    from app.services import datasets, etl as etl_service
+    entry = datasets.register_dataset_from_bytes('readmissions.csv', _setup_register(ctx), source='benchmark')
+    return {'config_id': etl_service.save_config({**_READMISSIONS_CONFIG, 'dataset_id': entry['dataset_id']}),
+            'rows': entry['rows']}
+
+
+def _run_training(state):
+    from app.services import models
+    models.train_and_evaluate_models(state['config_id'], algorithms=['linear', 'rf', 'gbr'])
+    return state['rows']
+
+
+def _setup_eda(ctx):
+    eda = _load_eda()
+    data_dir = os.path.join(ctx['root'], 'eda_data')
+    report_dir = os.path.join(ctx['root'], 'eda_reports')
+    os.makedirs(data_dir, exist_ok=True)
+    os.makedirs(os.path.join(report_dir, 'figs'), exist_ok=True)
+    # eda_full reconoce pool_swaps por nombre de archivo
+    names = {'bank_prices': 'Bank_Price_Data_China new.csv', 'tata': 'final_dataset_tata_motors.csv',
+             'pool_swaps': 'pool_swaps.csv'}
+    files = []
+    for kind, name in names.items():
+        target = os.path.join(data_dir, name)
+        shutil.copyfile(ctx['csv'][kind], target)
+        files.append(target)
+    eda.FILES = files
+    eda.REPORT_DIR = report_dir
+    eda.FIG_DIR = os.path.join(report_dir, 'figs')
+    return {'eda': eda, 'rows': ctx['rows'] * len(files)}
+
+
+def _run_eda(state):
+    with contextlib.redirect_stdout(open(os.devnull, 'w')):
+        state['eda'].eda_full()
+    return state['rows']
+
+
+def _parquet_available():
+    try:
+        import pyarrow  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+CASES: List[Case] = [
+    Case('transform_bank_prices', ('bank_prices',), 10_000_000,
+         lambda ctx: _read(ctx, 'bank_prices'), lambda df: len(transform.transform_bank_prices(df))),
+    Case('transform_tata', ('tata',), 10_000_000,
+         lambda ctx: _read(ctx, 'tata'), lambda df: len(transform.transform_tata(df))),
+    Case('transform_pool_swaps_chunk', ('pool_swaps',), 1_000_000, _setup_pool_chunks, _run_pool_chunks),
+    Case('clean_numeric_column', ('bank_prices',), 10_000_000, _setup_clean_numeric, _run_clean_numeric),
+    Case('write_processed_df[csv]', ('bank_prices',), 10_000_000,
+         lambda ctx: _setup_write(ctx, 'bench.processed.csv'), _run_write),
+    Case('write_processed_df[append]', ('bank_prices',), 10_000_000, _setup_append, _run_append),
+    Case('write_processed_df[parquet]', ('bank_prices',), 10_000_000,
+         lambda ctx: _setup_write(ctx, 'bench.processed.parquet'), _run_write),
+    Case('register_dataset_from_bytes', ('readmissions',), 1_000_000, _setup_register, _run_register),
+    Case('run_etl', ('readmissions',), 10_000_000, _setup_run_etl, _run_run_etl),
+    Case('train_and_evaluate_models', ('readmissions',), 1_000_000, _setup_training, _run_training),
+    Case('eda_full', ('bank_prices', 'tata', 'pool_swaps'), 1_000_000, _setup_eda, _run_eda),
+]
+
+
+def select_cases(only: Optional[str]) -> List[Case]:
+    cases = CASES
+    if not _parquet_available():
+        cases = [c for c in cases if c.name != 'write_processed_df[parquet]']
+    if only:
+        wanted = [w.strip() for w in only.split(',') if w.strip()]
+        cases = [c for c in cases if any(w in c.name for w in wanted)]
+    return cases
+
+
+# ---------------------------------------------------------------------------
+# Ejecucion
+# ---------------------------------------------------------------------------
+
+def time_case(case: Case, ctx: Dict[str, Any], repeat: int) -> Dict[str, Any]:
+    state = case.setup(ctx)
+    rss_before = metrics.peak_rss_bytes()
+    timings = []
+    rows = 0
+    for _ in range(repeat):
+        start = time.perf_counter()
+        rows = case.run(state)
+        timings.append(time.perf_counter() - start)
+    rss_after = metrics.peak_rss_bytes()
+    best = min(timings)
+    input_bytes = sum(os.path.getsize(ctx['csv'][k]) for k in case.kinds)
+    return {
+        'case': case.name,
+        'scale': synthetic.scale_label(ctx['rows']),
+        'rows': rows,
+        'repeat': repeat,
+        'best_s': round(best, 6),
+        'median_s': round(statistics.median(timings), 6),
+        'rows_per_s': round(rows / best, 1) if best > 0 else None,
+        'input_mb_per_s': round(input_bytes / (1024 * 1024) / best, 2) if best > 0 else None,
+        'peak_rss_growth_bytes': (rss_after - rss_before) if rss_before is not None and rss_after is not None else None,
+    }
+
+
+def run_suite(scales: List[int], cases: List[Case], repeat: int = 3, data_dir: Optional[str] = None,
+              seed: int = 0, log=print) -> List[Dict[str, Any]]:
+    results = []
+    root = tempfile.mkdtemp(prefix='etl_bench_')
+    try:
+        with sandbox(root):
+            for rows in scales:
+                todo = [c for c in cases if rows <= c.max_rows]
+                for c in cases:
+                    if c not in todo:
+                        log(f'skip {c.name}@{synthetic.scale_label(rows)} (max {synthetic.scale_label(c.max_rows)})')
+                kinds = sorted({k for c in todo for k in c.kinds})
+                csv = {k: synthetic.ensure_csv(k, rows, seed=seed, data_dir=data_dir) for k in kinds}
+                ctx = {'rows': rows, 'csv': csv, 'root': root}
+                for c in todo:
+                    result = time_case(c, ctx, repeat)
+                    log(f"{result['case']:32} {result['scale']:>6} best={result['best_s']:.4f}s "
+                        f"median={result['median_s']:.4f}s rows/s={result['rows_per_s']}")
+                    results.append(result)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+    return results
+
+
+def environment() -> Dict[str, Any]:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=PROJECT_ROOT, capture_output=True,
+                                text=True, timeout=10).stdout.strip() or None
+    except Exception:
+        commit = None
+    try:
+        import pyarrow
+        pyarrow_version = pyarrow.__version__
+    except Exception:
+        pyarrow_version = None
+    return {
+        'commit': commit,
+        'timestamp': datetime.utcnow().isoformat() + 'Z',
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'pandas': pd.__version__,
+        'pyarrow': pyarrow_version,
+        'csv_engine': extract.resolve_engine(),
+    }
+
+
+def compare(base: Dict[str, Any], new: Dict[str, Any], threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """Compara best_s caso a caso; ratio > threshold cuenta como regresion."""
+    base_by_key = {(r['case'], r['scale']): r for r in base.get('results', [])}
+    rows = []
+    for r in new.get('results', []):
+        b = base_by_key.get((r['case'], r['scale']))
+        if b is None or not b.get('best_s'):
+            continue
+        ratio = r['best_s'] / b['best_s']
+        rows.append({'case': r['case'], 'scale': r['scale'], 'base_s': b['best_s'], 'new_s': r['best_s'],
+                     'ratio': round(ratio, 3), 'regression': ratio > threshold})
+    return rows
+
+
+def _print_comparison(rows, base_meta, new_meta):
+    print(f"\nbase {base_meta.get('commit')} -> new {new_meta.get('commit')}")
+    print(f"{'case':32} {'scale':>6} {'base_s':>10} {'new_s':>10} {'ratio':>7}")
+    for r in rows:
+        flag = '  REGRESSION' if r['regression'] else ''
+        print(f"{r['case']:32} {r['scale']:>6} {r['base_s']:>10.4f} {r['new_s']:>10.4f} {r['ratio']:>7.3f}{flag}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scales', default='10k', help="escalas separadas por coma: 10k,1m,10m o numero de filas")
+    parser.add_argument('--only', default=None, help='subcadenas de nombres de caso, separadas por coma')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--data-dir', default=None, help='cache de CSV sinteticos (benchmarks/.data)')
+    parser.add_argument('--json', dest='json_path', default=None)
+    parser.add_argument('--compare', dest='base_path', default=None, help='JSON base para detectar regresiones')
+    parser.add_argument('--against', dest='against_path', default=None,
+                        help='comparar este JSON con --compare en vez de ejecutar la suite')
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD)
+    args = parser.parse_args(argv)
+
+    if args.against_path:
+        with open(args.against_path, 'r', encoding='utf-8') as f:
+            output = json.load(f)
+    else:
+        scales = [synthetic.parse_scale(s) for s in args.scales.split(',') if s.strip()]
+        results = run_suite(scales, select_cases(args.only), repeat=args.repeat, data_dir=args.data_dir,
+                            seed=args.seed)
+        output = {'meta': environment(), 'results': results}
+        if args.json_path:
+            with open(args.json_path, 'w', encoding='utf-8') as f:
+                json.dump(output, f, ensure_ascii=False, indent=2)
+
+    if args.base_path:
+        with open(args.base_path, 'r', encoding='utf-8') as f:
+            base = json.load(f)
+        rows = compare(base, output, threshold=args.threshold)
+        _print_comparison(rows, base.get('meta', {}), output.get('meta', {}))
+        if any(r['regression'] for r in rows):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,178 @@
+"""Generadores de datos sinteticos con la forma de los CSV reales del repo.
+
+- bank_prices: `Bank_Price_Data_China new.csv` (Date DD/MM/YYYY + 25 precios; algunos con
+  cero a la izquierda o separador de miles, como en la fuente).
+- tata: `final_dataset_tata_motors.csv` (barras de 1 minuto con zona horaria +05:30).
+- pool_swaps: `pool_swaps.csv` (swaps on-chain; cantidades enteras + decimals).
+- readmissions: dataset tabular de readmisiones hospitalarias (numericas, categoricas y
+  target yes/no), el tipo de archivo que se sube a /api/v1/datasets para entrenar.
+
+Los CSV se escriben por bloques para que 10M filas no necesiten caber en memoria y se
+cachean en benchmarks/.data/ (mismo tipo, filas y semilla => mismo archivo).
+"""
+import os
+from typing import Callable, Dict
+
+import numpy as np
+import pandas as pd
+
+DATA_DIR = os.path.join(os.path.dirname(__file__), '.data')
+SCALES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+WRITE_BLOCK_ROWS = 500_000
+
+BANK_COLUMNS = ['LS_ny', 'LS_jt', 'LS_gs', 'LS_js', 'LS_zg', 'JC_pa', 'JC_pf', 'JC_hx', 'JC_ms', 'JC_zs',
+                'JC_xy', 'JC_gd', 'JC_zx', 'CC_nb', 'CC_js', 'CC_hz', 'CC_nj', 'CC_bj', 'CC_sh', 'CC_gy',
+                'RC_jy', 'RC_zjg', 'RC_wx', 'RC_cs', 'RC_sn']
+
+
+def parse_scale(value: str) -> int:
+    """'10k' / '1m' / '10m' o un numero de filas."""
+    value = value.strip().lower()
+    if value in SCALES:
+        return SCALES[value]
+    return int(float(value))
+
+
+def scale_label(rows: int) -> str:
+    for label, n in SCALES.items():
+        if n == rows:
+            return label
+    return str(rows)
+
+
+def bank_prices(n: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    # las fechas se repiten cada ~10 anios para no salir del rango de datetime64
+    days = pd.Timestamp('2017-01-24') + pd.to_timedelta((np.arange(start, start + n) % 3650), unit='D')
+    out = {'Date': days.strftime('%d/%m/%Y')}
+    base = rng.uniform(3, 25, size=len(BANK_COLUMNS))
+    for i, c in enumerate(BANK_COLUMNS):
+        out[c] = np.round(base[i] * np.exp(rng.normal(0, 0.05, size=n)), 2)
+    df = pd.DataFrame(out)
+    # rarezas de la fuente: '04.06' y separador de miles en una columna de texto
+    df['JC_gd'] = ['%05.2f' % v for v in df['JC_gd']]
+    df['CC_sh'] = ['{:,.2f}'.format(v * 100) for v in df['CC_sh']]
+    return df
+
+
+def tata(n: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ts = pd.Timestamp('2025-07-14 09:15:00') + pd.to_timedelta(np.arange(start, start + n), unit='min')
+    close = 680 + np.cumsum(rng.normal(0, 0.5, size=n))
+    df = pd.DataFrame({
+        'timestamp': ts.strftime('%Y-%m-%d %H:%M:%S') + '+05:30',
+        'open': np.round(close + rng.normal(0, 0.3, size=n), 2),
+        'high': np.round(close + np.abs(rng.normal(0, 0.6, size=n)), 2),
+        'low': np.round(close - np.abs(rng.normal(0, 0.6, size=n)), 2),
+        'close': np.round(close, 2),
+        'volume': rng.integers(1_000, 200_000, size=n),
+        'RSI': np.round(rng.uniform(0, 100, size=n), 4),
+        'MACD': np.round(rng.normal(0, 1, size=n), 4),
+        'Doji': rng.integers(0, 2, size=n),
+        'date': ts.strftime('%Y-%m-%d'),
+        'sentiment': np.round(rng.uniform(-1, 1, size=n), 3),
+    })
+    # columnas calculadas con ventana: vacias al inicio como en la fuente
+    ema = pd.Series(np.round(close, 2)).ewm(span=50).mean().round(4)
+    ema[:min(n, 49)] = np.nan
+    df['ema_50'] = ema
+    df['volume_ratio'] = np.round(rng.uniform(0.2, 3, size=n), 4)
+    return df
+
+
+def pool_swaps(n: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n_pools = 200
+    pool = rng.integers(0, n_pools, size=n)
+    decimals_a = np.where(pool % 3 == 0, 9, 6)
+    decimals_b = np.where(pool % 5 == 0, 9, 6)
+    amount_a = rng.integers(1, 10**10, size=n)
+    amount_b = rng.integers(1, 10**10, size=n)
+    block_time = 1758310389 + np.arange(start, start + n) * 3 + rng.integers(0, 3, size=n)
+    price_a = np.round(rng.lognormal(0, 2, size=n), 8)
+    price_b = np.round(rng.lognormal(0, 2, size=n), 8)
+    ui_a = amount_a / 10.0 ** decimals_a
+    ui_b = amount_b / 10.0 ** decimals_b
+    volume = ui_a * price_a
+    fee_tier = np.array([0.0001, 0.0005, 0.003, 0.01])[pool % 4]
+    return pd.DataFrame({
+        'slot': 367923553 + np.arange(start, start + n) * 7,
+        'block_time': block_time,
+        'tx_signature': [f'sig{start + i:012d}' for i in range(n)],
+        'token_mint_a': [f'mintA{p:04d}' for p in pool],
+        'token_mint_b': [f'mintB{p:04d}' for p in pool],
+        'num_swaps': rng.integers(1, 4, size=n),
+        'token_amount_a': amount_a,
+        'token_amount_b': amount_b,
+        'decimals_a': decimals_a,
+        'decimals_b': decimals_b,
+        'token_price_a': price_a,
+        'token_price_b': price_b,
+        'pool_address': [f'pool{p:04d}' for p in pool],
+        'fee_tier': fee_tier,
+        'token_amount_a_ui': ui_a,
+        'token_amount_b_ui': ui_b,
+        'volume_usd': volume,
+        'fee_usd': volume * fee_tier,
+        'date': pd.to_datetime(block_time, unit='s').strftime('%Y-%m-%d %H:%M:%S'),
+        'tvl_usd': np.round(rng.lognormal(14, 1.5, size=n), 6),
+    })
+
+
+def readmissions(n: int, seed: int = 0, start: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    ages = np.array(['[40-50)', '[50-60)', '[60-70)', '[70-80)', '[80-90)'])
+    specialties = np.array(['Missing', 'InternalMedicine', 'Cardiology', 'Surgery', 'Emergency/Trauma', 'Other'])
+    diags = np.array(['Circulatory', 'Respiratory', 'Digestive', 'Diabetes', 'Injury', 'Other'])
+    n_inpatient = rng.poisson(0.6, size=n)
+    n_medications = rng.integers(1, 80, size=n)
+    # el target depende de algunas variables para que los modelos tengan algo que aprender
+    logit = -0.8 + 0.45 * n_inpatient + 0.01 * n_medications + rng.normal(0, 1, size=n)
+    df = pd.DataFrame({
+        'age': ages[rng.integers(0, len(ages), size=n)],
+        'time_in_hospital': rng.integers(1, 15, size=n),
+        'n_lab_procedures': rng.integers(1, 110, size=n),
+        'n_procedures': rng.integers(0, 7, size=n),
+        'n_medications': n_medications,
+        'n_outpatient': rng.poisson(0.4, size=n),
+        'n_inpatient': n_inpatient,
+        'n_emergency': rng.poisson(0.2, size=n),
+        'medical_specialty': specialties[rng.integers(0, len(specialties), size=n)],
+        'diag_1': diags[rng.integers(0, len(diags), size=n)],
+        'glucose_test': np.array(['no', 'normal', 'high'])[rng.integers(0, 3, size=n)],
+        'change': np.array(['no', 'yes'])[rng.integers(0, 2, size=n)],
+        'readmitted': np.where(logit > 0, 'yes', 'no'),
+    })
+    # algunos faltantes para las estrategias de imputacion
+    df.loc[rng.random(n) < 0.02, 'n_lab_procedures'] = np.nan
+    return df
+
+
+GENERATORS: Dict[str, Callable[..., pd.DataFrame]] = {
+    'bank_prices': bank_prices,
+    'tata': tata,
+    'pool_swaps': pool_swaps,
+    'readmissions': readmissions,
+}
+
+
+def write_csv(kind: str, rows: int, path: str, seed: int = 0, block_rows: int = WRITE_BLOCK_ROWS) -> str:
+    """Escribe `rows` filas sinteticas por bloques (memoria acotada). Escritura atomica."""
+    generate = GENERATORS[kind]
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8', newline='') as f:
+        for i, start in enumerate(range(0, rows, block_rows)):
+            block = generate(min(block_rows, rows - start), seed=seed + i, start=start)
+            block.to_csv(f, index=False, header=(i == 0))
+    os.replace(tmp, path)
+    return path
+
+
+def ensure_csv(kind: str, rows: int, seed: int = 0, data_dir: str = None) -> str:
+    """Ruta a un CSV sintetico cacheado; lo genera si no existe."""
+    data_dir = data_dir or DATA_DIR
+    path = os.path.join(data_dir, f'{kind}_{scale_label(rows)}_s{seed}.csv')
+    if not os.path.exists(path):
+        write_csv(kind, rows, path, seed=seed)
+    return path
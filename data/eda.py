@@ -6,8 +6,11 @@ Genera un informe markdown en reports/EDA_REPORT.md, resúmenes CSV y figuras en
 
 Notas:
 - Para archivos grandes (ej. pool_swaps.csv) hace lectura por chunks y muestreo por reservoir.
+  Los chunks se leen con etl.extract.read_csv_chunks: parseo multihilo con pyarrow o, sin
+  pyarrow, por rangos de bytes en varios procesos (ETL_CSV_ENGINE, ETL_CSV_WORKERS).
 """
 import os
+import sys
 import math
 import csv
 from collections import defaultdict
@@ -16,6 +19,11 @@ import numpy as np
 import matplotlib.pyplot as plt
 import seaborn as sns
 
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+from etl import extract  # noqa: E402
+
 BASE = os.path.join(os.path.dirname(__file__))
 DATA_DIR = BASE
 REPORT_DIR = os.path.join(os.path.dirname(__file__), "..", "reports")
@@ -103,7 +111,7 @@ def eda_full():
             nulls = defaultdict(int)
             numeric_welford = {}
             col_names = None
-            for chunk in pd.read_csv(path, chunksize=chunk_size):
+            for chunk in extract.read_csv_chunks(name, chunksize=chunk_size, path=path):
                 if col_names is None:
                     col_names = list(chunk.columns)
                 total += len(chunk)
@@ -1,28 +1,686 @@
+import io
 import os
+import csv
+import gzip
+import json
+import mmap
+import hashlib
+import time
+import logging
+import multiprocessing
+from collections import deque
+from contextlib import contextmanager
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
 import pandas as pd
 
 BASE = os.path.join(os.path.dirname(__file__), '..', 'data')
+SCHEMA_CACHE_DIR = os.path.join(BASE, '.schema_cache')
+
+# 'auto' usa pyarrow si esta instalado; si no, las lecturas por chunks usan 'parallel'
+# (rangos de bytes en procesos, ver read_csv_ranges) con mas de un core y el parser C de pandas.
+CSV_ENGINE = os.environ.get('ETL_CSV_ENGINE', 'auto')
+CSV_WORKERS = int(os.environ.get('ETL_CSV_WORKERS', '0')) or min(os.cpu_count() or 1, 8)
+CSV_RANGE_BYTES = int(float(os.environ.get('ETL_CSV_RANGE_MB', '32')) * 1024 * 1024)
+MP_START_METHOD = os.environ.get('ETL_MP_START_METHOD', 'spawn')
+# entradas comprimidas: se descomprimen en streaming al leer, nunca a disco
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+_INPUT_BUFFER_SIZE = 1 << 20
+
+logger = logging.getLogger('etl')
+
+# Ultimas estadisticas de lectura por ruta absoluta: rows, bytes, seconds, engine, mb_per_s.
+# Solo las de las READ_STATS_MAX rutas leidas mas recientemente (un servidor lee uploads sin fin).
+read_stats: Dict[str, Dict[str, Any]] = {}
+READ_STATS_MAX = 256
+
+# Tipos que se guardan en cache tras un escaneo; el resto (texto, fechas) se deja a la inferencia.
+_CACHEABLE_DTYPES = {'int64', 'float64', 'bool'}
+# kwargs de pandas que el lector pyarrow sabe traducir; cualquier otro fuerza el parser C.
+_PYARROW_KWARGS = {'dtype', 'usecols'}
+_PYARROW_BLOCK_SIZE = 16 << 20
+# el lector por chunks lee bloques por adelantado: con bloques grandes retiene buena parte
+# del archivo en memoria (173 MB de 117 MB con 16 MB), con 1 MB ~40 MB y la misma velocidad
+_PYARROW_STREAM_BLOCK_SIZE = 1 << 20
 
 
 def path_for(filename: str) -> str:
     return os.path.join(BASE, filename)
 
 
+def compression_of(path: str) -> Optional[str]:
+    """'gzip', 'zstd' o None segun la extension (p.ej. pool_swaps.csv.zst)."""
+    return COMPRESSION_SUFFIXES.get(os.path.splitext(str(path).lower())[1])
+
+
+def strip_compression(name: str) -> str:
+    """Nombre sin la extension de compresion: 'pool_swaps.csv.gz' -> 'pool_swaps.csv'."""
+    return os.path.splitext(name)[0] if compression_of(name) else name
+
+
+def is_csv(name: str) -> bool:
+    return strip_compression(name).lower().endswith('.csv')
+
+
+def open_input(path: str):
+    """Stream binario de un archivo de entrada, descomprimido al vuelo si hace falta.
+
+    Con pyarrow la descompresion corre en C++ con lectura anticipada de 1 MB; sin pyarrow
+    gzip usa el modulo estandar y zstd el paquete `zstandard` si esta instalado.
+    """
+    codec = compression_of(path)
+    if codec is None:
+        return open(path, 'rb')
+    if _pyarrow_available():
+        import pyarrow as pa
+        return pa.input_stream(path, compression=codec, buffer_size=_INPUT_BUFFER_SIZE)
+    if codec == 'gzip':
+        return gzip.open(path, 'rb')
+    try:
+        import zstandard
+    except ImportError:
+        raise ValueError(f'Reading {os.path.basename(path)} needs pyarrow or zstandard installed') from None
+    return zstandard.open(path, 'rb')
+
+
+def _pyarrow_input(path: str):
+    return open_input(path) if compression_of(path) else path
+
+
+@contextmanager
+def _csv_source(path: str):
+    # pandas infiere gzip por la extension, pero zstd necesita el paquete zstandard
+    if compression_of(path) is None:
+        yield path
+    else:
+        with open_input(path) as f:
+            yield f
+
+
+def _pyarrow_available() -> bool:
+    try:
+        import pyarrow.csv  # noqa: F401
+        return True
+    except Exception:
+        return False
+
+
+def resolve_engine(engine: Optional[str] = None, chunked: bool = False) -> str:
+    """Devuelve 'pyarrow', 'parallel' o 'c' segun la preferencia y lo que este instalado.
+
+    'parallel' solo aplica a lecturas por chunks (`chunked=True`); las completas usan 'c'.
+    """
+    engine = engine or CSV_ENGINE
+    if engine == 'parallel':
+        return 'parallel' if chunked else 'c'
+    if engine in ('auto', 'pyarrow'):
+        if _pyarrow_available():
+            return 'pyarrow'
+        if engine == 'pyarrow':
+            logger.warning('pyarrow not installed; falling back to the pandas C parser')
+        elif chunked and CSV_WORKERS > 1:
+            return 'parallel'
+        return 'c'
+    return 'c'
+
+
+# ---------------------------------------------------------------------------
+# Cache de dtypes por archivo
+# ---------------------------------------------------------------------------
+
+def _schema_cache_path(path: str) -> str:
+    # por ruta absoluta: dos data/ distintos con el mismo nombre de archivo no comparten cache
+    digest = hashlib.sha1(os.path.abspath(path).encode('utf-8')).hexdigest()[:12]
+    return os.path.join(SCHEMA_CACHE_DIR, f'{os.path.basename(path)}.{digest}.json')
+
+
+def _file_version(path: str) -> Dict[str, int]:
+    st = os.stat(path)
+    return {'size': st.st_size, 'mtime_ns': st.st_mtime_ns}
+
+
+def _read_header(path: str):
+    with _csv_source(path) as source:
+        return list(pd.read_csv(source, nrows=0).columns)
+
+
+def cached_dtypes(path: str) -> Dict[str, str]:
+    """Dtypes numericos detectados en un escaneo previo del mismo archivo (ruta, tamano y mtime)."""
+    cache_path = _schema_cache_path(path)
+    if not os.path.exists(cache_path):
+        return {}
+    try:
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            cached = json.load(f)
+        if cached.get('version') != _file_version(path) or cached.get('columns') != _read_header(path):
+            return {}
+        return cached.get('dtypes', {})
+    except Exception:
+        return {}
+
+
+def remember_dtypes(path: str, columns, dtypes: Dict[str, str]) -> None:
+    keep = {c: d for c, d in dtypes.items() if d in _CACHEABLE_DTYPES}
+    os.makedirs(SCHEMA_CACHE_DIR, exist_ok=True)
+    tmp = _schema_cache_path(path) + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump({'version': _file_version(path), 'columns': list(columns), 'dtypes': keep}, f,
+                  ensure_ascii=False, indent=2)
+    os.replace(tmp, _schema_cache_path(path))
+
+
+def forget_dtypes(path: str) -> None:
+    try:
+        os.remove(_schema_cache_path(path))
+    except FileNotFoundError:
+        pass
+
+
+def _widen(previous: Optional[str], current: str) -> str:
+    # un chunk con NaN convierte int64 en float64; el cache debe quedarse con el mas ancho
+    if previous is None or previous == current:
+        return current
+    if {previous, current} <= {'int64', 'float64'}:
+        return 'float64'
+    return 'object'
+
+
+def _put_stats(path: str, stats: Dict[str, Any]) -> None:
+    key = os.path.abspath(path)
+    read_stats.pop(key, None)
+    read_stats[key] = stats
+    while len(read_stats) > READ_STATS_MAX:
+        del read_stats[next(iter(read_stats))]
+
+
+def _record_stats(path: str, rows: int, seconds: float, engine: str) -> Dict[str, Any]:
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    mb = size / (1024 * 1024)
+    stats = {
+        'rows': rows,
+        'bytes': size,
+        'seconds': round(seconds, 4),
+        'engine': engine,
+        'rows_per_s': round(rows / seconds, 1) if seconds > 0 else None,
+        'mb_per_s': round(mb / seconds, 2) if seconds > 0 else None,
+    }
+    _put_stats(path, stats)
+    logger.info('Read %s: rows=%d size=%.1fMB in %.2fs (%s MB/s, engine=%s)',
+                os.path.basename(path), rows, mb, seconds, stats['mb_per_s'], engine)
+    return stats
+
+
+# ---------------------------------------------------------------------------
+# Lectura completa
+# ---------------------------------------------------------------------------
+
+def _pyarrow_convert_options(path: str, dtypes: Dict[str, str], usecols=None):
+    """ConvertOptions con los dtypes declarados/cacheados.
+
+    Las columnas que pyarrow infiere como fecha/hora se fuerzan a texto: pyarrow pasa los
+    timestamps con zona horaria a UTC y las transformaciones esperan el texto original,
+    igual que con el parser C.
+    """
+    import numpy as np
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    column_types = {}
+    with pacsv.open_csv(_pyarrow_input(path), read_options=pacsv.ReadOptions(block_size=1 << 20)) as probe:
+        for field in probe.schema:
+            if pa.types.is_temporal(field.type):
+                column_types[field.name] = pa.string()
+    for c, d in dtypes.items():
+        column_types[c] = pa.from_numpy_dtype(np.dtype(d))
+    return pacsv.ConvertOptions(
+        column_types=column_types,
+        include_columns=list(usecols) if usecols is not None else None,
+        strings_can_be_null=True,
+    )
+
+
+def _read_pyarrow_full(path: str, dtypes: Dict[str, str], usecols=None) -> pd.DataFrame:
+    import pyarrow.csv as pacsv
+
+    table = pacsv.read_csv(
+        _pyarrow_input(path),
+        read_options=pacsv.ReadOptions(use_threads=True, block_size=_PYARROW_BLOCK_SIZE),
+        convert_options=_pyarrow_convert_options(path, dtypes, usecols),
+    )
+    return table.to_pandas()
+
+
+def read_csv_path(path, engine: Optional[str] = None, use_cache: bool = True, **kwargs) -> pd.DataFrame:
+    """Leer un CSV completo desde una ruta arbitraria.
+
+    Con engine pyarrow el parseo es multihilo y usa los dtypes cacheados de un escaneo
+    previo; si pyarrow no esta disponible, los kwargs no son traducibles o la lectura
+    falla, se usa el parser C de pandas (comportamiento original).
+    """
+    path = str(path)
+    engine = resolve_engine(engine)
+    if engine == 'pyarrow' and set(kwargs) - _PYARROW_KWARGS:
+        engine = 'c'
+    declared = kwargs.pop('dtype', None)
+    dtypes = dict(cached_dtypes(path)) if use_cache and declared is None else {}
+    if declared is not None:
+        dtypes = declared
+
+    start = time.perf_counter()
+    df = None
+    if engine == 'pyarrow':
+        try:
+            df = _read_pyarrow_full(path, dtypes, kwargs.get('usecols'))
+        except Exception as e:
+            logger.warning('pyarrow CSV read failed for %s (%s); retrying with C parser', path, e)
+            engine = 'c'
+    if df is None:
+        try:
+            with _csv_source(path) as source:
+                df = pd.read_csv(source, dtype=dtypes or None, **kwargs)
+        except (ValueError, TypeError):
+            if declared is not None or not dtypes:
+                raise
+            # el cache quedo obsoleto (p.ej. aparecieron NaN en una columna entera)
+            forget_dtypes(path)
+            with _csv_source(path) as source:
+                df = pd.read_csv(source, **kwargs)
+    _record_stats(path, len(df), time.perf_counter() - start, engine)
+    if use_cache and not kwargs:
+        remember_dtypes(path, df.columns, {c: str(t) for c, t in df.dtypes.items()})
+    return df
+
+
 def read_csv_full(filename: str, **kwargs) -> pd.DataFrame:
     """Leer CSV completo con pandas (para archivos pequeños/medianos)."""
     path = path_for(filename)
-    return pd.read_csv(path, **kwargs)
+    return read_csv_path(path, **kwargs)
 
 
-def read_csv_chunks(filename: str, chunksize: int = 200000, **kwargs):
-    """Generador de chunks para archivos grandes."""
-    path = path_for(filename)
-    return pd.read_csv(path, chunksize=chunksize, **kwargs)
+# ---------------------------------------------------------------------------
+# Lectura por chunks
+# ---------------------------------------------------------------------------
+
+def _iter_pyarrow_chunks(path: str, chunksize: int, dtypes: Dict[str, str], skip_rows: int,
+                         state: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    import pyarrow as pa
+    import pyarrow.csv as pacsv
+
+    read_options = pacsv.ReadOptions(use_threads=True, block_size=_PYARROW_STREAM_BLOCK_SIZE,
+                                     skip_rows_after_names=skip_rows)
+    convert_options = _pyarrow_convert_options(path, dtypes)
+    # con entrada comprimida la descompresion corre en el hilo de lectura anticipada de
+    # pyarrow, en paralelo con el parseo multihilo de los bloques ya descomprimidos
+    reader = pacsv.open_csv(_pyarrow_input(path), read_options=read_options, convert_options=convert_options)
+    pending = []
+    n_pending = 0
+    for batch in reader:
+        pending.append(batch)
+        n_pending += batch.num_rows
+        while n_pending >= chunksize:
+            table = pa.Table.from_batches(pending)
+            yield table.slice(0, chunksize).to_pandas()
+            state['rows'] += chunksize
+            rest = table.slice(chunksize)
+            pending = rest.to_batches()
+            n_pending = rest.num_rows
+    if n_pending:
+        yield pa.Table.from_batches(pending).to_pandas()
+        state['rows'] += n_pending
+
+
+def _iter_c_chunks(path: str, chunksize: int, dtypes: Dict[str, str], skip_rows: int,
+                   kwargs: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    if skip_rows:
+        # saltar filas de datos conservando el encabezado (fila 0)
+        kwargs = {**kwargs, 'skiprows': lambda i: 0 < i <= skip_rows}
+    with _csv_source(path) as source:
+        yield from pd.read_csv(source, chunksize=chunksize, dtype=dtypes or None, **kwargs)
+
+
+# ---------------------------------------------------------------------------
+# Lectura paralela por rangos de bytes
+# ---------------------------------------------------------------------------
+
+class InputChanged(RuntimeError):
+    """El archivo se reemplazo o modifico mientras se leia por rangos."""
+
+
+def _file_identity(path: str) -> Tuple[int, int, int, int]:
+    st = os.stat(path)
+    return st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns
+
+
+def _next_record_end(mm, pos: int, quoted: bool) -> int:
+    """Offset tras el primer salto de linea desde `pos` que no cae dentro de comillas.
+
+    `quoted` indica si `pos` esta dentro de un campo entre comillas. Las comillas escapadas
+    ("") suman dos y no cambian la paridad, asi que basta contar comillas.
+    """
+    size = len(mm)
+    while True:
+        nl = mm.find(b'\n', pos)
+        if nl == -1:
+            return size
+        if mm[pos:nl].count(b'"') % 2:
+            quoted = not quoted
+        if not quoted:
+            return nl + 1
+        pos = nl + 1
+
+
+def row_offset(path: str, start: int, rows: int) -> Optional[int]:
+    """Offset del inicio de la fila `rows` contando desde `start` (inicio de una fila).
+
+    Cuenta saltos de linea por bloques de 1 MB, sin parsear. Devuelve None si las filas no
+    se pueden contar asi: campos entre comillas (pueden tener saltos de linea) o lineas en
+    blanco (el parser las ignora).
+    """
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return None
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if any(mm.find(token, start) != -1 for token in (b'"', b'\n\n', b'\n\r\n')):
+                return None
+            size = len(mm)
+            pos = start
+            while rows and pos < size:
+                end = min(pos + (1 << 20), size)
+                n = mm[pos:end].count(b'\n')
+                if n >= rows:
+                    for _ in range(rows):
+                        pos = mm.find(b'\n', pos) + 1
+                    return pos
+                rows -= n
+                pos = end
+            return pos
+
+
+def _header_end(path: str) -> int:
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            return _next_record_end(mm, 0, False)
+
+
+def split_ranges(path: str, range_bytes: Optional[int] = None,
+                 start: Optional[int] = None) -> Tuple[int, List[Tuple[int, int]]]:
+    """Parte un CSV en rangos de ~`range_bytes` que empiezan y terminan en limites de fila.
+
+    Devuelve (fin del encabezado, [(inicio, fin), ...]). Respeta saltos de linea dentro de
+    campos entre comillas: la paridad de comillas hasta cada corte se lleva contando las
+    comillas de cada tramo (una pasada a velocidad de memoria; se omite si el archivo no
+    tiene comillas). `start` (un inicio de fila, ver row_offset) reemplaza al fin del
+    encabezado como comienzo del primer rango.
+    """
+    range_bytes = range_bytes or CSV_RANGE_BYTES
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return 0, []
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            size = len(mm)
+            has_quotes = mm.find(b'"') != -1
+            header_end = _next_record_end(mm, 0, False)
+            ranges = []
+            start = header_end if start is None else start
+            while start < size:
+                target = start + range_bytes
+                if target >= size:
+                    ranges.append((start, size))
+                    break
+                quoted = has_quotes and mm[start:target].count(b'"') % 2 == 1
+                end = _next_record_end(mm, target, quoted) if has_quotes else \
+                    (mm.find(b'\n', target) + 1 or size)
+                ranges.append((start, end))
+                start = end
+    return header_end, ranges
+
+
+def _parse_range(path: str, start: int, end: int, columns: List[str], dtypes: Dict[str, str],
+                 kwargs: Dict[str, Any], identity: Optional[Tuple[int, int, int, int]] = None) -> pd.DataFrame:
+    """Worker: parsea un rango de bytes del archivo mapeado en memoria.
+
+    `identity` (ver _file_identity) es la del archivo que se partio; si el abierto aqui es
+    otro (p.ej. una subida con el mismo nombre lo reemplazo) se lanza InputChanged.
+    """
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        if identity is not None and (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) != tuple(identity):
+            raise InputChanged(f'{os.path.basename(path)} changed while it was being read')
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[start:end]
+    # round_trip: mismos floats que el lector pyarrow
+    return pd.read_csv(io.BytesIO(data), header=None, names=columns, dtype=dtypes or None,
+                       float_precision='round_trip', **kwargs)
+
+
+def _range_dtypes(df: pd.DataFrame) -> Dict[str, str]:
+    """Tipos a fijar en el resto de los rangos segun el primero parseado.
+
+    Numericos, booleanos y texto; una columna sin valores no fija tipo (seria float64).
+    """
+    out = {}
+    for c, t in df.dtypes.items():
+        if not df[c].notna().any():
+            continue
+        if str(t) in _CACHEABLE_DTYPES:
+            out[c] = str(t)
+        elif pd.api.types.is_string_dtype(t):
+            out[c] = 'str'
+    return out
+
+
+def read_csv_ranges(path: str, dtypes: Optional[Dict[str, str]] = None, workers: Optional[int] = None,
+                    range_bytes: Optional[int] = None, skip_rows: int = 0, **kwargs) -> Iterator[pd.DataFrame]:
+    """Parsea un CSV en paralelo: un DataFrame por rango de bytes, en orden de archivo.
+
+    El archivo se parte con split_ranges y cada rango se parsea en un proceso
+    (`workers`, ETL_CSV_WORKERS; por defecto un proceso por core hasta 8) con el parser C
+    de pandas. Hay como mucho 2 * workers rangos en vuelo, asi que la memoria depende del
+    tamano de rango (ETL_CSV_RANGE_MB), no del archivo.
+
+    Los tipos se deciden una vez: `dtypes` (p.ej. de la cache de esquemas) o, si no hay,
+    los del primer rango, que se parsea aqui antes de repartir el resto. Asi una columna
+    no cambia de tipo entre rangos; un rango que no encaja con ellos falla (read_csv_chunks
+    sigue entonces con el parser C). `skip_rows` salta filas de datos: contando saltos de
+    linea (row_offset) si se puede, si no parseandolas y descartandolas.
+
+    Cada rango se abre por ruta, asi que el archivo se fija antes de partirlo (dispositivo,
+    inodo, tamano, mtime) y todo rango de otra version falla con InputChanged: mezclar
+    rangos de dos versiones daria filas corruptas sin error.
+    """
+    workers = workers or CSV_WORKERS
+    identity = _file_identity(path)
+    start = None
+    if skip_rows:
+        start = row_offset(path, _header_end(path), skip_rows)
+        if start is not None:
+            skip_rows = 0
+    header_end, ranges = split_ranges(path, range_bytes, start=start)
+    if header_end == 0:
+        return
+    with open(path, 'r', encoding='utf-8', newline='') as f:
+        columns = next(csv.reader(f))
+    if _file_identity(path) != identity:
+        raise InputChanged(f'{os.path.basename(path)} changed while it was being split')
+    dtypes = dtypes or {}
+
+    def parsed(df):
+        # filas saltadas que no se pudieron contar
+        nonlocal skip_rows
+        if skip_rows:
+            dropped = min(skip_rows, len(df))
+            skip_rows -= dropped
+            df = df.iloc[dropped:]
+        return df
+
+    if not dtypes and ranges:
+        first = _parse_range(path, ranges[0][0], ranges[0][1], columns, {}, kwargs, identity)
+        dtypes = _range_dtypes(first)
+        ranges = ranges[1:]
+        yield parsed(first)
+    if workers <= 1 or len(ranges) <= 1:
+        for start, end in ranges:
+            yield parsed(_parse_range(path, start, end, columns, dtypes, kwargs, identity))
+        return
+    ctx = multiprocessing.get_context(MP_START_METHOD)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges)), mp_context=ctx) as pool:
+        todo = iter(ranges)
+        pending = deque()
+        for start, end in todo:
+            pending.append(pool.submit(_parse_range, path, start, end, columns, dtypes, kwargs, identity))
+            if len(pending) >= 2 * workers:
+                break
+        while pending:
+            df = pending.popleft().result()
+            nxt = next(todo, None)
+            if nxt is not None:
+                pending.append(pool.submit(_parse_range, path, nxt[0], nxt[1], columns, dtypes, kwargs,
+                                           identity))
+            yield parsed(df)
+
+
+def _iter_parallel_chunks(path: str, chunksize: int, dtypes: Dict[str, str], skip_rows: int,
+                          state: Dict[str, Any], kwargs: Dict[str, Any]) -> Iterator[pd.DataFrame]:
+    # los rangos se re-agrupan en chunks de `chunksize` filas; al reanudar, read_csv_ranges
+    # empieza tras las filas ya procesadas
+    pending = []
+    n_pending = 0
+    for df in read_csv_ranges(path, dtypes=dtypes, skip_rows=skip_rows, **kwargs):
+        if not len(df):
+            continue
+        pending.append(df)
+        n_pending += len(df)
+        while n_pending >= chunksize:
+            table = pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+            yield table.iloc[:chunksize]
+            state['rows'] += chunksize
+            rest = table.iloc[chunksize:]
+            pending = [rest] if len(rest) else []
+            n_pending = len(rest)
+    if n_pending:
+        yield pd.concat(pending, ignore_index=True) if len(pending) > 1 else pending[0]
+        state['rows'] += n_pending
+
+
+def read_csv_chunks(filename: str, chunksize: int = 200000, engine: Optional[str] = None,
+                    skip_rows: int = 0, path: Optional[str] = None, use_cache: bool = True, **kwargs):
+    """Generador de chunks para archivos grandes.
+
+    `skip_rows` salta ese numero de filas de datos (para reanudar). Con engine pyarrow
+    el archivo se lee en streaming multihilo y se re-agrupa en chunks de `chunksize`
+    filas; si pyarrow falla a mitad del archivo se continua con el parser C desde la
+    ultima fila entregada. Con engine 'parallel' los rangos de bytes del archivo se parsean
+    en procesos (read_csv_ranges) y los chunks llegan en orden.
+    Los archivos `.gz` / `.zst` se descomprimen en streaming (open_input); para ellos
+    'parallel' se lee con el parser C.
+    """
+    path = path or path_for(filename)
+    engine = resolve_engine(engine, chunked=True)
+    if engine == 'pyarrow' and kwargs:
+        engine = 'c'
+    if engine == 'parallel' and compression_of(path):
+        # un stream comprimido no se puede partir en rangos de bytes
+        engine = 'c'
+    dtypes = cached_dtypes(path) if use_cache else {}
+
+    def generate():
+        start = time.perf_counter()
+        state = {'rows': 0}
+        used = engine
+        seen: Dict[str, str] = {}
+        columns = None
+        index_start = skip_rows
+        chunks = None
+        if engine == 'pyarrow':
+            chunks = _iter_pyarrow_chunks(path, chunksize, dtypes, skip_rows, state)
+        elif engine == 'parallel':
+            chunks = _iter_parallel_chunks(path, chunksize, dtypes, skip_rows, state, kwargs)
+        else:
+            chunks = _iter_c_chunks(path, chunksize, dtypes, skip_rows, kwargs)
+        while True:
+            try:
+                chunk = next(chunks)
+            except StopIteration:
+                break
+            except InputChanged:
+                # seguir con el parser C leeria la version nueva a partir de la fila actual
+                raise
+            except Exception as e:
+                if used == 'c' and not dtypes:
+                    raise
+                logger.warning('CSV chunk read failed for %s after %d rows (%s); continuing with C parser',
+                               path, state['rows'], e)
+                forget_dtypes(path)
+                used = 'c'
+                chunks = _iter_c_chunks(path, chunksize, {}, skip_rows + state['rows'], kwargs)
+                continue
+            if used == 'c':
+                state['rows'] += len(chunk)
+            chunk.index = pd.RangeIndex(index_start, index_start + len(chunk))
+            index_start += len(chunk)
+            columns = chunk.columns
+            for c, t in chunk.dtypes.items():
+                seen[c] = _widen(seen.get(c), str(t))
+            yield chunk
+        _record_stats(path, state['rows'], time.perf_counter() - start, used)
+        if use_cache and columns is not None and not kwargs and not skip_rows:
+            remember_dtypes(path, columns, seen)
+
+    return generate()
+
+
+# ---------------------------------------------------------------------------
+# Lectura incremental (fuentes que solo crecen)
+# ---------------------------------------------------------------------------
+
+def last_line_end(path: str, limit: int) -> int:
+    """Offset justo despues del ultimo salto de linea en los primeros `limit` bytes."""
+    with open(path, 'rb') as f:
+        pos = limit
+        while pos > 0:
+            start = max(0, pos - 65536)
+            f.seek(start)
+            block = f.read(pos - start)
+            nl = block.rfind(b'\n')
+            if nl >= 0:
+                return start + nl + 1
+            pos = start
+    return 0
+
+
+def read_csv_tail(path: str, offset: int, **kwargs):
+    """Filas de un CSV a partir del byte `offset` (inicio de una linea).
+
+    Devuelve (DataFrame con las columnas del encabezado, offset del inicio de la ultima
+    linea sin salto final). Una ultima fila sin salto de linea se lee, igual que en una
+    lectura completa, pero el offset devuelto queda antes de ella: la siguiente lectura
+    la vuelve a leer por si se estaba escribiendo (quien llama descarta lo repetido).
+    Los floats se parsean con `round_trip`, como el lector pyarrow de la lectura completa.
+    `read_stats[path]` registra solo los bytes leidos.
+    """
+    if compression_of(path):
+        raise ValueError(f'Cannot read {os.path.basename(path)} from a byte offset: it is compressed')
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        header = f.readline()
+        f.seek(offset)
+        data = f.read()
+    kwargs.setdefault('float_precision', 'round_trip')
+    df = pd.read_csv(io.BytesIO(header + data), **kwargs)
+    seconds = time.perf_counter() - start
+    _put_stats(path, {'rows': len(df), 'bytes': len(data), 'seconds': round(seconds, 4),
+                      'engine': 'c', 'offset': offset})
+    logger.info('Read %s from byte %d: rows=%d size=%.1fKB in %.3fs',
+                os.path.basename(path), offset, len(df), len(data) / 1024, seconds)
+    return df, offset + data.rfind(b'\n') + 1
 
 
 def list_data_files():
-    return [
-        path_for('Bank_Price_Data_China new.csv'),
-        path_for('final_dataset_tata_motors.csv'),
-        path_for('pool_swaps.csv'),
-    ]
+    """CSV de entrada en data/, tambien comprimidos (los que puede planear etl.pipeline)."""
+    if not os.path.isdir(BASE):
+        return []
+    return sorted(path_for(name) for name in os.listdir(BASE)
+                  if is_csv(name) and os.path.isfile(path_for(name)))
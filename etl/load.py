@@ -1,9 +1,70 @@
 import os
+import io
+import re
+import gzip
+import shutil
+import logging
+import threading
 import pandas as pd
 
 PROCESSED_DIR = os.path.join(os.path.dirname(__file__), '..', 'data', 'processed')
 os.makedirs(PROCESSED_DIR, exist_ok=True)
 
+_COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd'}
+OUTPUT_COMPRESSIONS = ('gzip', 'zstd')
+
+# partitioned parquet: one directory level per period (hive style, e.g. day=2025-09-19)
+PARTITION_GRANULARITIES = {'day': ('day', '%Y-%m-%d'), 'month': ('month', '%Y-%m')}
+PARQUET_ROW_GROUP_ROWS = int(os.environ.get('ETL_PARQUET_ROW_GROUP_ROWS', '65536'))
+NULL_PARTITION = '__HIVE_DEFAULT_PARTITION__'
+# schema of the whole dataset (files written early may hold narrower types); readers skip '_' files
+COMMON_METADATA = '_common_metadata'
+_PART_FILE = re.compile(r'^part-(\d+)\.parquet$')
+
+logger = logging.getLogger('etl')
+
+_output_locks = {}
+_output_locks_guard = threading.Lock()
+
+
+def output_lock(filename: str) -> threading.Lock:
+    """Process-wide lock for one output under data/processed.
+
+    Hold it while producing that output so concurrent runs do not interleave writes:
+        with load.output_lock('pool_swaps.processed.csv'):
+            ...
+    """
+    key = os.path.abspath(os.path.join(PROCESSED_DIR, filename))
+    with _output_locks_guard:
+        return _output_locks.setdefault(key, threading.Lock())
+
+
+def _widen_schema(current, incoming):
+    """Schema that holds both `current` and `incoming` (int -> float, null -> any type).
+
+    Chunks infer their types separately: a column can be int in one chunk and float in
+    the next, or all-null at first. Incompatible types (e.g. int vs text) raise ValueError.
+    """
+    import pyarrow as pa
+
+    if current is None:
+        return incoming
+    if incoming.equals(current):
+        return current
+    try:
+        return pa.unify_schemas([current, incoming], promote_options='permissive')
+    except (pa.ArrowInvalid, pa.ArrowTypeError) as e:
+        raise ValueError(f'Chunk types do not match the output written so far: {e}') from e
+
+
+def _conform_table(table, schema):
+    """`table` with the columns and types of `schema` (missing columns are null)."""
+    import pyarrow as pa
+
+    columns = [table.column(f.name).cast(f.type) if f.name in table.column_names else pa.nulls(len(table), f.type)
+               for f in schema]
+    return pa.Table.from_arrays(columns, schema=schema)
+
 
 def write_processed_df(df: pd.DataFrame, filename: str, mode: str = 'w'):
     """Write processed DataFrame to disk.
@@ -15,6 +76,7 @@ def write_processed_df(df: pd.DataFrame, filename: str, mode: str = 'w'):
 
     By default writes CSV encoded as UTF-8. If filename ends with '.parquet' and pyarrow
     is available, will write parquet instead.
+    For chunked outputs prefer ProcessedWriter, which keeps the file open across chunks.
     Returns the absolute path written.
     """
     path = os.path.join(PROCESSED_DIR, filename)
@@ -33,8 +95,8 @@ def write_processed_df(df: pd.DataFrame, filename: str, mode: str = 'w'):
         except Exception:
             engine = None
         if mode == 'a':
-            # append to parquet is non-trivial; raise for now
-            raise ValueError('Append mode not supported for parquet outputs')
+            # a parquet file cannot be reopened for append; row groups need a live writer
+            raise ValueError('Append mode not supported for parquet outputs; use ProcessedWriter for chunked parquet')
         tmp = path + '.tmp'
         if engine:
             df.to_parquet(tmp, engine=engine, index=False)
@@ -57,13 +119,287 @@ def write_processed_df(df: pd.DataFrame, filename: str, mode: str = 'w'):
         df.to_csv(tmp, index=False, encoding='utf-8')
         _atomic_replace(tmp, path)
     else:
-        # append mode
-        # write to a temporary file then append to final to avoid partial header issues
-        tmp = path + '.tmp'
-        df.to_csv(tmp, index=False, encoding='utf-8', header=False)
-        # open the tmp and append its bytes to the target file
-        with open(path, 'ab') as f_out, open(tmp, 'rb') as f_in:
-            f_out.write(f_in.read())
-        os.remove(tmp)
+        # append mode: rows go straight to the end of the target, header already there
+        df.to_csv(path, mode='a', index=False, encoding='utf-8', header=False)
 
     return path
+
+
+class ProcessedWriter:
+    """Streaming writer for chunked outputs under data/processed.
+
+    Keeps a single handle open for a whole run instead of reopening the output per chunk:
+    - CSV: buffered appends to `<filename>.part`; the header is written once.
+    - CSV + compression ('gzip' / 'zstd', or a filename ending in '.gz' / '.zst'): same,
+      through a gzip stream or a pyarrow zstd stream.
+    - Parquet: each write() becomes a row group of one pyarrow ParquetWriter.
+
+    commit() flushes, fsyncs once and renames the part file onto the final path; until
+    then readers keep seeing the previous output. If the run fails the part file is left
+    in place so a plain CSV run can be resumed with `resume_bytes` (the size reported
+    by flush() at the last checkpoint).
+
+    Usage:
+        with ProcessedWriter('pool_swaps.processed.csv') as writer:
+            for chunk in chunks:
+                writer.write(chunk)
+                committed_bytes = writer.flush()
+    """
+
+    def __init__(self, filename: str, compression: str = None, resume_bytes: int = None,
+                 buffer_size: int = 1 << 20):
+        self.filename = filename
+        self.path = os.path.join(PROCESSED_DIR, filename)
+        self.part_path = self.path + '.part'
+        lower = filename.lower()
+        self.compression = compression or _COMPRESSION_SUFFIXES.get(os.path.splitext(lower)[1])
+        self.kind = 'parquet' if lower.endswith('.parquet') else 'csv'
+        self.rows = 0
+        self._raw = None
+        self._fh = None
+        self._parquet = None
+        self._header = True
+
+        if resume_bytes is not None and (self.compression or self.kind == 'parquet'):
+            raise ValueError('Resume is only supported for uncompressed CSV outputs')
+        if self.kind == 'parquet':
+            # parquet compresses per column chunk; compression is passed to ParquetWriter
+            return
+        if self.compression not in (None,) + OUTPUT_COMPRESSIONS:
+            raise ValueError(f'Unsupported compression: {self.compression}')
+        if resume_bytes is not None:
+            self._raw = open(self.part_path, 'r+b', buffering=buffer_size)
+            self._raw.truncate(resume_bytes)
+            self._raw.seek(resume_bytes)
+            self._header = resume_bytes == 0
+        else:
+            self._raw = open(self.part_path, 'wb', buffering=buffer_size)
+        if self.compression == 'gzip':
+            stream = gzip.GzipFile(fileobj=self._raw, mode='wb')
+        elif self.compression == 'zstd':
+            import pyarrow as pa
+            stream = pa.CompressedOutputStream(pa.PythonFile(self._raw, mode='w'), 'zstd')
+        else:
+            stream = self._raw
+        self._fh = io.TextIOWrapper(stream, encoding='utf-8', newline='', write_through=False)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.kind == 'parquet':
+            self._write_parquet(df)
+        else:
+            df.to_csv(self._fh, index=False, header=self._header)
+            self._header = False
+        self.rows += len(df)
+
+    def _write_parquet(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        if self._parquet is None:
+            self._parquet = pq.ParquetWriter(self.part_path, table.schema,
+                                             compression=self.compression or 'snappy')
+        else:
+            schema = _widen_schema(self._parquet.schema, table.schema)
+            if not schema.equals(self._parquet.schema):
+                self._rewrite_parquet(schema)
+            table = _conform_table(table, schema)
+        self._parquet.write_table(table)
+
+    def _rewrite_parquet(self, schema) -> None:
+        # a parquet file has one schema: copy the row groups written so far with the wider
+        # types. It happens at most once per widened column, usually on an early chunk.
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        logger.info('Widening %s to %s', self.filename, schema.to_string(show_schema_metadata=False))
+        self._parquet.close()
+        old = self.part_path + '.old'
+        os.replace(self.part_path, old)
+        self._parquet = pq.ParquetWriter(self.part_path, schema, compression=self.compression or 'snappy')
+        source = pq.ParquetFile(old)
+        for i in range(source.num_row_groups):
+            self._parquet.write_table(_conform_table(source.read_row_group(i), schema))
+        source.close()
+        os.remove(old)
+
+    def flush(self) -> int:
+        """Push buffered rows to the OS and return the bytes written to the part file."""
+        if self._fh is not None:
+            self._fh.flush()
+            if self.compression:
+                self._fh.buffer.flush()
+            self._raw.flush()
+            return self._raw.tell()
+        return os.path.getsize(self.part_path) if os.path.exists(self.part_path) else 0
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+            stream = self._fh.detach()
+            if self.compression == 'zstd':
+                # closing the pyarrow stream writes the last frame and closes the file too
+                stream.close()
+                fd = os.open(self.part_path, os.O_RDONLY)
+                try:
+                    os.fsync(fd)
+                finally:
+                    os.close(fd)
+            else:
+                if stream is not self._raw:
+                    # writes the gzip trailer; the underlying file stays open
+                    stream.close()
+                self._raw.flush()
+                os.fsync(self._raw.fileno())
+                self._raw.close()
+            self._fh = None
+        if self._parquet is not None:
+            self._parquet.close()
+            self._parquet = None
+
+    def commit(self) -> str:
+        """Close the output and atomically move it to its final path. Returns that path."""
+        self.close()
+        if self.kind == 'parquet' and not os.path.exists(self.part_path):
+            # no chunk was written: produce an empty parquet file
+            pd.DataFrame().to_parquet(self.part_path, index=False)
+        os.replace(self.part_path, self.path)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            # leave the part file for a later resume
+            try:
+                self.close()
+            except Exception:
+                pass
+        return False
+
+
+class PartitionedParquetWriter:
+    """Chunked writer for a date-partitioned Parquet dataset under data/processed.
+
+    Every write() splits the chunk by the period of `partition_by` (a datetime column) and
+    writes one file per period: `<dirname>/day=YYYY-MM-DD/part-00001.parquet` (or
+    `month=YYYY-MM` with granularity='month'). Files carry row-group statistics
+    (min/max per column), so readers can prune both partitions and row groups; see
+    etl.read.read_partitioned.
+
+    Files go to `<dirname>.part/` and commit() swaps that directory onto `<dirname>`.
+    Chunk files are named by chunk index, so resuming with `resume_chunks=N` just removes
+    files of chunks after N and keeps writing.
+
+    Types are widened as chunks arrive (int -> float, all-null -> the type seen later);
+    files already written keep their types and `_common_metadata` holds the widened
+    schema that etl.read.dataset reads them with.
+    """
+
+    def __init__(self, dirname: str, partition_by: str = 'date', granularity: str = 'day',
+                 compression: str = None, resume_chunks: int = None,
+                 row_group_size: int = None):
+        if granularity not in PARTITION_GRANULARITIES:
+            raise ValueError(f'Unsupported partition granularity: {granularity}')
+        self.filename = dirname
+        self.path = os.path.join(PROCESSED_DIR, dirname)
+        self.part_path = self.path + '.part'
+        self.partition_by = partition_by
+        self.partition_key, self._fmt = PARTITION_GRANULARITIES[granularity]
+        self.compression = compression or 'snappy'
+        self.row_group_size = row_group_size or PARQUET_ROW_GROUP_ROWS
+        self.rows = 0
+        self.chunks = 0
+        self.bytes_written = 0
+        self._schema = None
+        if resume_chunks is not None and os.path.isdir(self.part_path):
+            self.chunks = resume_chunks
+            self._drop_chunks_after(resume_chunks)
+            self._schema = self._read_schema()
+        else:
+            shutil.rmtree(self.part_path, ignore_errors=True)
+        os.makedirs(self.part_path, exist_ok=True)
+
+    def _read_schema(self):
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.part_path, COMMON_METADATA)
+        return pq.read_schema(path) if os.path.exists(path) else None
+
+    def _write_schema(self, schema) -> None:
+        import pyarrow.parquet as pq
+
+        path = os.path.join(self.part_path, COMMON_METADATA)
+        if os.path.exists(path):
+            self.bytes_written -= os.path.getsize(path)
+        pq.write_metadata(schema, path + '.tmp')
+        os.replace(path + '.tmp', path)
+        self.bytes_written += os.path.getsize(path)
+
+    def _drop_chunks_after(self, chunks: int) -> None:
+        for root, _, files in os.walk(self.part_path):
+            for name in files:
+                m = _PART_FILE.match(name)
+                path = os.path.join(root, name)
+                # the schema file is kept: types widened by dropped chunks stay wide
+                if name == COMMON_METADATA or (m is not None and int(m.group(1)) <= chunks):
+                    self.bytes_written += os.path.getsize(path)
+                else:
+                    os.remove(path)
+
+    def _partition_values(self, df: pd.DataFrame):
+        values = pd.to_datetime(df[self.partition_by], errors='coerce')
+        return values.dt.strftime(self._fmt).fillna(NULL_PARTITION)
+
+    def write(self, df: pd.DataFrame) -> None:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        self.chunks += 1
+        if len(df) == 0:
+            return
+        keys = self._partition_values(df)
+        for value, idx in df.groupby(keys.to_numpy(), sort=True).indices.items():
+            table = pa.Table.from_pandas(df.iloc[idx], preserve_index=False)
+            schema = _widen_schema(self._schema, table.schema)
+            if self._schema is None or not schema.equals(self._schema):
+                self._schema = schema
+                self._write_schema(schema)
+            table = _conform_table(table, schema)
+            directory = os.path.join(self.part_path, f'{self.partition_key}={value}')
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, f'part-{self.chunks:05d}.parquet')
+            tmp = path + '.tmp'
+            pq.write_table(table, tmp, compression=self.compression, row_group_size=self.row_group_size,
+                           write_statistics=True)
+            os.replace(tmp, path)
+            self.bytes_written += os.path.getsize(path)
+        self.rows += len(df)
+
+    def flush(self) -> int:
+        """Files are closed after every write; returns the bytes written so far."""
+        return self.bytes_written
+
+    def close(self) -> None:
+        pass
+
+    def commit(self) -> str:
+        """Move the finished dataset onto its final path. Returns that path."""
+        old = self.path + '.old'
+        shutil.rmtree(old, ignore_errors=True)
+        if os.path.exists(self.path):
+            os.replace(self.path, old)
+        os.replace(self.part_path, self.path)
+        shutil.rmtree(old, ignore_errors=True)
+        return self.path
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        return False
@@ -0,0 +1,286 @@
+"""Instrumentacion de pasos ETL: tiempo de pared/CPU, filas/s, bytes y RSS pico.
+
+Con `step(..., sample_memory=True)` un hilo muestrea el RSS actual mientras dura el paso
+y se guarda el pico propio del paso (`peak_rss_step_bytes`, pico - RSS al entrar), que a
+diferencia del high-water mark del proceso tambien se ve cuando un paso anterior ya
+habia llegado mas alto.
+
+Cada paso (`extract.read_csv_full`, `transform.transform_tata`, `load.write_processed_df`, ...)
+se mide con `StageMetrics.step(...)`; los totales del stage se guardan en el registro del run
+y ademas se acumulan en un registro global que se expone en formato Prometheus (/metrics).
+
+Uso:
+  stage_metrics = StageMetrics('bank_prices')
+  with stage_metrics.step('extract.read_csv_full') as step:
+      df = extract.read_csv_full(...)
+      step.rows = len(df)
+  info['metrics'] = stage_metrics.summary()
+"""
+import os
+import sys
+import time
+import threading
+from typing import Any, Callable, Dict, Optional, Tuple
+
+
+def peak_rss_bytes() -> Optional[int]:
+    """High-water mark del RSS del proceso, o None si la plataforma no lo expone."""
+    try:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux reporta KiB, macOS bytes
+        return int(peak) if sys.platform == 'darwin' else int(peak) * 1024
+    except Exception:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return int(getattr(info, 'peak_wset', info.rss))
+    except Exception:
+        return None
+
+
+def current_rss_bytes() -> Optional[int]:
+    """RSS actual del proceso, o None si la plataforma no lo expone."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except Exception:
+        pass
+    try:
+        import psutil
+        return int(psutil.Process().memory_info().rss)
+    except Exception:
+        return None
+
+
+# cada muestra despierta un hilo que compite por el GIL con el paso medido; a 50 ms el costo
+# es despreciable y un pico que dura menos solo se ve si sigue ahi al cerrar el paso
+MEMORY_SAMPLE_INTERVAL = float(os.environ.get('ETL_MEMORY_SAMPLE_INTERVAL', '0.05'))
+
+
+class RSSSampler:
+    """Pico de RSS mientras dura el bloque `with`, muestreado cada `interval` segundos."""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else MEMORY_SAMPLE_INTERVAL
+        self.start_bytes: Optional[int] = None
+        self.peak_bytes: Optional[int] = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _observe(self):
+        rss = current_rss_bytes()
+        if rss is not None and (self.peak_bytes is None or rss > self.peak_bytes):
+            self.peak_bytes = rss
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._observe()
+
+    def __enter__(self):
+        self.start_bytes = current_rss_bytes()
+        self.peak_bytes = self.start_bytes
+        if self.start_bytes is not None:
+            self._thread = threading.Thread(target=self._run, name='etl-rss-sampler', daemon=True)
+            self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        self._observe()
+        return False
+
+    @property
+    def step_bytes(self) -> Optional[int]:
+        if self.start_bytes is None or self.peak_bytes is None:
+            return None
+        return self.peak_bytes - self.start_bytes
+
+
+# ---------------------------------------------------------------------------
+# Registro global (formato Prometheus)
+# ---------------------------------------------------------------------------
+
+class MetricsRegistry:
+    """Contadores con etiquetas y gauges calculados al exportar; sin dependencias externas."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._help: Dict[str, Tuple[str, str]] = {}
+        self._gauges: Dict[str, Callable[[], Any]] = {}
+
+    def inc(self, name: str, value: float, help_text: str = '', **labels) -> None:
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._help.setdefault(name, ('counter', help_text))
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def gauge(self, name: str, fn: Callable[[], Any], help_text: str = '') -> None:
+        """fn() devuelve un numero o un dict {labels_tuple|None: valor}."""
+        with self._lock:
+            self._help[name] = ('gauge', help_text)
+            self._gauges[name] = fn
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Contadores actuales, serializables (para pasarlos desde un proceso hijo)."""
+        with self._lock:
+            return {name: {'help': self._help[name][1], 'series': list(series.items())}
+                    for name, series in self._counters.items()}
+
+    def merge(self, snapshot: Dict[str, Any]) -> None:
+        for name, data in snapshot.items():
+            for labels, value in data['series']:
+                self.inc(name, value, data['help'], **dict(labels))
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+
+    def render(self) -> str:
+        lines = []
+        with self._lock:
+            counters = {n: dict(s) for n, s in self._counters.items()}
+            gauges = dict(self._gauges)
+            helps = dict(self._help)
+        for name in sorted(counters):
+            kind, help_text = helps[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            for labels, value in sorted(counters[name].items()):
+                lines.append(f'{name}{_labels(labels)} {_number(value)}')
+        for name in sorted(gauges):
+            try:
+                value = gauges[name]()
+            except Exception:
+                continue
+            if value is None:
+                continue
+            kind, help_text = helps[name]
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+            series = value if isinstance(value, dict) else {(): value}
+            for labels, v in sorted(series.items()):
+                lines.append(f'{name}{_labels(labels or ())} {_number(v)}')
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels) -> str:
+    if not labels:
+        return ''
+    inner = ','.join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels)
+    return '{' + inner + '}'
+
+
+def _number(value) -> str:
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.gauge('process_peak_rss_bytes', peak_rss_bytes, 'Peak resident set size of the process')
+
+
+def render_prometheus() -> str:
+    return REGISTRY.render()
+
+
+# ---------------------------------------------------------------------------
+# Medicion por paso
+# ---------------------------------------------------------------------------
+
+class StepTimer:
+    """Mide un paso; el llamador puede fijar rows, bytes_read y bytes_written."""
+
+    def __init__(self, stage_metrics: 'StageMetrics', name: str, sample_memory: bool = False):
+        self._stage = stage_metrics
+        self.name = name
+        self.rows = 0
+        self.bytes_read = 0
+        self.bytes_written = 0
+        self._sampler = RSSSampler() if sample_memory else None
+
+    def __enter__(self):
+        self._wall = time.perf_counter()
+        # CPU de todo el proceso: incluye los hilos de pyarrow (y otros runs concurrentes)
+        self._cpu = time.process_time()
+        self._rss = peak_rss_bytes()
+        if self._sampler is not None:
+            self._sampler.__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if self._sampler is not None:
+            self._sampler.__exit__(exc_type, exc, tb)
+        wall = time.perf_counter() - self._wall
+        cpu = time.process_time() - self._cpu
+        rss = peak_rss_bytes()
+        rss_delta = (rss - self._rss) if (rss is not None and self._rss is not None) else None
+        self._stage._record(self.name, wall, cpu, self.rows, self.bytes_read, self.bytes_written, rss_delta,
+                            failed=exc_type is not None, sampler=self._sampler)
+        return False
+
+
+class StageMetrics:
+    """Acumula metricas por paso dentro de un stage (p.ej. todos los chunks de pool_swaps)."""
+
+    def __init__(self, stage: str, registry: MetricsRegistry = REGISTRY):
+        self.stage = stage
+        self.registry = registry
+        self.steps: Dict[str, Dict[str, Any]] = {}
+
+    def step(self, name: str, sample_memory: bool = False) -> StepTimer:
+        return StepTimer(self, name, sample_memory=sample_memory)
+
+    def add(self, name: str, rows: int = 0, bytes_read: int = 0, bytes_written: int = 0) -> None:
+        """Suma cantidades conocidas al final (p.ej. bytes del archivo leido por chunks)."""
+        s = self.steps.get(name)
+        if s is None:
+            return
+        s['rows'] += rows
+        s['bytes_read'] += bytes_read
+        s['bytes_written'] += bytes_written
+        labels = {'stage': self.stage, 'step': name}
+        self.registry.inc('etl_step_rows_total', rows, 'Rows handled by ETL steps', **labels)
+        self.registry.inc('etl_step_bytes_read_total', bytes_read, 'Bytes read by ETL steps', **labels)
+        self.registry.inc('etl_step_bytes_written_total', bytes_written, 'Bytes written by ETL steps', **labels)
+
+    def _record(self, name, wall, cpu, rows, bytes_read, bytes_written, rss_delta, failed=False, sampler=None):
+        s = self.steps.setdefault(name, {'calls': 0, 'wall_s': 0.0, 'cpu_s': 0.0, 'rows': 0,
+                                         'bytes_read': 0, 'bytes_written': 0, 'peak_rss_delta_bytes': 0})
+        s['calls'] += 1
+        s['wall_s'] += wall
+        s['cpu_s'] += cpu
+        s['rows'] += rows
+        s['bytes_read'] += bytes_read
+        s['bytes_written'] += bytes_written
+        if rss_delta is not None:
+            s['peak_rss_delta_bytes'] += rss_delta
+        if sampler is not None and sampler.peak_bytes is not None:
+            s['peak_rss_bytes'] = max(s.get('peak_rss_bytes', 0), sampler.peak_bytes)
+            s['peak_rss_step_bytes'] = max(s.get('peak_rss_step_bytes', 0), sampler.step_bytes)
+        labels = {'stage': self.stage, 'step': name}
+        reg = self.registry
+        reg.inc('etl_step_calls_total', 1, 'ETL step executions', **labels)
+        reg.inc('etl_step_wall_seconds_total', wall, 'Wall time spent in ETL steps', **labels)
+        reg.inc('etl_step_cpu_seconds_total', cpu, 'Process CPU time spent in ETL steps', **labels)
+        reg.inc('etl_step_rows_total', rows, 'Rows handled by ETL steps', **labels)
+        reg.inc('etl_step_bytes_read_total', bytes_read, 'Bytes read by ETL steps', **labels)
+        reg.inc('etl_step_bytes_written_total', bytes_written, 'Bytes written by ETL steps', **labels)
+        if failed:
+            reg.inc('etl_step_failures_total', 1, 'ETL steps that raised', **labels)
+
+    def summary(self) -> Dict[str, Dict[str, Any]]:
+        """Totales por paso con rows/s; listo para guardar en el registro del run."""
+        out = {}
+        for name, s in self.steps.items():
+            item = dict(s)
+            item['wall_s'] = round(s['wall_s'], 4)
+            item['cpu_s'] = round(s['cpu_s'], 4)
+            item['rows_per_s'] = round(s['rows'] / s['wall_s'], 1) if s['wall_s'] > 0 and s['rows'] else None
+            out[name] = item
+        return out
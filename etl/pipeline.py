@@ -0,0 +1,695 @@
+"""Pipelines ETL declarativos: fuente -> lector -> cadena de transforms -> salida.
+
+Cada dataset se describe con un `PipelineSpec`; `plan()` decide para cada archivo que
+spec usar y como leerlo (completo o por chunks segun su tamano) y `execute()` corre los
+pasos, los independientes en paralelo (procesos) y los mas grandes primero.
+
+Los specs por defecto reproducen los pipelines historicos (bank prices, tata, pool_swaps).
+Un archivo sin spec propio (p.ej. un CSV subido por /upload con otro nombre) usa el
+transform `generic`. Se pueden agregar o sobrescribir specs con un JSON (lista de objetos
+con los campos de PipelineSpec) en la ruta de `ETL_PIPELINES_FILE`:
+
+  [{"name": "fx", "source": "fx_rates.csv", "transforms": ["generic"], "output": "fx.processed.csv"}]
+"""
+import os
+import re
+import json
+import importlib.util
+import queue
+import logging
+import fnmatch
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from typing import Any, Callable, Dict, List, Optional
+
+import pandas as pd
+
+from etl import extract, transform, load, metrics, profiling, rollups, watermarks
+from etl.metrics import StageMetrics
+
+logger = logging.getLogger('etl')
+
+# archivos mas grandes que esto se leen por chunks (modo 'auto')
+CHUNKED_THRESHOLD_BYTES = int(float(os.environ.get('ETL_CHUNKED_THRESHOLD_MB', '256')) * 1024 * 1024)
+MAX_PARALLEL_PIPELINES = int(os.environ.get('ETL_MAX_PARALLEL_PIPELINES', '3'))
+# 'auto' (por defecto), 'process' o 'thread'; spawn evita heredar locks de los hilos del servidor
+EXECUTOR = os.environ.get('ETL_PIPELINE_EXECUTOR', 'auto')
+# con 'auto' los pipelines van a procesos solo si sus entradas suman al menos esto: arrancar
+# el Manager y los workers cuesta ~1.5 s, mas de lo que tarda una subida chica entera
+PROCESS_EXECUTOR_MIN_BYTES = int(float(os.environ.get('ETL_PROCESS_EXECUTOR_MIN_MB', '64')) * 1024 * 1024)
+MP_START_METHOD = os.environ.get('ETL_MP_START_METHOD', 'spawn')
+PIPELINES_FILE = os.environ.get('ETL_PIPELINES_FILE')
+# compresion por defecto ('gzip' | 'zstd') de las salidas CSV de specs que no fijan una
+OUTPUT_COMPRESSION = os.environ.get('ETL_OUTPUT_COMPRESSION') or None
+DEFAULT_CHUNKSIZE = 200000
+
+READER_MODES = ('auto', 'full', 'chunked')
+_OUTPUT_SUFFIXES = {'gzip': '.gz', 'zstd': '.zst'}
+# find_spec no importa pyarrow (mantiene barato el import de la app)
+_HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+TRANSFORMS: Dict[str, Callable[[pd.DataFrame], pd.DataFrame]] = {
+    'bank_prices': transform.transform_bank_prices,
+    'tata': transform.transform_tata,
+    'pool_swaps': transform.transform_pool_swaps_chunk,
+    'generic': transform.transform_generic,
+}
+
+
+class RunInterrupted(Exception):
+    """Raised when a stop was requested; the last checkpoint is already reported."""
+
+
+class PipelineFailed(Exception):
+    """One or more pipelines of a run failed; the others ran to completion."""
+
+    def __init__(self, failures: Dict[str, Dict[str, Any]]):
+        self.failures = failures
+        super().__init__('ETL stages failed: ' + '; '.join(f"{stage}: {r['error']}" for stage, r in failures.items()))
+
+
+@dataclass(frozen=True)
+class PipelineSpec:
+    name: str                         # nombre del stage en el run (progreso, checkpoints)
+    source: str                       # archivo bajo data/ (o ruta absoluta)
+    transforms: List[str] = field(default_factory=lambda: ['generic'])
+    output: Optional[str] = None      # archivo bajo data/processed; por defecto <stem>.processed.csv
+    reader: str = 'auto'              # auto | full | chunked
+    chunksize: int = DEFAULT_CHUNKSIZE
+    compression: Optional[str] = None
+    match: List[str] = field(default_factory=list)  # patrones fnmatch extra para archivos subidos
+    # columna datetime: la salida es un directorio Parquet particionado (day=/month=), ver etl.read
+    partition_by: Optional[str] = None
+    partition_granularity: str = 'day'
+    # rollups materializados que se actualizan con cada chunk transformado (ver etl.rollups)
+    rollups: List[str] = field(default_factory=list)
+    # columna de fecha de una fuente que solo crece: las corridas leen solo lo nuevo (ver etl.watermarks)
+    incremental: Optional[str] = None
+
+    @property
+    def output_name(self) -> str:
+        if self.partitioned:
+            return self.output or f'{_stem(self.source)}.processed.parquet'
+        name = self.output or f'{_stem(self.source)}.processed.csv'
+        suffix = _OUTPUT_SUFFIXES.get(self.compression)
+        if suffix and not name.endswith(suffix):
+            name += suffix
+        return name
+
+    @property
+    def partitioned(self) -> bool:
+        return self.partition_by is not None
+
+    @property
+    def path(self) -> str:
+        return self.source if os.path.isabs(self.source) else extract.path_for(self.source)
+
+    def matches(self, filename: str) -> bool:
+        base = os.path.basename(filename)
+        # pool_swaps.csv.gz / .zst tambien es la fuente pool_swaps.csv
+        return (extract.strip_compression(base) == os.path.basename(self.source)
+                or any(fnmatch.fnmatch(base, p) for p in self.match))
+
+
+DEFAULT_SPECS: List[PipelineSpec] = [
+    PipelineSpec('bank_prices', 'Bank_Price_Data_China new.csv', ['bank_prices'],
+                 output='Bank_Price_Data_China_new.processed.csv', incremental='Date'),
+    PipelineSpec('tata_motors', 'final_dataset_tata_motors.csv', ['tata'],
+                 output='final_dataset_tata_motors.processed.csv', incremental='timestamp'),
+    # siempre por chunks: el checkpoint/reanudacion depende de ello. Sin pyarrow la salida
+    # vuelve a ser el CSV plano historico.
+    PipelineSpec('pool_swaps', 'pool_swaps.csv', ['pool_swaps'], reader='chunked', rollups=['pool_swaps_daily'],
+                 **({'output': 'pool_swaps.processed.parquet', 'partition_by': 'date'} if _HAS_PYARROW
+                    else {'output': 'pool_swaps.processed.csv'})),
+]
+
+
+def _stem(filename: str) -> str:
+    return os.path.splitext(extract.strip_compression(os.path.basename(filename)))[0]
+
+
+def _stage_name(filename: str) -> str:
+    return re.sub(r'[^0-9A-Za-z_]+', '_', _stem(filename)).strip('_').lower() or 'dataset'
+
+
+def load_specs(path: Optional[str] = None) -> List[PipelineSpec]:
+    """Specs por defecto mas los del archivo de configuracion (mismo name => lo reemplaza)."""
+    specs = {s.name: s for s in DEFAULT_SPECS}
+    path = path or PIPELINES_FILE
+    if path:
+        with open(path, 'r', encoding='utf-8') as f:
+            for item in json.load(f):
+                spec = PipelineSpec(**item)
+                validate(spec)
+                specs[spec.name] = spec
+    return list(specs.values())
+
+
+def validate(spec: PipelineSpec) -> None:
+    if spec.reader not in READER_MODES:
+        raise ValueError(f'Unknown reader mode {spec.reader!r} for pipeline {spec.name}')
+    unknown = [t for t in spec.transforms if t not in TRANSFORMS]
+    if unknown:
+        raise ValueError(f'Unknown transforms {unknown} for pipeline {spec.name}')
+    if spec.compression not in (None,) + load.OUTPUT_COMPRESSIONS:
+        raise ValueError(f'Unsupported compression {spec.compression!r} for pipeline {spec.name}')
+    if spec.partitioned and spec.partition_granularity not in load.PARTITION_GRANULARITIES:
+        raise ValueError(f'Unknown partition granularity {spec.partition_granularity!r} for pipeline {spec.name}')
+    unknown = [r for r in spec.rollups if r not in rollups.ROLLUPS]
+    if unknown:
+        raise ValueError(f'Unknown rollups {unknown} for pipeline {spec.name}')
+    if spec.incremental and (spec.partitioned or spec.compression):
+        raise ValueError(f'Incremental pipeline {spec.name} needs a plain CSV output')
+
+
+def get_spec(name: str, specs: Optional[List[PipelineSpec]] = None) -> PipelineSpec:
+    for spec in specs or load_specs():
+        if spec.name == name:
+            return spec
+    raise KeyError(name)
+
+
+def spec_for_file(filename: str, specs: Optional[List[PipelineSpec]] = None) -> PipelineSpec:
+    """Spec que corresponde a un archivo; uno generico si ningun spec lo reconoce."""
+    for spec in specs or load_specs():
+        if spec.matches(filename):
+            if os.path.isabs(filename) or extract.compression_of(filename):
+                return replace(spec, source=filename)
+            return spec
+    return PipelineSpec(_stage_name(filename), filename, ['generic'])
+
+
+# ---------------------------------------------------------------------------
+# Plan
+# ---------------------------------------------------------------------------
+
+def reader_mode(spec: PipelineSpec) -> str:
+    if spec.reader != 'auto':
+        return spec.reader
+    if extract.compression_of(spec.path):
+        # el tamano comprimido no dice cuanto ocupa en memoria: siempre en streaming
+        return 'chunked'
+    size = os.path.getsize(spec.path) if os.path.exists(spec.path) else 0
+    return 'chunked' if size > CHUNKED_THRESHOLD_BYTES else 'full'
+
+
+def plan(files: Optional[List[str]] = None, specs: Optional[List[PipelineSpec]] = None) -> List[Dict[str, Any]]:
+    """Pasos a ejecutar: [{'spec', 'mode', 'bytes'}], los mas grandes primero.
+
+    files=None ejecuta todos los specs configurados; si no, un paso por archivo.
+    Dos archivos que terminarian en la misma salida no se pueden planear juntos.
+    """
+    specs = specs or load_specs()
+    chosen = list(specs) if files is None else [spec_for_file(f, specs) for f in files]
+    steps, outputs = [], {}
+    for spec in chosen:
+        if OUTPUT_COMPRESSION and spec.compression is None and not (spec.partitioned or spec.incremental):
+            spec = replace(spec, compression=OUTPUT_COMPRESSION)
+        validate(spec)
+        if spec.output_name in outputs:
+            raise ValueError(f'Pipelines {outputs[spec.output_name]} and {spec.name} write the same output '
+                             f'{spec.output_name}')
+        outputs[spec.output_name] = spec.name
+        size = os.path.getsize(spec.path) if os.path.exists(spec.path) else 0
+        steps.append({'spec': spec, 'mode': reader_mode(spec), 'bytes': size})
+    # el paso mas largo primero acorta el total cuando se corren en paralelo
+    steps.sort(key=lambda s: s['bytes'], reverse=True)
+    return steps
+
+
+# ---------------------------------------------------------------------------
+# Ejecucion de un pipeline
+# ---------------------------------------------------------------------------
+
+def _file_size(path):
+    return os.path.getsize(path) if os.path.exists(path) else 0
+
+
+def _apply(spec: PipelineSpec, df: pd.DataFrame) -> pd.DataFrame:
+    for name in spec.transforms:
+        df = TRANSFORMS[name](df)
+    return df
+
+
+def _transform_step_name(spec: PipelineSpec) -> str:
+    return '+'.join(f'transform.{TRANSFORMS[t].__name__}' for t in spec.transforms)
+
+
+def run_full(spec: PipelineSpec, progress_callback=None, run_id=None):
+    """Full-file ETL (read, transform, write) with per-step metrics."""
+    stage = spec.name
+    logger.info('ETL -> %s', os.path.basename(spec.source))
+    if progress_callback:
+        progress_callback(run_id, stage, {'status': 'started', 'mode': 'full'})
+    stage_metrics = StageMetrics(stage)
+    # lo que se agregue a la fuente durante la lectura lo toma la siguiente corrida incremental
+    source_bytes = _file_size(spec.path)
+    with stage_metrics.step('extract.read_csv_full') as step:
+        df = extract.read_csv_path(spec.path)
+        step.rows = len(df)
+        step.bytes_read = _file_size(spec.path)
+    with stage_metrics.step(_transform_step_name(spec)) as step:
+        df_t = _apply(spec, df)
+        step.rows = len(df_t)
+    rollup_writers = [rollups.RollupWriter(name) for name in spec.rollups]
+    for rw in rollup_writers:
+        with stage_metrics.step(f'rollup.{rw.name}') as step:
+            step.rows = rw.update(df_t)
+    # rollups first: they replace only this run's periods, so redoing them after a failed
+    # output write is harmless, while an output without its rollups would go unnoticed
+    rollup_stats = {rw.name: rw.commit() for rw in rollup_writers}
+    # the output is rewritten: a watermark of the old one must not survive (a new one is saved below)
+    watermarks.reset(spec.output_name)
+    with stage_metrics.step('load.write_processed_df') as step:
+        if spec.partitioned or spec.compression:
+            with _open_writer(spec) as writer:
+                writer.write(df_t)
+            out = writer.path
+            # after commit the part file is gone (and a compressed one is complete only now)
+            step.bytes_written = writer.flush() if spec.partitioned else _file_size(out)
+        else:
+            out = load.write_processed_df(df_t, spec.output_name)
+            step.bytes_written = _file_size(out)
+        step.rows = len(df_t)
+    logger.info('Wrote %s', out)
+    if spec.incremental and not extract.compression_of(spec.path):
+        watermarks.save_watermark(spec.output_name, watermarks.build(
+            spec.path, out, spec.incremental, df_t, extract.last_line_end(spec.path, source_bytes)))
+    if progress_callback:
+        progress_callback(run_id, stage, {'status': 'finished', 'output': out, 'rows': len(df_t),
+                                          'metrics': stage_metrics.summary(),
+                                          **({'rollups': rollup_stats} if rollup_stats else {}),
+                                          'checkpoint': {'done': True, 'output': out}})
+    return out
+
+
+def _conform(df: pd.DataFrame, columns: List[str], dtypes: Dict[str, str]) -> pd.DataFrame:
+    """Columnas y dtypes de la salida existente, para que las filas anexadas se escriban igual.
+
+    Una columna que no se puede convertir (p.ej. texto en una columna int64) se anexa con
+    su tipo y se avisa en el log: el CSV la admite, pero deja de ser homogenea.
+    """
+    df = df.reindex(columns=columns)
+    for col, dtype in dtypes.items():
+        if str(df[col].dtype) != dtype and dtype in ('int64', 'float64', 'bool'):
+            try:
+                df[col] = df[col].astype(dtype)
+            except (TypeError, ValueError) as e:
+                logger.warning('Appended column %s is %s, not %s like the output (%s)',
+                               col, df[col].dtype, dtype, e)
+    return df
+
+
+def run_incremental(spec: PipelineSpec, progress_callback=None, run_id=None, full_refresh: bool = False):
+    """Append-only ETL driven by the watermark of spec.incremental (see etl.watermarks).
+
+    Reads the source from the byte offset of the last run, transforms only those rows,
+    keeps the ones newer than the last processed date and appends them to the output.
+    Falls back to run_full (which writes a fresh watermark) when there is no usable
+    watermark or full_refresh is set. The output is first truncated to the size recorded
+    in the watermark, so a run that died between the append and the watermark update does
+    not leave duplicated rows.
+    """
+    stage = spec.name
+    output = os.path.join(load.PROCESSED_DIR, spec.output_name)
+    watermark = watermarks.load_watermark(spec.output_name)
+    if full_refresh:
+        reason = 'full refresh requested'
+    elif extract.compression_of(spec.path):
+        reason = 'compressed source cannot be read from an offset'
+    else:
+        reason = watermarks.invalid_reason(watermark, spec.path, output, spec.incremental)
+    if reason:
+        logger.info('ETL -> %s: full run (%s)', os.path.basename(spec.source), reason)
+        return run_full(spec, progress_callback=progress_callback, run_id=run_id)
+
+    logger.info('ETL -> %s (incremental from byte %d, %s > %s)', os.path.basename(spec.source),
+                watermark['offset'], spec.incremental, watermark['last_value'])
+    if progress_callback:
+        progress_callback(run_id, stage, {'status': 'started', 'mode': 'incremental',
+                                          'watermark': watermark['last_value']})
+    stage_metrics = StageMetrics(stage)
+    with stage_metrics.step('extract.read_csv_tail') as step:
+        df, offset = extract.read_csv_tail(spec.path, watermark['offset'])
+        step.rows = len(df)
+        step.bytes_read = extract.read_stats[os.path.abspath(spec.path)]['bytes']
+    with stage_metrics.step(_transform_step_name(spec)) as step:
+        df_t = _apply(spec, df) if len(df) else df
+        if len(df_t):
+            # filas ya procesadas (fuente reescrita con el mismo contenido, fila re-leida) o sin fecha
+            df_t = df_t[df_t[spec.incremental] > pd.Timestamp(watermark['last_value'])]
+        df_t = _conform(df_t, watermark['columns'], watermark['dtypes'])
+        step.rows = len(df_t)
+    with stage_metrics.step('load.append_processed_df') as step:
+        with open(output, 'r+b') as f:
+            f.truncate(watermark['output_bytes'])
+        if len(df_t):
+            load.write_processed_df(df_t, spec.output_name, mode='a')
+        step.rows = len(df_t)
+        step.bytes_written = _file_size(output) - watermark['output_bytes']
+    watermarks.save_watermark(spec.output_name, watermarks.build(
+        spec.path, output, spec.incremental, df_t, offset, previous=watermark))
+    logger.info('Appended %d rows to %s', len(df_t), output)
+    if progress_callback:
+        progress_callback(run_id, stage, {'status': 'finished', 'output': output, 'rows': len(df_t),
+                                          'mode': 'incremental', 'metrics': stage_metrics.summary(),
+                                          'checkpoint': {'done': True, 'output': output}})
+    return output
+
+
+def _open_writer(spec: PipelineSpec, checkpoint=None):
+    if spec.partitioned:
+        return load.PartitionedParquetWriter(spec.output_name, partition_by=spec.partition_by,
+                                             granularity=spec.partition_granularity,
+                                             compression=spec.compression,
+                                             resume_chunks=checkpoint['chunks'] if checkpoint else None)
+    return load.ProcessedWriter(spec.output_name, compression=spec.compression,
+                                resume_bytes=checkpoint['output_bytes'] if checkpoint else None)
+
+
+def _usable_checkpoint(checkpoint, part_path):
+    """Devuelve el checkpoint si la salida parcial sigue en disco y es al menos tan larga."""
+    if not checkpoint or not checkpoint.get('rows'):
+        return None
+    missing = [r for r in checkpoint.get('rollups', []) if not os.path.isdir(rollups.get_rollup(r).part_path)]
+    if missing:
+        logger.warning('Partial rollups %s are gone; restarting from scratch', missing)
+        return None
+    if checkpoint.get('partitioned'):
+        # los archivos de chunks posteriores al checkpoint se borran al reanudar
+        if not os.path.isdir(part_path):
+            logger.warning('Partial output %s is gone; restarting from scratch', part_path)
+            return None
+        return checkpoint
+    if checkpoint.get('compression'):
+        logger.warning('Compressed outputs cannot be resumed; restarting from scratch')
+        return None
+    if not os.path.exists(part_path) or os.path.getsize(part_path) < checkpoint.get('output_bytes', 0):
+        logger.warning('Checkpoint for %s no longer matches the output on disk; restarting from scratch',
+                       part_path)
+        return None
+    return checkpoint
+
+
+def run_chunked(spec: PipelineSpec, progress_callback=None, run_id=None, checkpoint=None, stop_event=None):
+    """Streaming ETL for large inputs.
+
+    Chunks are written through a single load.ProcessedWriter (a `.part` file renamed onto
+    the output when the run completes). After each chunk a checkpoint
+    ({'rows', 'chunks', 'output', 'output_bytes'}) is sent to progress_callback under
+    info['checkpoint']. Passing that checkpoint back resumes the run: the part file is
+    truncated to the checkpointed size (dropping any partially written chunk) and the
+    input skips the rows already processed. Compressed outputs always restart.
+    If stop_event is set, the run stops right after the next checkpoint with RunInterrupted.
+    Rollups of the spec (etl.rollups) get each transformed chunk and are committed, for
+    the days of this run only, right before the output is put in place: a crash between
+    the two leaves the old output with rollups the next run rewrites anyway.
+    """
+    stage = spec.name
+    source = os.path.basename(spec.source)
+    part_path = os.path.join(load.PROCESSED_DIR, spec.output_name) + '.part'
+    checkpoint = _usable_checkpoint(checkpoint, part_path)
+    total_rows = 0
+    chunk_idx = 0
+    if checkpoint:
+        total_rows = checkpoint['rows']
+        chunk_idx = checkpoint.get('chunks', 0)
+        logger.info('ETL -> %s (streaming, resuming after %d rows)', source, total_rows)
+    else:
+        logger.info('ETL -> %s (streaming)', source)
+    if progress_callback:
+        progress_callback(run_id, stage, {'status': 'resumed' if checkpoint else 'started', 'mode': 'chunked',
+                                          'total_rows': total_rows})
+    stage_metrics = StageMetrics(stage)
+    transform_step = _transform_step_name(spec)
+    reader = iter(extract.read_csv_chunks(source, chunksize=spec.chunksize, skip_rows=total_rows, path=spec.path))
+    writer = _open_writer(spec, checkpoint)
+    write_step = f'load.{type(writer).__name__}.write'
+    written = writer.flush()
+    rollup_writers = [rollups.RollupWriter(name, resume_chunks=checkpoint['chunks'] if checkpoint else None)
+                      for name in spec.rollups]
+    # the output is rewritten from scratch: the next incremental run has to start with a full one
+    watermarks.reset(spec.output_name)
+    with writer:
+        while True:
+            with stage_metrics.step('extract.read_csv_chunks') as step:
+                chunk = next(reader, None)
+                step.rows = len(chunk) if chunk is not None else 0
+            if chunk is None:
+                break
+            chunk_idx += 1
+            total_rows += len(chunk)
+            # transform chunk
+            with stage_metrics.step(transform_step) as step:
+                chunk_t = _apply(spec, chunk)
+                step.rows = len(chunk_t)
+            # write out
+            with stage_metrics.step(write_step) as step:
+                writer.write(chunk_t)
+                previous, written = written, writer.flush()
+                step.rows = len(chunk_t)
+                step.bytes_written = written - previous
+            for rw in rollup_writers:
+                with stage_metrics.step(f'rollup.{rw.name}') as step:
+                    step.rows = rw.update(chunk_t)
+            logger.info('Processed chunk rows=%d', len(chunk))
+            if progress_callback:
+                progress_callback(run_id, stage, {
+                    'status': 'chunk_processed', 'chunk_index': chunk_idx, 'chunk_rows': len(chunk), 'total_rows': total_rows,
+                    'metrics': stage_metrics.summary(),
+                    'checkpoint': {'rows': total_rows, 'chunks': chunk_idx, 'output': writer.part_path,
+                                   'output_bytes': written, 'compression': spec.compression,
+                                   'partitioned': spec.partitioned, 'rollups': list(spec.rollups)},
+                })
+            if stop_event is not None and stop_event.is_set():
+                logger.info('Stop requested; %s interrupted after %d rows', stage, total_rows)
+                raise RunInterrupted(stage)
+        # before the writer renames the part onto the output (see run_full)
+        rollup_stats = {rw.name: rw.commit() for rw in rollup_writers}
+    stats = extract.read_stats.get(os.path.abspath(spec.path), {})
+    stage_metrics.add('extract.read_csv_chunks', bytes_read=stats.get('bytes', 0))
+    out = writer.path
+    logger.info('Completed %s. total_rows=%d', stage, total_rows)
+    if progress_callback:
+        progress_callback(run_id, stage, {'status': 'finished', 'total_rows': total_rows, 'output': out,
+                                          'metrics': stage_metrics.summary(),
+                                          **({'rollups': rollup_stats} if rollup_stats else {}),
+                                          'checkpoint': {'done': True, 'rows': total_rows, 'chunks': chunk_idx, 'output': out}})
+    return out
+
+
+def run_pipeline(spec: PipelineSpec, mode: Optional[str] = None, progress_callback=None, run_id=None,
+                 checkpoint=None, stop_event=None, full_refresh: bool = False):
+    """Run one pipeline holding the lock of its output file.
+
+    Incremental specs read in 'full' mode only process what was appended to the source
+    since the last run, unless full_refresh is set.
+    """
+    mode = mode or reader_mode(spec)
+    # date formats and generic column types are decided once per run and reused for all of its chunks
+    with load.output_lock(spec.output_name), transform.datetime_format_cache(), transform.column_type_cache():
+        if mode == 'chunked':
+            return run_chunked(spec, progress_callback=progress_callback, run_id=run_id,
+                               checkpoint=checkpoint, stop_event=stop_event)
+        if spec.incremental:
+            return run_incremental(spec, progress_callback=progress_callback, run_id=run_id,
+                                   full_refresh=full_refresh)
+        return run_full(spec, progress_callback=progress_callback, run_id=run_id)
+
+
+# ---------------------------------------------------------------------------
+# Ejecucion del plan
+# ---------------------------------------------------------------------------
+
+def _paths() -> Dict[str, str]:
+    """Rutas de datos del proceso actual, para repetirlas en los procesos hijos."""
+    return {'base': extract.BASE, 'schema_cache': extract.SCHEMA_CACHE_DIR, 'processed': load.PROCESSED_DIR}
+
+
+def _init_worker(paths: Dict[str, str], log_level: int):
+    """Pool worker initializer: same data paths and log level as the parent."""
+    extract.BASE = paths['base']
+    extract.SCHEMA_CACHE_DIR = paths['schema_cache']
+    load.PROCESSED_DIR = paths['processed']
+    if not logging.getLogger().handlers:
+        logging.basicConfig(level=log_level, format='%(asctime)s %(levelname)s [%(processName)s]: %(message)s')
+    logger.setLevel(log_level)
+
+
+def _run_in_process(spec: PipelineSpec, mode: str, run_id, checkpoint, events, stop, profile_interval=None):
+    """Pool worker entry point: run one pipeline, forward its events through `events`.
+
+    Errors are returned (with their traceback) instead of raised so the parent can
+    report them per stage; the worker's metric counters travel back as a snapshot.
+    """
+    metrics.REGISTRY.reset()
+
+    def forward(rid, stage, info):
+        events.put((stage, info))
+
+    result = _run_guarded(spec, mode, forward, run_id, checkpoint, stop, profile_interval)
+    result['metrics'] = metrics.REGISTRY.snapshot()
+    return result
+
+
+def _run_guarded(spec, mode, progress_callback, run_id, checkpoint, stop_event,
+                 profile_interval=None) -> Dict[str, Any]:
+    # the run's profiler only samples its own thread: stages running elsewhere sample
+    # themselves and send their stacks back with the result (see execute)
+    profiler = profiling.SamplingProfiler(profile_interval).start() if profile_interval else None
+    try:
+        out = run_pipeline(spec, mode=mode, progress_callback=progress_callback, run_id=run_id,
+                           checkpoint=checkpoint, stop_event=stop_event)
+        result = {'status': 'finished', 'output': out}
+    except RunInterrupted:
+        result = {'status': 'interrupted'}
+    except Exception as e:
+        logger.exception('Pipeline %s failed', spec.name)
+        result = {'status': 'failed', 'error': f'{type(e).__name__}: {e}', 'traceback': traceback.format_exc()}
+    if profiler is not None:
+        profiler.stop()
+        result['profile'] = profiler.snapshot()
+    return result
+
+
+def _execute_threads(todo, progress_callback, run_id, resume, stop_event, workers, profile_interval=None):
+    def run_step(step):
+        spec = step['spec']
+        if stop_event is not None and stop_event.is_set():
+            return {'status': 'interrupted'}
+        return _run_guarded(spec, step['mode'], progress_callback, run_id, resume.get(spec.name), stop_event,
+                            profile_interval)
+
+    if workers == 1:
+        # inline: the caller's thread (and its profiler) runs the pipelines
+        profile_interval = None
+        return {step['spec'].name: run_step(step) for step in todo}
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etl-pipeline') as pool:
+        futures = {step['spec'].name: pool.submit(run_step, step) for step in todo}
+    return {stage: f.result() for stage, f in futures.items()}
+
+
+def _execute_processes(todo, progress_callback, run_id, resume, stop_event, workers, profile_interval=None):
+    # the Manager (a server process) and the pool are created per call: with spawn each
+    # worker starts a fresh interpreter and imports pandas before the first pipeline runs
+    # (~1.5 s for the Manager and two workers on one core). That is small next to the
+    # multi-minute pipelines it parallelises; executor='auto' keeps small inputs in threads.
+    ctx = multiprocessing.get_context(MP_START_METHOD)
+    with ctx.Manager() as manager:
+        events = manager.Queue()
+        stop = manager.Event()
+        finished = threading.Event()
+
+        def drain():
+            # a single thread replays child events, so callbacks never run concurrently
+            while True:
+                if stop_event is not None and stop_event.is_set() and not stop.is_set():
+                    stop.set()
+                try:
+                    stage, info = events.get(timeout=0.1)
+                except queue.Empty:
+                    if finished.is_set():
+                        return
+                    continue
+                if progress_callback:
+                    try:
+                        progress_callback(run_id, stage, info)
+                    except Exception:
+                        logger.exception('progress callback failed for %s', stage)
+
+        drainer = threading.Thread(target=drain, name='etl-pipeline-events', daemon=True)
+        drainer.start()
+        with ProcessPoolExecutor(max_workers=workers, mp_context=ctx, initializer=_init_worker,
+                                 initargs=(_paths(), logger.getEffectiveLevel())) as procs, \
+                ThreadPoolExecutor(max_workers=workers, thread_name_prefix='etl-pipeline') as threads:
+
+            def run_step(step):
+                spec = step['spec']
+                if stop.is_set() or (stop_event is not None and stop_event.is_set()):
+                    return {'status': 'interrupted'}
+                # the output lock lives in this process; hold it while the child writes
+                with load.output_lock(spec.output_name):
+                    future = procs.submit(_run_in_process, spec, step['mode'], run_id,
+                                          resume.get(spec.name), events, stop, profile_interval)
+                    try:
+                        return future.result()
+                    except Exception as e:
+                        # the worker died (e.g. killed by the OOM killer)
+                        return {'status': 'failed', 'error': f'{type(e).__name__}: {e}',
+                                'traceback': traceback.format_exc()}
+
+            futures = {step['spec'].name: threads.submit(run_step, step) for step in todo}
+            results = {stage: f.result() for stage, f in futures.items()}
+        finished.set()
+        drainer.join()
+    for result in results.values():
+        snapshot = result.pop('metrics', None)
+        if snapshot:
+            metrics.REGISTRY.merge(snapshot)
+    return results
+
+
+def execute(steps: List[Dict[str, Any]], progress_callback=None, run_id=None, resume=None, stop_event=None,
+            max_workers: Optional[int] = None, executor: Optional[str] = None,
+            profiler: Optional[profiling.SamplingProfiler] = None) -> Dict[str, Dict[str, Any]]:
+    """Run planned steps, independent ones concurrently (at most max_workers at a time).
+
+    executor='process' runs each pipeline in a worker process so CPU-bound transforms do
+    not share the GIL; their progress events are forwarded to progress_callback from a
+    single thread. 'thread' runs them in threads of this process. 'auto'
+    (ETL_PIPELINE_EXECUTOR, default) picks processes only when the steps' inputs add up
+    to PROCESS_EXECUTOR_MIN_BYTES, so small uploads do not pay the pool's startup. With
+    one worker (or one step) pipelines run inline.
+
+    Stages whose checkpoint in `resume` is marked done are skipped. A failing stage does
+    not stop the others: it is reported with a 'failed' event ({'error': ...}) and, once
+    every stage ended, PipelineFailed is raised with the errors per stage (RunInterrupted
+    instead if a stop was requested). Returns {stage: {'status', 'output'|'error'}}.
+
+    profiler: the run's SamplingProfiler, which only sees the calling thread. Pipelines
+    running in worker threads or processes are sampled there at the same interval and
+    their stacks are merged into it under a root frame named after the stage.
+    """
+    resume = resume or {}
+    results: Dict[str, Dict[str, Any]] = {}
+    todo = []
+    for step in steps:
+        stage = step['spec'].name
+        if resume.get(stage, {}).get('done'):
+            logger.info('Skipping %s (already finished in a previous attempt)', stage)
+            if progress_callback:
+                progress_callback(run_id, stage, {'status': 'skipped'})
+            results[stage] = {'status': 'skipped'}
+        else:
+            todo.append(step)
+
+    workers = max(1, min(max_workers or MAX_PARALLEL_PIPELINES, len(todo) or 1))
+    profile_interval = profiler.interval if profiler is not None else None
+    executor = executor or EXECUTOR
+    if executor == 'auto':
+        executor = 'process' if sum(step.get('bytes', 0) for step in todo) >= PROCESS_EXECUTOR_MIN_BYTES \
+            else 'thread'
+    if executor == 'process' and workers > 1:
+        results.update(_execute_processes(todo, progress_callback, run_id, resume, stop_event, workers,
+                                          profile_interval))
+    else:
+        results.update(_execute_threads(todo, progress_callback, run_id, resume, stop_event, workers,
+                                        profile_interval))
+    for stage, result in results.items():
+        snapshot = result.pop('profile', None)
+        if snapshot and profiler is not None:
+            profiler.merge(snapshot, root=f'pipeline:{stage}')
+
+    failures = {stage: r for stage, r in results.items() if r['status'] == 'failed'}
+    for stage, r in failures.items():
+        if progress_callback:
+            progress_callback(run_id, stage, {'status': 'failed', 'error': r['error']})
+    interrupted = [stage for stage, r in results.items() if r['status'] == 'interrupted']
+    if interrupted:
+        raise RunInterrupted(', '.join(interrupted))
+    if failures:
+        raise PipelineFailed(failures)
+    return results
@@ -0,0 +1,109 @@
+"""Profiler por muestreo, opcional, para runs de ETL y entrenamiento.
+
+Un hilo auxiliar toma cada `interval` segundos la pila Python del hilo que ejecuta el
+run (sys._current_frames) y cuenta pilas identicas. El resultado se guarda en formato
+"folded" (una linea `frame;frame;frame N` por pila), que entienden flamegraph.pl,
+speedscope e inferno. El costo es proporcional a la frecuencia de muestreo, no al
+numero de llamadas, asi que se puede activar en runs de produccion.
+
+Los pipelines que corren en otros hilos o procesos (etl.pipeline.execute) se muestrean
+alli con su propio profiler y sus pilas se suman al del run con merge(), bajo un frame
+raiz con el nombre de la etapa.
+
+Uso:
+  with SamplingProfiler() as prof:
+      run_etl.run_all(..., profiler=prof)
+  prof.write('reports/etl_runs/<run_id>.profile.folded')
+"""
+import os
+import sys
+import time
+import threading
+from collections import Counter
+from typing import Any, Dict, Optional
+
+PROFILE_INTERVAL = float(os.environ.get('ETL_PROFILE_INTERVAL', '0.01'))
+# limita la profundidad guardada para que las lineas no crezcan sin control
+MAX_STACK_DEPTH = 200
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})'
+
+
+def _folded_stack(frame) -> str:
+    labels = []
+    while frame is not None and len(labels) < MAX_STACK_DEPTH:
+        labels.append(_frame_label(frame))
+        frame = frame.f_back
+    # folded: raiz primero, separada por ';' (los ';' en nombres no aparecen en Python)
+    return ';'.join(reversed(labels))
+
+
+class SamplingProfiler:
+    """Muestrea la pila de un hilo (por defecto el que llama a start())."""
+
+    def __init__(self, interval: Optional[float] = None):
+        self.interval = interval if interval is not None else PROFILE_INTERVAL
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self.duration_s = 0.0
+        self._target = None
+        self._stop = threading.Event()
+        self._thread = None
+        self._started = None
+
+    def start(self, thread_id: Optional[int] = None) -> 'SamplingProfiler':
+        self._target = thread_id or threading.get_ident()
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._thread = threading.Thread(target=self._sample, name='etl-profiler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+        self.duration_s = time.perf_counter() - self._started
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self._target)
+            if frame is None:
+                continue
+            self.stacks[_folded_stack(frame)] += 1
+            self.samples += 1
+
+    def write(self, path: str) -> str:
+        """Guarda las pilas en formato folded (escritura atomica). Devuelve la ruta."""
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f'{stack} {count}\n')
+        os.replace(tmp, path)
+        return path
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Pilas y muestras en un dict serializable (para enviarlas desde un worker)."""
+        return {'stacks': dict(self.stacks), 'samples': self.samples}
+
+    def merge(self, snapshot: Dict[str, Any], root: Optional[str] = None) -> None:
+        """Suma las pilas de snapshot(); `root` se antepone como frame raiz."""
+        for stack, count in snapshot.get('stacks', {}).items():
+            self.stacks[f'{root};{stack}' if root else stack] += count
+        self.samples += snapshot.get('samples', 0)
+
+    def summary(self) -> Dict[str, Any]:
+        return {'samples': self.samples, 'interval_s': self.interval, 'duration_s': round(self.duration_s, 3)}
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+        return False
@@ -0,0 +1,132 @@
+"""Lectura de salidas Parquet particionadas por fecha (ver load.PartitionedParquetWriter).
+
+`read_partitioned` filtra por rango de fechas y proyecta columnas sin leer todo el
+dataset: las particiones (`day=...` / `month=...`) fuera del rango se descartan por
+nombre de directorio y, dentro de cada archivo, pyarrow salta los row groups cuyas
+estadisticas min/max de la columna de fecha no se solapan con el rango.
+
+Uso:
+  from etl import read
+  df = read.read_partitioned('pool_swaps.processed.parquet', start='2025-09-01', end='2025-09-08',
+                             columns=['date', 'pool_address', 'volume_usd'])
+  read.explain('pool_swaps.processed.parquet', start='2025-09-01', end='2025-09-08')
+"""
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from etl import load
+
+
+def _resolve(path: str) -> str:
+    return path if os.path.isabs(path) else os.path.join(load.PROCESSED_DIR, path)
+
+
+def partition_key(path: str) -> str:
+    """Clave de particion ('day' o 'month') de una salida particionada; ValueError si no lo es."""
+    for entry in sorted(os.listdir(path)):
+        if '=' in entry and os.path.isdir(os.path.join(path, entry)):
+            key = entry.split('=', 1)[0]
+            if key in {k for k, _ in load.PARTITION_GRANULARITIES.values()}:
+                return key
+    raise ValueError(f'{path} is not a date-partitioned dataset')
+
+
+def dataset(path: str):
+    """pyarrow Dataset de una salida particionada; la clave de particion es texto.
+
+    Si existe `_common_metadata` (ver load.PartitionedParquetWriter) su schema, el de tipos
+    ensanchados entre chunks, es el del dataset; si no, el del primer archivo.
+    """
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+
+    path = _resolve(path)
+    key = partition_key(path)
+    partitioning = ds.partitioning(pa.schema([(key, pa.string())]), flavor='hive')
+    schema = None
+    common = os.path.join(path, load.COMMON_METADATA)
+    if os.path.exists(common):
+        schema = pq.read_schema(common).append(pa.field(key, pa.string()))
+    return ds.dataset(path, format='parquet', partitioning=partitioning, schema=schema)
+
+
+def timestamp_scalar(value, field_type) -> Any:
+    """Escalar pyarrow del tipo timestamp de la columna (naive => UTC si la columna tiene zona)."""
+    import pyarrow as pa
+
+    ts = pd.Timestamp(value)
+    if getattr(field_type, 'tz', None):
+        ts = ts.tz_localize('UTC') if ts.tzinfo is None else ts
+    elif ts.tzinfo is not None:
+        ts = ts.tz_convert('UTC').tz_localize(None)
+    return pa.scalar(ts.to_pydatetime(), type=field_type)
+
+
+def build_filter(data, start=None, end=None, date_column: str = 'date'):
+    """Expresion [start, end) sobre la particion (poda de directorios) y sobre la columna
+    de fecha (poda de row groups y filtro exacto de filas)."""
+    import pyarrow.dataset as ds
+
+    key = next(name for name in data.partitioning.schema.names)
+    fmt = dict(load.PARTITION_GRANULARITIES.values())[key]
+    field_type = data.schema.field(date_column).type
+    expr = None
+
+    def _and(a, b):
+        return b if a is None else a & b
+
+    if start is not None:
+        expr = _and(expr, ds.field(key) >= pd.Timestamp(start).strftime(fmt))
+        expr = _and(expr, ds.field(date_column) >= timestamp_scalar(start, field_type))
+    if end is not None:
+        # end es exclusivo: la particion que contiene end puede tener filas anteriores
+        expr = _and(expr, ds.field(key) <= pd.Timestamp(end).strftime(fmt))
+        expr = _and(expr, ds.field(date_column) < timestamp_scalar(end, field_type))
+    return expr
+
+
+def read_partitioned(path: str, start=None, end=None, columns: Optional[List[str]] = None,
+                     date_column: str = 'date', filter=None) -> pd.DataFrame:
+    """Filas con `start <= date_column < end`, solo con `columns` (todas si None).
+
+    `filter` agrega una expresion pyarrow.dataset adicional (p.ej.
+    `ds.field('pool_address') == 'pool0001'`), que tambien se usa para podar row groups.
+    """
+    data = dataset(path)
+    expr = build_filter(data, start, end, date_column)
+    if filter is not None:
+        expr = filter if expr is None else expr & filter
+    if columns is not None:
+        columns = list(columns)
+    table = data.to_table(columns=columns, filter=expr)
+    return table.to_pandas()
+
+
+def explain(path: str, start=None, end=None, date_column: str = 'date', filter=None) -> Dict[str, Any]:
+    """Cuantas particiones, archivos y row groups toca una consulta frente al total."""
+    data = dataset(path)
+    expr = build_filter(data, start, end, date_column)
+    if filter is not None:
+        expr = filter if expr is None else expr & filter
+
+    def _count(fragments, prune: bool) -> Tuple[int, int, int]:
+        partitions, files, row_groups = set(), 0, 0
+        for fragment in fragments:
+            partitions.add(os.path.basename(os.path.dirname(fragment.path)))
+            files += 1
+            if not prune or expr is None:
+                row_groups += fragment.num_row_groups
+            else:
+                row_groups += len(fragment.split_by_row_group(filter=expr, schema=data.schema))
+        return len(partitions), files, row_groups
+
+    total = _count(data.get_fragments(), prune=False)
+    selected = _count(data.get_fragments(filter=expr) if expr is not None else data.get_fragments(), prune=True)
+    return {
+        'partitions_total': total[0], 'partitions_selected': selected[0],
+        'files_total': total[1], 'files_selected': selected[1],
+        'row_groups_total': total[2], 'row_groups_selected': selected[2],
+    }
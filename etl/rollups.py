@@ -0,0 +1,201 @@
+"""Rollups materializados por periodo (p.ej. totales diarios por pool de pool_swaps).
+
+Cada chunk transformado se reduce a agregados parciales por (periodo, claves): `rows` y,
+por cada medida, `<col>_sum` y `<col>_count` (valores no nulos). Los parciales se combinan
+sumandolos, asi que el rollup se mantiene mientras corre el pipeline sin volver a leer
+las filas crudas; la media de una medida es `<col>_sum / <col>_count`.
+
+La tabla vive en `data/processed/<output>` (CSV, una fila por periodo y clave). Al
+terminar una corrida solo se reescriben los periodos que aparecen en ella
+(`mode='replace'`, el de las corridas del pipeline, que reprocesan su fuente completa);
+`apply(..., mode='add')` suma filas nuevas a los periodos existentes (anexos).
+
+Uso:
+  from etl import rollups
+  daily = rollups.read_rollup('pool_swaps_daily', start='2025-09-25', end='2025-10-02')
+"""
+import os
+import re
+import shutil
+import fnmatch
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, List, Optional
+
+import pandas as pd
+
+from etl import load
+
+ROLLUP_MODES = ('replace', 'add')
+_CHUNK_FILE = re.compile(r'^chunk-(\d+)\.csv$')
+
+
+@dataclass(frozen=True)
+class RollupSpec:
+    name: str
+    output: str                  # CSV bajo data/processed
+    keys: List[str]              # columnas de agrupacion ademas del periodo
+    measures: List[str]          # columnas o patrones fnmatch de las medidas a sumar
+    date_column: str = 'date'
+    granularity: str = 'day'     # ver load.PARTITION_GRANULARITIES
+
+    @property
+    def period(self) -> str:
+        return load.PARTITION_GRANULARITIES[self.granularity][0]
+
+    @property
+    def path(self) -> str:
+        return os.path.join(load.PROCESSED_DIR, self.output)
+
+    @property
+    def part_path(self) -> str:
+        return self.path + '.part'
+
+
+ROLLUPS: Dict[str, RollupSpec] = {
+    'pool_swaps_daily': RollupSpec('pool_swaps_daily', 'pool_swaps.daily_rollup.csv', keys=['pool_address'],
+                                   measures=['token_amount_*_ui_calc', '*_usd', 'num_swaps']),
+}
+
+
+def get_rollup(name: str) -> RollupSpec:
+    try:
+        return ROLLUPS[name]
+    except KeyError:
+        raise ValueError(f'Unknown rollup {name!r}') from None
+
+
+def measure_columns(spec: RollupSpec, columns: Iterable[str]) -> List[str]:
+    """Columnas de `columns` que son medidas del rollup, en el orden del DataFrame."""
+    return [c for c in columns
+            if c not in spec.keys and c != spec.date_column
+            and any(fnmatch.fnmatchcase(c, p) for p in spec.measures)]
+
+
+def _group_columns(spec: RollupSpec) -> List[str]:
+    return [spec.period] + list(spec.keys)
+
+
+def partial(spec: RollupSpec, df: pd.DataFrame) -> pd.DataFrame:
+    """Agregados parciales de un chunk. Las filas sin fecha no entran en el rollup."""
+    fmt = load.PARTITION_GRANULARITIES[spec.granularity][1]
+    dates = pd.to_datetime(df[spec.date_column], errors='coerce')
+    valid = dates.notna().to_numpy()
+    measures = measure_columns(spec, df.columns)
+    frame = pd.DataFrame({spec.period: dates[valid].dt.strftime(fmt).to_numpy()})
+    for key in spec.keys:
+        frame[key] = df[key].to_numpy()[valid]
+    frame['rows'] = 1
+    for col in measures:
+        values = pd.to_numeric(df[col], errors='coerce').to_numpy()[valid]
+        frame[f'{col}_sum'] = values
+        frame[f'{col}_count'] = ~pd.isna(values)
+    grouped = frame.groupby(_group_columns(spec), dropna=False, sort=True)
+    # sum() de pandas ignora NaN, asi que *_sum es la suma de los valores presentes
+    return grouped.sum().reset_index()
+
+
+def merge(spec: RollupSpec, frames: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """Combina agregados parciales (mismo periodo y claves => se suman)."""
+    frames = [f for f in frames if len(f)]
+    if not frames:
+        return pd.DataFrame(columns=_group_columns(spec) + ['rows'])
+    combined = pd.concat(frames, ignore_index=True)
+    # una medida ausente en algun chunk cuenta como 0
+    values = [c for c in combined.columns if c not in _group_columns(spec)]
+    combined[values] = combined[values].fillna(0)
+    out = combined.groupby(_group_columns(spec), dropna=False, sort=True)[values].sum().reset_index()
+    for col in values:
+        if col == 'rows' or col.endswith('_count'):
+            out[col] = out[col].astype('int64')
+    return out
+
+
+def _read_csv(spec: RollupSpec, path: str) -> pd.DataFrame:
+    return pd.read_csv(path, dtype={c: 'str' for c in _group_columns(spec)})
+
+
+def read_rollup(name: str, start=None, end=None) -> pd.DataFrame:
+    """Tabla del rollup, opcionalmente solo los periodos que empiezan en [start, end)."""
+    spec = get_rollup(name)
+    df = _read_csv(spec, spec.path)
+    starts = pd.to_datetime(df[spec.period], format=load.PARTITION_GRANULARITIES[spec.granularity][1])
+    mask = pd.Series(True, index=df.index)
+    if start is not None:
+        mask &= starts >= pd.Timestamp(start)
+    if end is not None:
+        mask &= starts < pd.Timestamp(end)
+    return df[mask].reset_index(drop=True)
+
+
+def upsert(spec: RollupSpec, new: pd.DataFrame, mode: str = 'replace') -> Dict[str, Any]:
+    """Escribe `new` en la tabla del rollup tocando solo sus periodos.
+
+    mode='replace' sustituye los periodos presentes en `new`; mode='add' los combina con
+    los existentes. Devuelve {'path', 'periods_updated', 'periods_total', 'rows'}.
+    """
+    if mode not in ROLLUP_MODES:
+        raise ValueError(f'Unknown rollup mode {mode!r}')
+    touched = set(new[spec.period].dropna())
+    if os.path.exists(spec.path):
+        current = _read_csv(spec, spec.path)
+        if mode == 'replace':
+            current = current[~current[spec.period].isin(touched)]
+        table = merge(spec, [current, new])
+    else:
+        table = merge(spec, [new])
+    tmp = spec.path + '.tmp'
+    table.to_csv(tmp, index=False, encoding='utf-8')
+    os.replace(tmp, spec.path)
+    return {'path': spec.path, 'periods_updated': len(touched),
+            'periods_total': int(table[spec.period].nunique()), 'rows': len(table)}
+
+
+def apply(name: str, df: pd.DataFrame, mode: str = 'add') -> Dict[str, Any]:
+    """Actualiza el rollup con las filas transformadas de `df` (por defecto, como anexo)."""
+    spec = get_rollup(name)
+    return upsert(spec, partial(spec, df), mode=mode)
+
+
+class RollupWriter:
+    """Mantiene un rollup durante una corrida por chunks.
+
+    update() guarda el parcial de cada chunk en `<output>.part/chunk-NNNNN.csv`; commit()
+    los combina y actualiza la tabla (solo los periodos de la corrida). Como los parciales
+    van por indice de chunk, reanudar con `resume_chunks=N` borra los de chunks
+    posteriores a N y sigue, igual que load.PartitionedParquetWriter.
+    """
+
+    def __init__(self, name: str, resume_chunks: Optional[int] = None, mode: str = 'replace'):
+        if mode not in ROLLUP_MODES:
+            raise ValueError(f'Unknown rollup mode {mode!r}')
+        self.spec = get_rollup(name)
+        self.name = name
+        self.mode = mode
+        self.part_path = self.spec.part_path
+        self.chunks = 0
+        if resume_chunks is not None and os.path.isdir(self.part_path):
+            self.chunks = resume_chunks
+            for entry in os.listdir(self.part_path):
+                m = _CHUNK_FILE.match(entry)
+                if m is None or int(m.group(1)) > resume_chunks:
+                    os.remove(os.path.join(self.part_path, entry))
+        else:
+            shutil.rmtree(self.part_path, ignore_errors=True)
+        os.makedirs(self.part_path, exist_ok=True)
+
+    def update(self, df: pd.DataFrame) -> int:
+        """Agrega un chunk transformado; devuelve las filas del parcial escrito."""
+        self.chunks += 1
+        part = partial(self.spec, df)
+        if len(part):
+            path = os.path.join(self.part_path, f'chunk-{self.chunks:05d}.csv')
+            part.to_csv(path + '.tmp', index=False, encoding='utf-8')
+            os.replace(path + '.tmp', path)
+        return len(part)
+
+    def commit(self) -> Dict[str, Any]:
+        files = sorted(f for f in os.listdir(self.part_path) if _CHUNK_FILE.match(f))
+        combined = merge(self.spec, [_read_csv(self.spec, os.path.join(self.part_path, f)) for f in files])
+        stats = upsert(self.spec, combined, mode=self.mode)
+        shutil.rmtree(self.part_path, ignore_errors=True)
+        return stats
@@ -1,84 +1,85 @@
 """Orquestador ETL: permite ejecutar extract/transform/load por dataset y completo.
 
+Los pipelines se describen en etl/pipeline.py (PipelineSpec); las funciones etl_* de
+este modulo son atajos a los specs por defecto.
+
 Uso:
   python -m etl.run_etl  # ejecuta todo
   from etl.run_etl import run_all
 """
 import os
-from etl import extract, transform, load
-import pandas as pd
+from dataclasses import replace
+
+from etl import pipeline
 import logging
 
 BASE = os.path.join(os.path.dirname(__file__), '..')
 REPORTS = os.path.join(BASE, 'reports')
 os.makedirs(REPORTS, exist_ok=True)
 
-logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s: %(message)s')
 logger = logging.getLogger('etl')
+LOG_FORMAT = '%(asctime)s %(levelname)s: %(message)s'
+
+
+RunInterrupted = pipeline.RunInterrupted
+PipelineFailed = pipeline.PipelineFailed
+
+
+def etl_bank_prices(progress_callback=None, run_id=None, full_refresh=False):
+    """Run ETL for bank prices. Optionally call progress_callback(run_id, stage, info).
+
+    Only rows appended since the last run are processed (pipeline.run_incremental);
+    full_refresh=True reprocesses the whole file.
+    """
+    return pipeline.run_pipeline(pipeline.get_spec('bank_prices'), mode='full',
+                                 progress_callback=progress_callback, run_id=run_id, full_refresh=full_refresh)
+
+
+def etl_tata(progress_callback=None, run_id=None, full_refresh=False):
+    return pipeline.run_pipeline(pipeline.get_spec('tata_motors'), mode='full',
+                                 progress_callback=progress_callback, run_id=run_id, full_refresh=full_refresh)
+
+
+def etl_pool_swaps(chunksize: int = 200000, progress_callback=None, run_id=None, checkpoint=None,
+                   compression=None, stop_event=None):
+    """Run the streaming ETL for pool_swaps (see pipeline.run_chunked for checkpoints)."""
+    spec = replace(pipeline.get_spec('pool_swaps'), chunksize=chunksize, compression=compression)
+    return pipeline.run_pipeline(spec, mode='chunked', progress_callback=progress_callback, run_id=run_id,
+                                 checkpoint=checkpoint, stop_event=stop_event)
 
 
-def etl_bank_prices(progress_callback=None, run_id=None):
-    """Run ETL for bank prices. Optionally call progress_callback(run_id, stage, info)."""
-    stage = 'bank_prices'
-    logger.info('ETL -> Bank_Price_Data_China new.csv')
-    if progress_callback:
-        progress_callback(run_id, stage, {'status': 'started'})
-    df = extract.read_csv_full('Bank_Price_Data_China new.csv')
-    df_t = transform.transform_bank_prices(df)
-    out = load.write_processed_df(df_t, 'Bank_Price_Data_China_new.processed.csv')
-    logger.info('Wrote %s', out)
-    if progress_callback:
-        progress_callback(run_id, stage, {'status': 'finished', 'output': out, 'rows': len(df_t)})
-
-
-def etl_tata(progress_callback=None, run_id=None):
-    stage = 'tata_motors'
-    logger.info('ETL -> final_dataset_tata_motors.csv')
-    if progress_callback:
-        progress_callback(run_id, stage, {'status': 'started'})
-    df = extract.read_csv_full('final_dataset_tata_motors.csv')
-    df_t = transform.transform_tata(df)
-    out = load.write_processed_df(df_t, 'final_dataset_tata_motors.processed.csv')
-    logger.info('Wrote %s', out)
-    if progress_callback:
-        progress_callback(run_id, stage, {'status': 'finished', 'output': out, 'rows': len(df_t)})
-
-
-def etl_pool_swaps(chunksize: int = 200000, progress_callback=None, run_id=None):
-    stage = 'pool_swaps'
-    logger.info('ETL -> pool_swaps.csv (streaming)')
-    if progress_callback:
-        progress_callback(run_id, stage, {'status': 'started'})
-    reader = extract.read_csv_chunks('pool_swaps.csv', chunksize=chunksize)
-    first = True
-    total_rows = 0
-    chunk_idx = 0
-    for chunk in reader:
-        chunk_idx += 1
-        total_rows += len(chunk)
-        # transform chunk
-        chunk_t = transform.transform_pool_swaps_chunk(chunk)
-        # write out
-        mode = 'w' if first else 'a'
-        load.write_processed_df(chunk_t, 'pool_swaps.processed.csv', mode=mode)
-        first = False
-        logger.info('Processed chunk rows=%d', len(chunk))
-        if progress_callback:
-            progress_callback(run_id, stage, {'status': 'chunk_processed', 'chunk_index': chunk_idx, 'chunk_rows': len(chunk), 'total_rows': total_rows})
-    logger.info('Completed pool_swaps. total_rows=%d', total_rows)
-    if progress_callback:
-        progress_callback(run_id, stage, {'status': 'finished', 'total_rows': total_rows})
-
-
-def run_all(progress_callback=None, run_id=None, pool_chunksize: int = 200000):
+def run_all(progress_callback=None, run_id=None, pool_chunksize: int = 200000, resume=None, stop_event=None,
+            files=None, max_workers=None, executor=None, profiler=None):
     """Run the full ETL pipeline.
 
     progress_callback(run_id, stage, info) will be called if provided.
+    files: input files to process (e.g. the ones of an upload); each gets the pipeline
+    that matches its name or the generic one. None runs every configured pipeline.
+    Independent pipelines run concurrently (max_workers, ETL_MAX_PARALLEL_PIPELINES), in
+    worker processes when the inputs are large enough to pay for them (executor, see
+    pipeline.execute) and in threads of this process otherwise; large inputs are
+    streamed in chunks (see pipeline.plan). The run takes as long as its
+    slowest pipeline; if some fail the others still finish and PipelineFailed reports
+    the errors per stage.
+    resume: checkpoints per stage from a previous run ({stage: checkpoint}). Stages whose
+    checkpoint is marked done are skipped and chunked stages continue from their last chunk.
+    stop_event: threading.Event checked between stages and chunks; when set the run
+    raises RunInterrupted after its last checkpoint.
+    profiler: etl.profiling.SamplingProfiler of the calling thread; stacks sampled in the
+    pipeline workers are merged into it (see pipeline.execute).
+    Each stage holds the lock of its output file, so concurrent runs never write the same
+    processed file at the same time.
     """
-    etl_bank_prices(progress_callback=progress_callback, run_id=run_id)
-    etl_tata(progress_callback=progress_callback, run_id=run_id)
-    etl_pool_swaps(chunksize=pool_chunksize, progress_callback=progress_callback, run_id=run_id)
+    steps = pipeline.plan(files)
+    for step in steps:
+        if step['spec'].name == 'pool_swaps':
+            step['spec'] = replace(step['spec'], chunksize=pool_chunksize)
+    logger.info('ETL plan: %s', ', '.join(f"{s['spec'].name}({s['mode']})" for s in steps))
+    return pipeline.execute(steps, progress_callback=progress_callback, run_id=run_id, resume=resume,
+                            stop_event=stop_event, max_workers=max_workers, executor=executor,
+                            profiler=profiler)
 
 
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format=LOG_FORMAT)
     run_all()
@@ -1,25 +1,170 @@
+import re
 import pandas as pd
 import numpy as np
 import math
-from typing import Iterable
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterable, Iterator, Optional, Tuple
+from pandas.api.types import is_datetime64_any_dtype, is_numeric_dtype, is_object_dtype, is_string_dtype
+
+
+# Formatos de fecha probados al detectar, en orden. Con dayfirst se prueban primero los DD/MM.
+_ISO_FORMATS = [
+    '%Y-%m-%d %H:%M:%S%z',
+    '%Y-%m-%d %H:%M:%S',
+    '%Y-%m-%dT%H:%M:%S%z',
+    '%Y-%m-%dT%H:%M:%S',
+    '%Y-%m-%d %H:%M:%S.%f',
+    '%Y-%m-%d',
+]
+_DAYFIRST_FORMATS = ['%d/%m/%Y', '%d/%m/%Y %H:%M:%S', '%d-%m-%Y']
+_MONTHFIRST_FORMATS = ['%m/%d/%Y', '%m/%d/%Y %H:%M:%S']
+_EPOCH = 'epoch'
+_EPOCH_TEXT = re.compile(r'^\d{9,19}$')
+_DETECT_SAMPLE = 50
+
+# si menos de esta fraccion de los valores encaja con el formato detectado, se re-infiere
+_FORMAT_MIN_HITS = 0.8
+
+# Formato detectado por columna: {(clave, dayfirst): formato | 'epoch' | None}. Vive lo que
+# dura un datetime_format_cache() (una corrida de pipeline: todos sus chunks); fuera de uno
+# cada llamada detecta el suyo, asi dos archivos con una columna 'date' no se mezclan.
+_DATETIME_FORMATS: ContextVar[Optional[Dict[Tuple[str, bool], Optional[str]]]] = \
+    ContextVar('datetime_formats', default=None)
+
+
+@contextmanager
+def datetime_format_cache() -> Iterator[Dict[Tuple[str, bool], Optional[str]]]:
+    """Comparte los formatos detectados por parse_datetime_column dentro del bloque."""
+    token = _DATETIME_FORMATS.set({})
+    try:
+        yield _DATETIME_FORMATS.get()
+    finally:
+        _DATETIME_FORMATS.reset(token)
+
+
+# Tipo elegido por transform_generic para cada columna: {columna: 'datetime' | 'numeric' | None}.
+# Dentro de un column_type_cache() lo decide el primer chunk con valores y los siguientes
+# se convierten igual, asi la salida no cambia de tipo a mitad de la corrida.
+_GENERIC_TYPES: ContextVar[Optional[Dict[str, Optional[str]]]] = ContextVar('generic_types', default=None)
+
+
+@contextmanager
+def column_type_cache() -> Iterator[Dict[str, Optional[str]]]:
+    """Comparte los tipos que decide transform_generic dentro del bloque."""
+    token = _GENERIC_TYPES.set({})
+    try:
+        yield _GENERIC_TYPES.get()
+    finally:
+        _GENERIC_TYPES.reset(token)
+
+
+# separadores de miles y espacios duros que clean_numeric_column quita antes de convertir
+_NUMERIC_NOISE = re.compile('[,\u00A0]')
 
 
 def clean_numeric_column(series: pd.Series) -> pd.Series:
-    """Asegura que una serie sea numérica: quita espacios, comas, convierte a float; coerce errors."""
-    if series.dtype == object:
-        s = series.str.strip().str.replace(',', '').str.replace('\u00A0', '')
-        # Replace leading zeros that look like '04.06' -> keep as '4.06' only if leading zero before dot
-        s = s.str.replace(r'^0+(?=\.)', '', regex=True)
-        return pd.to_numeric(s, errors='coerce')
-    else:
-        return pd.to_numeric(series, errors='coerce')
+    """Asegura que una serie sea numérica: quita espacios, comas, convierte a float; coerce errors.
+
+    Las columnas ya numéricas se devuelven como copia superficial (sin copiar datos; con
+    copy-on-write modificar una no cambia la otra) y las de texto que pandas puede
+    convertir directamente (sin comas, NBSP, etc.) no pasan por la limpieza: una pasada
+    que quita comas y NBSP y pd.to_numeric, que ya tolera espacios en los extremos y ceros
+    a la izquierda ('04.06'). Vectorizado, sin un paso Python por valor.
+    """
+    if is_numeric_dtype(series):
+        return series.copy(deep=False)
+    if is_object_dtype(series) or is_string_dtype(series):
+        # casi todas las columnas de texto de las fuentes ya son numeros limpios: este
+        # intento les ahorra la limpieza y cuesta una pasada a las que tienen basura
+        try:
+            return pd.to_numeric(series, errors='raise')
+        except (ValueError, TypeError):
+            pass
+        return pd.to_numeric(series.astype('str').str.replace(_NUMERIC_NOISE, '', regex=True), errors='coerce')
+    return pd.to_numeric(series, errors='coerce')
+
+
+def _epoch_unit(values: pd.Series) -> str:
+    # segundos hasta ~5138 d.C.; por encima se asume ms/us/ns segun magnitud
+    top = float(values.abs().max()) if len(values) else 0.0
+    if top < 1e11:
+        return 's'
+    if top < 1e14:
+        return 'ms'
+    if top < 1e17:
+        return 'us'
+    return 'ns'
+
+
+def _detect_datetime_format(sample: pd.Series, dayfirst: bool) -> Optional[str]:
+    sample = sample.astype(str).str.strip()
+    if sample.str.match(_EPOCH_TEXT).all():
+        return _EPOCH
+    candidates = (_DAYFIRST_FORMATS + _ISO_FORMATS + _MONTHFIRST_FORMATS) if dayfirst \
+        else (_ISO_FORMATS + _MONTHFIRST_FORMATS + _DAYFIRST_FORMATS)
+    best, best_hits = None, 0
+    for fmt in candidates:
+        hits = int(pd.to_datetime(sample, format=fmt, errors='coerce').notna().sum())
+        if hits == len(sample):
+            return fmt
+        if hits > best_hits:
+            best, best_hits = fmt, hits
+    # tolera algun valor basura en la muestra
+    return best if best_hits >= _FORMAT_MIN_HITS * len(sample) else None
+
+
+def parse_datetime_column(series: pd.Series, key: Optional[str] = None, dayfirst: bool = False,
+                          unit: Optional[str] = None) -> pd.Series:
+    """Parsea una columna de fechas a datetime64 reutilizando el formato detectado.
+
+    - Columnas ya datetime se devuelven tal cual.
+    - Columnas numericas (o texto solo con digitos) se tratan como epoch; la unidad se
+      infiere por magnitud si no se indica.
+    - Para texto, el formato se detecta una vez sobre una muestra y se cachea por
+      `key` (por defecto el nombre de la columna) dentro de datetime_format_cache(); las
+      siguientes llamadas usan `format=` explicito. Valores sueltos que no encajan quedan
+      NaT; si encaja menos del 80% se vuelve a la inferencia de pandas y el formato se
+      vuelve a detectar en la siguiente llamada.
+    """
+    if is_datetime64_any_dtype(series):
+        return series
+    if is_numeric_dtype(series):
+        return pd.to_datetime(series, unit=unit or _epoch_unit(series.dropna()), errors='coerce')
+
+    non_null = series.dropna()
+    if non_null.empty:
+        return pd.to_datetime(series, errors='coerce')
+    formats = _DATETIME_FORMATS.get()
+    if formats is None:
+        formats = {}
+    cache_key = (key or str(series.name), dayfirst)
+    if cache_key not in formats:
+        formats[cache_key] = _detect_datetime_format(non_null.iloc[:_DETECT_SAMPLE], dayfirst)
+    fmt = formats[cache_key]
+
+    if fmt == _EPOCH:
+        numbers = pd.to_numeric(series, errors='coerce')
+        return pd.to_datetime(numbers, unit=unit or _epoch_unit(numbers.dropna()), errors='coerce')
+    if fmt is not None:
+        parsed = pd.to_datetime(series, format=fmt, errors='coerce')
+        # algun valor basura en el chunk: NaT, sin un segundo parseo
+        if parsed.notna().sum() >= _FORMAT_MIN_HITS * len(non_null):
+            return parsed
+        fallback = pd.to_datetime(series, dayfirst=dayfirst, errors='coerce')
+        if fallback.notna().sum() > parsed.notna().sum():
+            # el formato de la fuente cambio: se volvera a detectar en la siguiente llamada
+            formats.pop(cache_key, None)
+            return fallback
+        return parsed
+    return pd.to_datetime(series, dayfirst=dayfirst, errors='coerce')
 
 
 def transform_bank_prices(df: pd.DataFrame) -> pd.DataFrame:
     # Parse Date DD/MM/YYYY
     df = df.copy()
     if 'Date' in df.columns:
-        df['Date'] = pd.to_datetime(df['Date'], dayfirst=True, errors='coerce')
+        df['Date'] = parse_datetime_column(df['Date'], key='bank_prices.Date', dayfirst=True)
     # Convert all other columns to numeric
     for c in df.columns:
         if c != 'Date':
@@ -31,10 +176,10 @@ def transform_tata(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     # timestamp -> datetime aware
     if 'timestamp' in df.columns:
-        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
-    # date -> date
+        df['timestamp'] = parse_datetime_column(df['timestamp'], key='tata.timestamp')
+    # date -> datetime64 a medianoche (se escribe igual que un date y evita una columna object)
     if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce').dt.date
+        df['date'] = parse_datetime_column(df['date'], key='tata.date').dt.normalize()
     # Clean numeric columns
     for c in df.columns:
         if c not in ['timestamp', 'date']:
@@ -51,9 +196,9 @@ def transform_pool_swaps_chunk(df: pd.DataFrame) -> pd.DataFrame:
     df = df.copy()
     # parse date/block_time
     if 'date' in df.columns:
-        df['date'] = pd.to_datetime(df['date'], errors='coerce')
+        df['date'] = parse_datetime_column(df['date'], key='pool_swaps.date')
     elif 'block_time' in df.columns:
-        df['date'] = pd.to_datetime(df['block_time'], unit='s', errors='coerce')
+        df['date'] = parse_datetime_column(df['block_time'], key='pool_swaps.block_time', unit='s')
 
     # numeric coercion
     for c in df.columns:
@@ -69,6 +214,58 @@ def transform_pool_swaps_chunk(df: pd.DataFrame) -> pd.DataFrame:
     return df
 
 
+_TEMPORAL_NAME = re.compile(r'(date|time|fecha)', re.IGNORECASE)
+
+
+def transform_generic(df: pd.DataFrame) -> pd.DataFrame:
+    """Transform por defecto para archivos sin pipeline propio.
+
+    - columnas de texto con nombre de fecha/hora -> datetime si al menos 80% parsea
+    - otras columnas de texto -> numericas solo si la limpieza no pierde ningun valor
+    - el resto se deja como esta
+    Dentro de column_type_cache() el tipo de cada columna se decide con el primer chunk
+    que tiene valores y se aplica a todos los demas (valores que no convierten quedan
+    nulos); fuera de uno la decision es por llamada.
+    """
+    types = _GENERIC_TYPES.get()
+    if types is None:
+        types = {}
+    df = df.copy()
+    for c in df.columns:
+        s = df[c]
+        key = str(c)
+        if key in types:
+            kind = types[key]
+            if kind == 'datetime':
+                df[c] = parse_datetime_column(s)
+            elif kind == 'numeric':
+                df[c] = clean_numeric_column(s)
+            elif not (is_object_dtype(s) or is_string_dtype(s)):
+                # texto en el primer chunk: se mantiene aunque este chunk solo tenga numeros
+                df[c] = s.astype('str')
+            continue
+        if not (is_object_dtype(s) or is_string_dtype(s)):
+            continue
+        present = int(s.notna().sum())
+        if not present:
+            continue
+        if _TEMPORAL_NAME.search(key):
+            parsed = parse_datetime_column(s)
+            if parsed.notna().sum() >= 0.8 * present:
+                df[c] = parsed
+                types[key] = 'datetime'
+            else:
+                types[key] = None
+            continue
+        cleaned = clean_numeric_column(s)
+        if int(cleaned.notna().sum()) == present:
+            df[c] = cleaned
+            types[key] = 'numeric'
+        else:
+            types[key] = None
+    return df
+
+
 def detect_anomalies_numeric(series: pd.Series):
     s = series.dropna()
     if s.empty:
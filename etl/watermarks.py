@@ -0,0 +1,112 @@
+"""Marcas de agua para fuentes que solo crecen (series diarias de precios).
+
+La marca de un pipeline incremental guarda hasta donde se proceso su fuente: el offset en
+bytes (inicio de la primera linea sin procesar), el ultimo valor de la columna de fecha
+(`PipelineSpec.incremental`) y el tamano de la salida en ese momento. La siguiente corrida
+lee solo desde ese offset, descarta filas con fecha <= la marca y las anexa a la salida.
+La columna debe crecer estrictamente fila a fila (una fila por dia o por minuto), como en
+las fuentes historicas; filas con la misma fecha que la marca se consideran ya procesadas.
+
+Se guarda junto a la salida (`data/processed/<salida>.watermark.json`). Si la fuente dejo de
+ser un anexo de lo ya procesado (se reescribio o se trunco, cambio el encabezado) o la
+salida no coincide, `invalid_reason` lo detecta y el pipeline vuelve a la corrida completa.
+"""
+import os
+import json
+import hashlib
+from typing import Any, Dict, Optional
+
+import pandas as pd
+
+from etl import extract, load
+
+# bytes del inicio de la fuente y previos al offset que se comparan para detectar reescrituras
+FINGERPRINT_BYTES = 64 * 1024
+
+
+def path_for(output_name: str) -> str:
+    return os.path.join(load.PROCESSED_DIR, output_name + '.watermark.json')
+
+
+def _digest(path: str, start: int, end: int) -> str:
+    with open(path, 'rb') as f:
+        f.seek(start)
+        return hashlib.sha256(f.read(max(0, end - start))).hexdigest()
+
+
+def fingerprint(path: str, offset: int) -> Dict[str, str]:
+    """Hashes del inicio del archivo y de los bytes justo antes de `offset`."""
+    return {
+        'head_sha256': _digest(path, 0, min(offset, FINGERPRINT_BYTES)),
+        'tail_sha256': _digest(path, max(0, offset - FINGERPRINT_BYTES), offset),
+    }
+
+
+def load_watermark(output_name: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path_for(output_name), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def save_watermark(output_name: str, watermark: Dict[str, Any]) -> None:
+    path = path_for(output_name)
+    tmp = path + '.tmp'
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(watermark, f, ensure_ascii=False, indent=2)
+    os.replace(tmp, path)
+
+
+def reset(output_name: str) -> None:
+    """Olvida la marca: la siguiente corrida procesa la fuente completa."""
+    try:
+        os.remove(path_for(output_name))
+    except FileNotFoundError:
+        pass
+
+
+def build(source: str, output: str, column: str, df: pd.DataFrame, offset: int,
+          previous: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Marca tras procesar `source` hasta `offset` (inicio de linea) y escribir `output`.
+
+    `df` son las filas transformadas de esta corrida; sin filas nuevas se conserva el
+    ultimo valor de `previous`.
+    """
+    values = df[column].dropna() if column in df.columns else pd.Series(dtype=object)
+    last = values.max() if len(values) else None
+    if previous is not None and previous.get('last_value') is not None:
+        if last is None or pd.Timestamp(last) < pd.Timestamp(previous['last_value']):
+            last = previous['last_value']
+    rows = len(df) + (previous['rows'] if previous else 0)
+    return {
+        'source': os.path.abspath(source),
+        'column': column,
+        'offset': offset,
+        **fingerprint(source, offset),
+        'last_value': pd.Timestamp(last).isoformat() if last is not None else None,
+        'rows': rows,
+        'output_bytes': os.path.getsize(output),
+        'columns': [str(c) for c in df.columns] if previous is None else previous['columns'],
+        'dtypes': {str(c): str(t) for c, t in df.dtypes.items()} if previous is None else previous['dtypes'],
+    }
+
+
+def invalid_reason(watermark: Optional[Dict[str, Any]], source: str, output: str, column: str) -> Optional[str]:
+    """Motivo por el que la marca no sirve para una corrida incremental (None si sirve)."""
+    if watermark is None:
+        return 'no watermark'
+    if watermark.get('column') != column or watermark.get('source') != os.path.abspath(source):
+        return 'watermark belongs to another source'
+    if watermark.get('last_value') is None:
+        return 'no rows processed yet'
+    if not os.path.exists(output) or os.path.getsize(output) < watermark['output_bytes']:
+        return 'processed output is missing or shorter than recorded'
+    offset = watermark['offset']
+    if not os.path.exists(source) or os.path.getsize(source) < offset:
+        return 'source shrank'
+    if extract.last_line_end(source, offset) != offset:
+        return 'source changed before the watermark'
+    if fingerprint(source, offset) != {k: watermark.get(k) for k in ('head_sha256', 'tail_sha256')}:
+        return 'source was rewritten'
+    return None
@@ -1,12 +1,15 @@
 from pathlib import Path
 from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
 
 from app.api.v1 import datasets as datasets_router
 from app.api.v1 import etl as etl_router
 from app.api.v1 import training as training_router
+from app.api.v1 import query as query_router
+from etl import metrics
 
 
 app = FastAPI(title="Data Mining API", version="0.1.0")
@@ -22,6 +25,7 @@ app.add_middleware(
 app.include_router(datasets_router.router, prefix="/api/v1/datasets", tags=["datasets"])
 app.include_router(etl_router.router, prefix="/api/v1/etl", tags=["etl"])
 app.include_router(training_router.router, prefix="/api/v1/training", tags=["training"])
+app.include_router(query_router.router, prefix="/api/v1/query", tags=["query"])
 
 static_dir = Path(__file__).resolve().parent / "static"
 static_dir.mkdir(parents=True, exist_ok=True)
@@ -34,3 +38,8 @@ templates = Jinja2Templates(directory=str(templates_dir))
 @app.get("/", include_in_schema=False)
 def home(request: Request):
     return templates.TemplateResponse("index.html", {"request": request})
+
+
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    return PlainTextResponse(metrics.render_prometheus(), media_type="text/plain; version=0.0.4")
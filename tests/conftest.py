@@ -0,0 +1,14 @@
+import pytest
+
+from etl import extract, load
+
+
+@pytest.fixture
+def data_dir(tmp_path, monkeypatch):
+    """Un data/ vacio (con processed/) en tmp_path en lugar del del repo."""
+    data = tmp_path / 'data'
+    (data / 'processed').mkdir(parents=True)
+    monkeypatch.setattr(extract, 'BASE', str(data))
+    monkeypatch.setattr(extract, 'SCHEMA_CACHE_DIR', str(data / '.schema_cache'))
+    monkeypatch.setattr(load, 'PROCESSED_DIR', str(data / 'processed'))
+    return data
@@ -0,0 +1,30 @@
+import json
+
+import pandas as pd
+
+from benchmarks import run as bench
+from benchmarks import synthetic
+
+
+def test_synthetic_csvs_are_written_in_blocks_and_cached(tmp_path):
+    path = synthetic.write_csv('pool_swaps', 250, str(tmp_path / 'swaps.csv'), block_rows=100)
+    df = pd.read_csv(path)
+    assert len(df) == 250
+    assert df['slot'].is_monotonic_increasing
+    assert synthetic.ensure_csv('bank_prices', 50, data_dir=str(tmp_path)) == \
+        synthetic.ensure_csv('bank_prices', 50, data_dir=str(tmp_path))
+    assert synthetic.parse_scale('1m') == 1_000_000
+
+
+def test_suite_writes_json_and_flags_regressions(tmp_path):
+    out = tmp_path / 'bench.json'
+    assert bench.main(['--scales', '300', '--repeat', '1', '--only', 'transform_bank,write_processed_df[csv]',
+                       '--data-dir', str(tmp_path / 'data'), '--json', str(out)]) == 0
+    result = json.loads(out.read_text(encoding='utf-8'))
+    assert [r['case'] for r in result['results']] == ['transform_bank_prices', 'write_processed_df[csv]']
+    assert all(r['rows'] == 300 and r['best_s'] > 0 for r in result['results'])
+
+    slower = {'meta': {}, 'results': [dict(r, best_s=r['best_s'] * 2) for r in result['results']]}
+    (tmp_path / 'slower.json').write_text(json.dumps(slower), encoding='utf-8')
+    assert bench.main(['--compare', str(out), '--against', str(tmp_path / 'slower.json')]) == 1
+    assert bench.main(['--compare', str(out), '--against', str(out)]) == 0
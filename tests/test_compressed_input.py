@@ -0,0 +1,88 @@
+import gzip
+import os
+import shutil
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from etl import extract, pipeline
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, 'reports', 'sample_pool_swaps.csv.csv')
+
+
+def _compress(src, dst):
+    if dst.endswith('.gz'):
+        with open(src, 'rb') as f, gzip.open(dst, 'wb') as out:
+            shutil.copyfileobj(f, out)
+    else:
+        pa = pytest.importorskip('pyarrow')
+        with open(src, 'rb') as f, pa.output_stream(dst, compression='zstd') as out:
+            out.write(f.read())
+    return dst
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.zst'])
+@pytest.mark.parametrize('engine', ['c', 'pyarrow', 'parallel'])
+def test_chunks_of_compressed_input_match_plain(data_dir, suffix, engine):
+    if engine == 'pyarrow':
+        pytest.importorskip('pyarrow')
+    path = _compress(SAMPLE, str(data_dir / f'pool_swaps.csv{suffix}'))
+    plain = list(extract.read_csv_chunks('x', chunksize=70, engine=engine, path=SAMPLE, use_cache=False))
+    chunks = list(extract.read_csv_chunks('x', chunksize=70, engine=engine, path=path, use_cache=False))
+    assert [len(c) for c in chunks] == [len(c) for c in plain]
+    for a, b in zip(chunks, plain):
+        pd.testing.assert_frame_equal(a, b)
+    pd.testing.assert_frame_equal(extract.read_csv_path(path, engine=engine, use_cache=False),
+                                  extract.read_csv_path(SAMPLE, engine=engine, use_cache=False))
+
+
+def test_compressed_source_runs_through_its_pipeline(data_dir, monkeypatch):
+    specs = [replace(s, output='pool_swaps.processed.csv', partition_by=None, rollups=[])
+             if s.name == 'pool_swaps' else s for s in pipeline.DEFAULT_SPECS]
+    monkeypatch.setattr(pipeline, 'DEFAULT_SPECS', specs)
+    shutil.copy(SAMPLE, data_dir / 'pool_swaps.csv')
+    pipeline.run_pipeline(pipeline.get_spec('pool_swaps'))
+    expected = (data_dir / 'processed' / 'pool_swaps.processed.csv').read_bytes()
+
+    os.remove(data_dir / 'pool_swaps.csv')
+    _compress(SAMPLE, str(data_dir / 'pool_swaps.csv.zst'))
+    assert extract.list_data_files() == [str(data_dir / 'pool_swaps.csv.zst')]
+    [step] = pipeline.plan([str(data_dir / 'pool_swaps.csv.zst')])
+    assert step['spec'].name == 'pool_swaps' and step['mode'] == 'chunked'
+    monkeypatch.setattr(pipeline, 'OUTPUT_COMPRESSION', 'zstd')
+    [step] = pipeline.plan(['pool_swaps.csv.zst'])
+    assert step['spec'].output_name == 'pool_swaps.processed.csv.zst'
+    out = pipeline.run_pipeline(step['spec'], mode=step['mode'])
+    with extract.open_input(out) as f:
+        assert f.read() == expected
+
+
+@pytest.mark.parametrize('layout', ['gzip', 'partitioned'])
+def test_full_run_reports_bytes_of_the_committed_output(data_dir, layout):
+    pytest.importorskip('pyarrow')
+    spec = pipeline.get_spec('pool_swaps')
+    if layout == 'gzip':
+        spec = replace(spec, output='pool_swaps.processed.csv', partition_by=None, rollups=[], compression='gzip')
+    else:
+        spec = replace(spec, rollups=[])
+    shutil.copy(SAMPLE, data_dir / 'pool_swaps.csv')
+    finished = {}
+    out = pipeline.run_pipeline(spec, mode='full', progress_callback=lambda rid, stage, info: finished.update(info))
+    size = (sum(os.path.getsize(os.path.join(r, f)) for r, _, files in os.walk(out) for f in files)
+            if os.path.isdir(out) else os.path.getsize(out))
+    assert finished['metrics']['load.write_processed_df']['bytes_written'] == size > 0
+
+
+def test_upload_is_stored_once_and_linked(tmp_path):
+    from api.app import _store_upload
+
+    body = gzip.compress(b'a,b\n1,2\n')
+    src = tmp_path / 'in.csv.gz'
+    src.write_bytes(body)
+    upload, data = tmp_path / 'upload.csv.gz', tmp_path / 'data.csv.gz'
+    with open(src, 'rb') as f:
+        _store_upload(f, str(upload), str(data))
+    assert upload.read_bytes() == body and data.read_bytes() == body
+    assert os.stat(upload).st_ino == os.stat(data).st_ino
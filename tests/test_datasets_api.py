@@ -0,0 +1,50 @@
+import time
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from app.api.v1 import datasets as datasets_api
+from app.services import datasets as datasets_service
+
+
+def _app():
+    app = FastAPI()
+    app.include_router(datasets_api.router, prefix="/api/v1/datasets")
+    return app
+
+
+def test_preview_not_blocked_by_slow_upload(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets_service, "DATASETS_DIR", tmp_path)
+    monkeypatch.setattr(datasets_service, "INDEX_PATH", tmp_path / "index.json")
+    small = datasets_service.register_dataset_from_bytes("small.csv", b"a,b\n1,2\n", source="upload")
+
+    real_register = datasets_service.register_dataset_from_bytes
+
+    def slow_register(*args, **kwargs):
+        time.sleep(1.0)  # simula leer un CSV grande
+        return real_register(*args, **kwargs)
+
+    monkeypatch.setattr(datasets_service, "register_dataset_from_bytes", slow_register)
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=_app())
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            start = time.perf_counter()
+            upload = asyncio.create_task(client.post(
+                "/api/v1/datasets/upload-file", files={"file": ("big.csv", b"a,b\n5,6\n", "text/csv")}))
+            await asyncio.sleep(0.05)
+            preview = await client.get(f"/api/v1/datasets/{small['dataset_id']}/preview")
+            preview_s = time.perf_counter() - start
+            uploaded = await upload
+            return preview, preview_s, uploaded, time.perf_counter() - start
+
+    preview, preview_s, uploaded, total_s = asyncio.run(scenario())
+    assert preview.status_code == 200
+    assert preview.json()["columns"] == ["a", "b"]
+    assert uploaded.status_code == 200
+    # la preview responde mientras la subida sigue en el pool de ingesta
+    assert preview_s < 0.5
+    assert total_s >= 1.0
+    index = datasets_service._load_index()
+    assert set(index) == {small["dataset_id"], uploaded.json()["dataset_id"]}
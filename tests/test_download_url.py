@@ -0,0 +1,75 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from app.services import datasets as datasets_service
+
+CSV = b"a,b\n" + b"".join(b"%d,%d\n" % (i, i * 2) for i in range(20000))
+
+
+class _Handler(BaseHTTPRequestHandler):
+    """Servidor de prueba: soporta Range y puede cortar la primera respuesta a mitad."""
+    drop_after = None
+    requests_seen = []
+
+    def do_GET(self):
+        rng = self.headers.get("Range")
+        type(self).requests_seen.append(rng)
+        start = int(rng.split("=")[1].split("-")[0]) if rng else 0
+        body = CSV[start:]
+        self.send_response(206 if rng else 200)
+        self.send_header("Content-Type", "text/csv")
+        self.send_header("Content-Length", str(len(body)))
+        if rng:
+            self.send_header("Content-Range", f"bytes {start}-{len(CSV) - 1}/{len(CSV)}")
+        self.end_headers()
+        if self.drop_after is not None and not rng:
+            self.wfile.write(body[:self.drop_after])
+            self.wfile.flush()
+            self.close_connection = True
+            return
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets_service, "DATASETS_DIR", tmp_path)
+    monkeypatch.setattr(datasets_service, "INDEX_PATH", tmp_path / "index.json")
+    _Handler.drop_after = None
+    _Handler.requests_seen = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}/data.csv"
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def test_download_streams_to_disk(server):
+    seen = []
+    entry = datasets_service.download_from_url(server, chunk_bytes=4096,
+                                               progress_callback=lambda done, total: seen.append((done, total)))
+    assert entry["filename"] == "data.csv"
+    assert entry["rows"] == 20000
+    assert open(entry["path"], "rb").read() == CSV
+    assert entry["download"]["bytes"] == len(CSV)
+    assert entry["download"]["resumes"] == 0
+    assert len(seen) > 1 and seen[-1] == (len(CSV), len(CSV))
+
+
+def test_download_resumes_with_range(server):
+    _Handler.drop_after = 12 * 4096
+    entry = datasets_service.download_from_url(server, chunk_bytes=4096)
+    assert open(entry["path"], "rb").read() == CSV
+    assert entry["download"]["resumes"] == 1
+    assert _Handler.requests_seen == [None, "bytes=49152-"]
+
+
+def test_download_size_cap(server, tmp_path):
+    with pytest.raises(datasets_service.DatasetError, match="download limit"):
+        datasets_service.download_from_url(server, max_bytes=1000)
+    assert list(tmp_path.iterdir()) == []
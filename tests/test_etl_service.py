@@ -0,0 +1,79 @@
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import datasets as datasets_service
+from app.services import etl as etl_service
+from etl import extract
+from etl.metrics import RSSSampler
+
+
+def _frame():
+    return pd.DataFrame({
+        "x": [1.0, np.nan, 3.0, 4.0],
+        "n": [1, 2, 3, 4],
+        "cat": ["a", None, "b", "c"],
+        "y": [1.0, 0.0, np.nan, 1.0],
+    })
+
+
+def test_run_etl_does_not_modify_input():
+    df = _frame()
+    before = df.copy()
+    out = etl_service.run_etl(df, {"target_col": "y", "missing_strategy": "mean", "normalize_numeric": True})
+    pd.testing.assert_frame_equal(df, before)
+    # y numerico: se imputa con su media y no se descarta ninguna fila
+    assert len(out["df"]) == 4
+    assert out["df"]["x"].notna().all()
+    assert out["df"]["cat"].tolist() == ["a", "", "b", "c"]
+    assert out["normalization"]["n"] == {"mean": 2.5, "std": pytest.approx(np.std([1, 2, 3, 4], ddof=1))}
+
+
+def test_handle_missing_fills_with_stats_from_all_rows():
+    df = _frame().assign(y=["p", "q", None, "p"])
+    out = etl_service.handle_missing(df, "mean", "y")
+    # la media de x incluye la fila descartada por el target
+    assert out["x"].tolist() == [1.0, pytest.approx(8 / 3), 4.0]
+    assert out["cat"].tolist() == ["a", "", "c"]
+
+
+def test_run_etl_and_store_records_memory(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets_service, "DATASETS_DIR", tmp_path)
+    monkeypatch.setattr(datasets_service, "INDEX_PATH", tmp_path / "index.json")
+    monkeypatch.setattr(etl_service, "ETL_CONFIGS_DIR", tmp_path)
+    monkeypatch.setattr(etl_service, "ETL_OUTPUTS_DIR", tmp_path)
+    monkeypatch.setattr(etl_service, "ETL_RUNS_DIR", tmp_path)
+    monkeypatch.setattr(extract, "SCHEMA_CACHE_DIR", str(tmp_path / "schemas"))
+    entry = datasets_service.register_dataset_from_bytes("d.csv", _frame().to_csv(index=False).encode(), "upload")
+    config_id = etl_service.save_config({"dataset_id": entry["dataset_id"], "target_col": "y",
+                                         "missing_strategy": "drop", "normalize_numeric": True})
+
+    meta = etl_service.run_etl_and_store(config_id, mode="in_memory")
+    steps = meta["metrics"]
+    assert {"load_dataset", "prepare", "handle_missing", "normalize", "run_etl", "write_csv"} <= set(steps)
+    assert all("peak_rss_step_bytes" in s for s in steps.values())
+    assert meta["memory"]["dataset_bytes"] > 0
+    with open(tmp_path / f"{meta['etl_run_id']}.json", encoding="utf-8") as f:
+        assert json.load(f)["metrics"]["run_etl"]["calls"] == 1
+
+    meta = etl_service.run_etl_and_store(config_id, mode="streaming")
+    assert {"stats_pass", "write_pass"} <= set(meta["metrics"])
+    assert meta["rows"] == 3
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="RSS is read from /proc")
+def test_rss_sampler_sees_transient_allocation():
+    threshold = 32 * 1024 * 1024
+    with RSSSampler(interval=0.001) as sampler:
+        block = np.ones(64 * 1024 * 1024 // 8)
+        # hold the block until the sampler thread has seen it
+        deadline = time.monotonic() + 5
+        while sampler.peak_bytes - sampler.start_bytes < threshold and time.monotonic() < deadline:
+            time.sleep(0.001)
+        del block
+    assert sampler.step_bytes is not None
+    assert sampler.step_bytes >= threshold
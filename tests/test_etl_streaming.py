@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.services import etl as etl_service
+from app.services.stats import RunningStats
+from etl import extract
+
+
+@pytest.fixture
+def dataset(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract, "SCHEMA_CACHE_DIR", str(tmp_path / "schemas"))
+    rng = np.random.default_rng(1)
+    n = 5000
+    df = pd.DataFrame({
+        "age": rng.integers(20, 90, size=n).astype(float),
+        "visits": rng.poisson(2.0, size=n),
+        "code": np.array(["a", "b", "c"])[rng.integers(0, 3, size=n)],
+        "score": np.round(rng.normal(10, 3, size=n), 3),
+        "noise": rng.normal(size=n),
+        "target": rng.integers(0, 2, size=n).astype(float),
+    })
+    df.loc[rng.random(n) < 0.05, "age"] = np.nan
+    df.loc[rng.random(n) < 0.05, "code"] = np.nan
+    df.loc[rng.random(n) < 0.03, "target"] = np.nan
+    path = tmp_path / "data.csv"
+    df.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize("strategy", ["drop", "mean", "median", "zero"])
+def test_streaming_matches_in_memory(dataset, tmp_path, strategy):
+    config = {"target_col": "target", "drop_cols": ["noise"], "missing_strategy": strategy,
+              "normalize_numeric": True}
+    expected = etl_service.run_etl(pd.read_csv(dataset), config)
+
+    out = tmp_path / "out.csv"
+    result = etl_service.run_etl_streaming(dataset, config, out, chunksize=700)
+    assert result["chunks"] == 8
+    got = pd.read_csv(out, keep_default_na=False, na_values=[""] if strategy == "drop" else [])
+
+    assert result["feature_cols"] == expected["feature_cols"]
+    assert result["rows"] == len(expected["df"])
+    for col, st in expected["normalization"].items():
+        assert result["normalization"][col]["mean"] == pytest.approx(st["mean"], abs=1e-9)
+        assert result["normalization"][col]["std"] == pytest.approx(st["std"], rel=1e-9)
+    exp_df = expected["df"].reset_index(drop=True)
+    pd.testing.assert_frame_equal(got, exp_df, check_dtype=False, rtol=1e-6)
+
+
+def test_running_stats_merge_matches_numpy():
+    rng = np.random.default_rng(0)
+    values = rng.normal(5, 2, size=10_000)
+    parts = [RunningStats(sample_size=20_000).update(chunk) for chunk in np.array_split(values, 7)]
+    stats = parts[0]
+    for p in parts[1:]:
+        stats.merge(p)
+    assert stats.count == values.size
+    assert stats.mean == pytest.approx(values.mean())
+    assert stats.std() == pytest.approx(values.std(ddof=1))
+    assert stats.exact_median and stats.median() == pytest.approx(np.median(values))
+
+    approx = RunningStats(sample_size=2000).update(values)
+    assert abs(approx.median() - np.median(values)) < 0.2
@@ -0,0 +1,126 @@
+import os
+
+import pandas as pd
+import pytest
+
+from etl import extract
+
+
+def _write(path, text):
+    path.write_bytes(text.encode('utf-8'))
+    return str(path)
+
+
+def test_split_ranges_respects_quoted_newlines(tmp_path):
+    rows = ''.join(f'{i},"line one\nline ""two"", {i}",{i * 0.5}\n' for i in range(200))
+    path = _write(tmp_path / 'quoted.csv', 'id,text,value\n' + rows)
+    header_end, ranges = extract.split_ranges(path, range_bytes=100)
+    assert header_end == len('id,text,value\n')
+    assert ranges[0][0] == header_end and ranges[-1][1] == len(open(path, 'rb').read())
+    assert all(a[1] == b[0] for a, b in zip(ranges, ranges[1:]))
+    expected = pd.read_csv(path)
+    parsed = pd.concat(list(extract.read_csv_ranges(path, workers=1, range_bytes=100)), ignore_index=True)
+    pd.testing.assert_frame_equal(parsed, expected)
+
+
+@pytest.mark.parametrize('skip_rows', [0, 130])
+def test_parallel_chunks_match_sequential_reader(tmp_path, monkeypatch, skip_rows):
+    monkeypatch.setattr(extract, 'SCHEMA_CACHE_DIR', str(tmp_path / '.schema_cache'))
+    monkeypatch.setattr(extract, 'CSV_RANGE_BYTES', 1024)
+    body = ''.join(f'{i},pool{i % 7},{i * 1.1},2025-09-{1 + i % 28:02d}\n' for i in range(500))
+    path = _write(tmp_path / 'swaps.csv', 'id,pool,amount,date\n' + body[:-1])  # sin salto final
+    sequential = list(extract.read_csv_chunks('swaps.csv', chunksize=120, engine='c', path=path,
+                                              skip_rows=skip_rows, use_cache=False))
+    parallel = list(extract.read_csv_chunks('swaps.csv', chunksize=120, engine='parallel', path=path,
+                                            skip_rows=skip_rows, use_cache=False))
+    assert [len(c) for c in parallel] == [len(c) for c in sequential]
+    for a, b in zip(parallel, sequential):
+        pd.testing.assert_frame_equal(a, b)
+    assert extract.read_stats[str(tmp_path / 'swaps.csv')]['engine'] == 'parallel'
+
+
+def test_parallel_ranges_in_worker_processes(tmp_path):
+    body = ''.join(f'{i},"a,b",{i}\n' for i in range(3000))
+    path = _write(tmp_path / 'big.csv', 'id,text,n\n' + body)
+    frames = list(extract.read_csv_ranges(path, workers=2, range_bytes=4096))
+    assert len(frames) > 2
+    parsed = pd.concat(frames, ignore_index=True)
+    pd.testing.assert_frame_equal(parsed, pd.read_csv(path))
+
+
+def test_types_decided_once_for_every_range(tmp_path):
+    # codes look numeric only after the first range: they must stay text, not become mixed
+    body = ''.join(f'{i},{"c" + str(i) if i < 50 else str(i)}\n' for i in range(400))
+    path = _write(tmp_path / 'codes.csv', 'id,code\n' + body)
+    frames = list(extract.read_csv_ranges(path, workers=1, range_bytes=512))
+    assert len(frames) > 2
+    parsed = pd.concat(frames, ignore_index=True)
+    assert pd.api.types.is_string_dtype(parsed['code'])
+    assert parsed['code'].tolist()[49:51] == ['c49', '50']
+    assert parsed['id'].dtype == 'int64'
+
+
+def test_resume_skips_rows_without_parsing_them(tmp_path, monkeypatch):
+    body = ''.join(f'{i},pool{i % 7},{i * 1.1}\n' for i in range(500))
+    path = _write(tmp_path / 'swaps.csv', 'id,pool,amount\n' + body)
+    parsed_from = []
+    parse = extract._parse_range
+
+    def spy(path, start, end, *args):
+        parsed_from.append(start)
+        return parse(path, start, end, *args)
+
+    monkeypatch.setattr(extract, '_parse_range', spy)
+    frames = list(extract.read_csv_ranges(path, workers=1, range_bytes=1024, skip_rows=130))
+    # the first parsed range starts right at row 130
+    assert min(parsed_from) == len('id,pool,amount\n') + sum(len(line) + 1 for line in body.split('\n')[:130])
+    parsed = pd.concat(frames, ignore_index=True)
+    pd.testing.assert_frame_equal(parsed, pd.read_csv(path).iloc[130:].reset_index(drop=True))
+
+
+def test_schema_cache_is_per_file_version_and_read_stats_are_capped(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract, 'SCHEMA_CACHE_DIR', str(tmp_path / '.schema_cache'))
+    monkeypatch.setattr(extract, 'READ_STATS_MAX', 2)
+    monkeypatch.setattr(extract, 'read_stats', {})
+    (tmp_path / 'a').mkdir()
+    (tmp_path / 'b').mkdir()
+    a = _write(tmp_path / 'a' / 'x.csv', 'v\n1\n2\n')
+    b = _write(tmp_path / 'b' / 'x.csv', 'v\n1.5\n2\n')
+    extract.remember_dtypes(a, ['v'], {'v': 'int64'})
+    assert extract.cached_dtypes(a) == {'v': 'int64'}
+    # same name in another directory: not the same file
+    assert extract.cached_dtypes(b) == {}
+    # rewritten in place with the same header: the cached types no longer apply
+    _write(tmp_path / 'a' / 'x.csv', 'v\n1.5\n2.5\n')
+    assert extract.cached_dtypes(a) == {}
+
+    for name in ('p.csv', 'q.csv', 'r.csv'):
+        list(extract.read_csv_chunks(name, path=_write(tmp_path / name, 'v\n1\n'), engine='c', use_cache=False))
+    assert list(extract.read_stats) == [str(tmp_path / 'q.csv'), str(tmp_path / 'r.csv')]
+
+
+@pytest.mark.parametrize('workers', [1, 2])
+def test_input_replaced_mid_read_fails_instead_of_mixing_versions(tmp_path, workers):
+    body = ''.join(f'{i},{i * 0.5}\n' for i in range(400))
+    path = _write(tmp_path / 'upload.csv', 'id,value\n' + body)
+    ranges = extract.read_csv_ranges(path, workers=workers, range_bytes=256)
+    next(ranges)
+    # a new upload with the same name (api.app._store_upload replaces data/<name>)
+    _write(tmp_path / 'new.csv', 'id,value\n' + body.replace(',', ',9'))
+    os.replace(tmp_path / 'new.csv', path)
+    with pytest.raises(extract.InputChanged):
+        list(ranges)
+
+
+def test_parallel_chunks_do_not_fall_back_when_the_input_changes(tmp_path, monkeypatch):
+    monkeypatch.setattr(extract, 'CSV_RANGE_BYTES', 256)
+    monkeypatch.setattr(extract, 'CSV_WORKERS', 1)
+    body = ''.join(f'{i},{i * 0.5}\n' for i in range(400))
+    path = _write(tmp_path / 'upload.csv', 'id,value\n' + body)
+    chunks = extract.read_csv_chunks('upload.csv', chunksize=20, engine='parallel', path=path, use_cache=False)
+    next(chunks)
+    _write(tmp_path / 'new.csv', 'id,value\n' + body[len(body) // 2:])
+    os.replace(tmp_path / 'new.csv', path)
+    # the C parser would carry on with the new file from the current row
+    with pytest.raises(extract.InputChanged):
+        list(chunks)
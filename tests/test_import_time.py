@@ -0,0 +1,42 @@
+"""Presupuesto de arranque: importar las apps no debe cargar dependencias pesadas."""
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY = ('sklearn', 'matplotlib', 'seaborn')
+# microsegundos acumulados segun -X importtime; holgados para maquinas de CI lentas
+BUDGET_US = {
+    'main': int(os.environ.get('IMPORT_BUDGET_MAIN_MS', '1500')) * 1000,
+    'api.app': int(os.environ.get('IMPORT_BUDGET_API_MS', '1000')) * 1000,
+}
+
+
+def _import_profile(module):
+    proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'], cwd=ROOT,
+                          capture_output=True, text=True, timeout=120)
+    assert proc.returncode == 0, proc.stderr
+    cumulative = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cum, name = line[len('import time:'):].split('|')
+        cumulative[name.strip()] = int(cum)
+    return cumulative
+
+
+@pytest.mark.parametrize('module', sorted(BUDGET_US))
+def test_app_import_stays_within_budget(module):
+    cumulative = _import_profile(module)
+    loaded_heavy = [m for m in cumulative if m.split('.')[0] in HEAVY]
+    assert not loaded_heavy, f'{module} imports {loaded_heavy[:5]} at startup'
+    assert cumulative[module] <= BUDGET_US[module], \
+        f'import {module} took {cumulative[module] / 1000:.0f}ms (budget {BUDGET_US[module] / 1000:.0f}ms)'
+
+
+def test_importing_etl_does_not_configure_logging():
+    code = 'import logging, etl.run_etl, api.app; print(len(logging.getLogger().handlers))'
+    out = subprocess.run([sys.executable, '-c', code], cwd=ROOT, capture_output=True, text=True, timeout=120)
+    assert out.stdout.strip() == '0', out.stderr
@@ -0,0 +1,79 @@
+import gzip
+
+import pandas as pd
+import pytest
+
+from etl import load
+
+
+@pytest.fixture
+def processed_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(load, 'PROCESSED_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _chunks():
+    return [pd.DataFrame({'a': [1, 2], 'b': ['x', 'y']}), pd.DataFrame({'a': [3], 'b': ['z']})]
+
+
+def test_processed_writer_matches_write_processed_df(processed_dir):
+    first, second = _chunks()
+    load.write_processed_df(first, 'ref.csv')
+    load.write_processed_df(second, 'ref.csv', mode='a')
+
+    with load.ProcessedWriter('out.csv') as writer:
+        writer.write(first)
+        writer.write(second)
+        assert not (processed_dir / 'out.csv').exists()
+    assert (processed_dir / 'out.csv').read_bytes() == (processed_dir / 'ref.csv').read_bytes()
+    assert not (processed_dir / 'out.csv.part').exists()
+
+
+def test_processed_writer_resume_truncates_partial_chunk(processed_dir):
+    first, second = _chunks()
+    with pytest.raises(RuntimeError):
+        with load.ProcessedWriter('out.csv') as writer:
+            writer.write(first)
+            committed = writer.flush()
+            writer.write(second)
+            raise RuntimeError('crash')
+    with load.ProcessedWriter('out.csv', resume_bytes=committed) as writer:
+        writer.write(second)
+    assert pd.read_csv(processed_dir / 'out.csv')['a'].tolist() == [1, 2, 3]
+
+
+def test_processed_writer_gzip_and_parquet_row_groups(processed_dir):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with load.ProcessedWriter('out.csv.gz') as writer:
+        for chunk in _chunks():
+            writer.write(chunk)
+    with gzip.open(processed_dir / 'out.csv.gz', 'rt', encoding='utf-8') as f:
+        assert pd.read_csv(f)['b'].tolist() == ['x', 'y', 'z']
+
+    with load.ProcessedWriter('out.parquet') as writer:
+        for chunk in _chunks():
+            writer.write(chunk)
+    assert pq.ParquetFile(processed_dir / 'out.parquet').num_row_groups == 2
+
+
+def test_processed_writer_zstd(processed_dir):
+    pa = pytest.importorskip('pyarrow')
+    with load.ProcessedWriter('out.csv.zst') as writer:
+        for chunk in _chunks():
+            writer.write(chunk)
+            assert writer.flush() > 0
+    with pa.input_stream(str(processed_dir / 'out.csv.zst'), compression='zstd') as f:
+        assert pd.read_csv(f)['b'].tolist() == ['x', 'y', 'z']
+
+
+def test_processed_writer_parquet_widens_later_chunks(processed_dir):
+    pq = pytest.importorskip('pyarrow.parquet')
+    with load.ProcessedWriter('out.parquet') as writer:
+        writer.write(pd.DataFrame({'a': [1, 2], 'b': [None, None]}))
+        writer.write(pd.DataFrame({'a': [3.5], 'b': ['z']}))
+        writer.write(pd.DataFrame({'a': [4], 'b': ['w']}))
+    out = pd.read_parquet(processed_dir / 'out.parquet')
+    assert out['a'].tolist() == [1.0, 2.0, 3.5, 4.0]
+    assert out['b'].tolist()[2:] == ['z', 'w'] and out['b'].isna().sum() == 2
+    assert pq.ParquetFile(processed_dir / 'out.parquet').num_row_groups == 3
+    assert not (processed_dir / 'out.parquet.part.old').exists()
@@ -0,0 +1,18 @@
+import pandas as pd
+import pytest
+
+from app.services import models
+
+
+@pytest.mark.parametrize('dtype', ['object', 'str', 'category'])
+def test_prepare_target_maps_yes_no_text(dtype):
+    df = pd.DataFrame({'readmitted': pd.Series(['Yes', ' no', None, 'yes'], dtype=dtype)})
+    y, mask = models._prepare_target(df, 'readmitted')
+    assert mask.tolist() == [True, True, False, True]
+    assert y.tolist() == [1, 0, 1]
+
+
+def test_prepare_target_rejects_other_text():
+    df = pd.DataFrame({'city': pd.Series(['a', 'b'], dtype='str')})
+    with pytest.raises(models.TrainingError):
+        models._prepare_target(df, 'city')
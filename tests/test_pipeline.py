@@ -0,0 +1,83 @@
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from etl import pipeline, profiling, run_etl
+
+
+def test_plan_picks_pipeline_by_name_and_reader_by_size(data_dir, monkeypatch):
+    (data_dir / 'pool_swaps.csv').write_text('slot,block_time\n1,1758310389\n', encoding='utf-8')
+    (data_dir / 'My Upload-2024.csv').write_text('a,b\n1,2\n' * 50, encoding='utf-8')
+    monkeypatch.setattr(pipeline, 'CHUNKED_THRESHOLD_BYTES', 100)
+
+    steps = pipeline.plan(['pool_swaps.csv', 'My Upload-2024.csv'])
+    by_name = {s['spec'].name: s for s in steps}
+    assert by_name['pool_swaps']['spec'].transforms == ['pool_swaps']
+    upload = by_name['my_upload_2024']
+    assert upload['spec'].transforms == ['generic']
+    assert upload['spec'].output_name == 'My Upload-2024.processed.csv'
+    # largest input first; the upload is over the threshold so it is streamed
+    assert steps[0] is upload and upload['mode'] == 'chunked'
+
+
+def test_run_all_processes_any_uploaded_file(data_dir):
+    (data_dir / 'fx_rates.csv').write_text(
+        'date,pair,rate\n2024-01-02,EURUSD,"1,094.5"\n2024-01-03,EURUSD,1.0921\n', encoding='utf-8')
+    run_etl.run_all(files=['fx_rates.csv'])
+    out = pd.read_csv(data_dir / 'processed' / 'fx_rates.processed.csv')
+    assert out['rate'].tolist() == [1094.5, 1.0921]
+    assert out['pair'].tolist() == ['EURUSD', 'EURUSD']
+
+
+def test_specs_from_config_file_and_output_conflicts(data_dir, tmp_path):
+    config = tmp_path / 'pipelines.json'
+    config.write_text(json.dumps([{'name': 'fx', 'source': 'fx_rates.csv', 'transforms': ['generic'],
+                                   'output': 'fx.processed.csv', 'match': ['fx_*.csv']}]), encoding='utf-8')
+    specs = pipeline.load_specs(str(config))
+    assert pipeline.spec_for_file('fx_2025.csv', specs).name == 'fx'
+    with pytest.raises(ValueError):
+        pipeline.plan(['fx_rates.csv', 'fx_2025.csv'], specs)
+    config.write_text(json.dumps([{'name': 'x', 'source': 'x.csv', 'transforms': ['nope']}]), encoding='utf-8')
+    with pytest.raises(ValueError):
+        pipeline.load_specs(str(config))
+
+
+def test_run_all_in_processes_reports_failures_per_stage(data_dir):
+    for name in ('a.csv', 'b.csv'):
+        (data_dir / name).write_text('x,y\n1,"2,000"\n3,4\n', encoding='utf-8')
+    events = []
+
+    def cb(run_id, stage, info):
+        events.append((stage, info['status']))
+
+    profiler = profiling.SamplingProfiler(interval=0.0005)
+    with pytest.raises(run_etl.PipelineFailed) as exc:
+        run_etl.run_all(progress_callback=cb, run_id='r1', files=['a.csv', 'b.csv', 'missing.csv'],
+                        max_workers=3, executor='process', profiler=profiler)
+    assert set(exc.value.failures) == {'missing'}
+    assert 'FileNotFoundError' in exc.value.failures['missing']['error']
+    for stage in ('a', 'b'):
+        assert (stage, 'finished') in events
+        out = pd.read_csv(data_dir / 'processed' / f'{stage}.processed.csv')
+        assert out['y'].tolist() == [2000, 4]
+    assert ('missing', 'failed') in events
+    # the stages are sampled in their worker processes and merged under their name
+    roots = {stack.split(';', 1)[0] for stack in profiler.stacks}
+    assert {'pipeline:a', 'pipeline:b'} <= roots
+    assert any('run_pipeline' in stack for stack in profiler.stacks)
+
+
+def test_small_runs_skip_the_process_pool(data_dir, monkeypatch):
+    for name in ('a.csv', 'b.csv'):
+        (data_dir / name).write_text('x,y\n1,2\n', encoding='utf-8')
+    used = []
+    for kind in ('threads', 'processes'):
+        real = getattr(pipeline, f'_execute_{kind}')
+        monkeypatch.setattr(pipeline, f'_execute_{kind}',
+                            lambda *a, _kind=kind, _real=real, **k: used.append(_kind) or _real(*a, **k))
+    run_etl.run_all(files=['a.csv', 'b.csv'], max_workers=2)
+    monkeypatch.setattr(pipeline, 'PROCESS_EXECUTOR_MIN_BYTES', 1)
+    run_etl.run_all(files=['a.csv', 'b.csv'], max_workers=2)
+    assert used == ['threads', 'processes']
@@ -0,0 +1,97 @@
+import json
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.api.v1 import query as query_api
+from app.services import query as query_service
+from etl import load
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(query_service, "PROCESSED_DIR", tmp_path)
+    monkeypatch.setattr(load, "PROCESSED_DIR", str(tmp_path))
+    n = 3000
+    rng = np.random.default_rng(0)
+    swaps = pd.DataFrame({
+        "date": pd.Timestamp("2025-09-01") + pd.to_timedelta(np.arange(n) * 600, unit="s"),
+        "pool_address": [f"pool{i % 3}" for i in range(n)],
+        "volume_usd": np.round(rng.uniform(0, 100, size=n), 2),
+    })
+    with load.PartitionedParquetWriter("swaps.parquet") as writer:
+        writer.write(swaps)
+    swaps.to_csv(tmp_path / "swaps.processed.csv", index=False)
+    with load.ProcessedWriter("swaps.processed.csv.zst") as writer:
+        for start in range(0, n, 1000):
+            writer.write(swaps.iloc[start:start + 1000])
+            writer.flush()
+    (tmp_path / "junk.csv.part").write_text("a\n1\n")
+    app = FastAPI()
+    app.include_router(query_api.router, prefix="/api/v1/query")
+    return TestClient(app), swaps
+
+
+def _rows(resp):
+    assert resp.status_code == 200, resp.text
+    assert resp.headers["content-type"].startswith("application/x-ndjson")
+    return [json.loads(line) for line in resp.text.splitlines()]
+
+
+@pytest.mark.parametrize("source", ["swaps.parquet", "swaps.processed.csv", "swaps.processed.csv.zst"])
+def test_group_by_aggregate_with_date_range(client, source):
+    client, swaps = client
+    body = {"source": source, "start": "2025-09-05", "end": "2025-09-08",
+            "filters": [{"column": "volume_usd", "op": ">", "value": 10}],
+            "group_by": ["pool_address"],
+            "aggregates": [{"func": "sum", "column": "volume_usd", "alias": "volume"},
+                           {"func": "count_all", "alias": "swaps"}],
+            "order_by": [{"column": "pool_address"}]}
+    rows = _rows(client.post("/api/v1/query", json=body))
+    sel = swaps[(swaps.date >= "2025-09-05") & (swaps.date < "2025-09-08") & (swaps.volume_usd > 10)]
+    expected = sel.groupby("pool_address")["volume_usd"].agg(["sum", "size"]).reset_index()
+    assert [r["pool_address"] for r in rows] == expected["pool_address"].tolist()
+    assert [r["swaps"] for r in rows] == expected["size"].tolist()
+    np.testing.assert_allclose([r["volume"] for r in rows], expected["sum"])
+
+
+def test_projection_filters_and_limit(client):
+    client, swaps = client
+    body = {"source": "swaps.parquet", "columns": ["date", "volume_usd"],
+            "filters": [{"column": "pool_address", "op": "in", "value": ["pool1"]}],
+            "order_by": [{"column": "volume_usd", "descending": True}], "limit": 5}
+    rows = _rows(client.post("/api/v1/query", json=body))
+    assert len(rows) == 5 and set(rows[0]) == {"date", "volume_usd"}
+    top = swaps[swaps.pool_address == "pool1"].nlargest(5, "volume_usd")
+    assert [r["volume_usd"] for r in rows] == top["volume_usd"].tolist()
+
+
+def test_sources_and_errors(client):
+    client, _ = client
+    sources = {s["name"]: s for s in client.get("/api/v1/query/sources").json()}
+    assert set(sources) == {"swaps.parquet", "swaps.processed.csv", "swaps.processed.csv.zst"}
+    assert sources["swaps.processed.csv.zst"]["columns"] == ["date", "pool_address", "volume_usd"]
+    assert sources["swaps.parquet"]["partitioned"] is True
+
+    assert client.post("/api/v1/query", json={"source": "../etc/passwd"}).status_code == 400
+    assert client.post("/api/v1/query", json={"source": "missing.csv"}).status_code == 404
+    bad = {"source": "swaps.parquet", "group_by": ["nope"], "aggregates": [{"func": "count_all"}]}
+    resp = client.post("/api/v1/query", json=bad)
+    assert resp.status_code == 400 and "nope" in resp.json()["detail"]
+
+
+def test_truncation_marker_and_arrow_errors(client, monkeypatch):
+    client, _ = client
+    monkeypatch.setattr(query_service, "QUERY_MAX_ROWS", 10)
+    rows = _rows(client.post("/api/v1/query", json={"source": "swaps.parquet"}))
+    assert len(rows) == 11 and rows[-1] == {"_truncated": True, "max_rows": 10}
+    # un limit propio por debajo del tope no es un corte
+    rows = _rows(client.post("/api/v1/query", json={"source": "swaps.parquet", "limit": 10}))
+    assert len(rows) == 10 and "_truncated" not in rows[-1]
+
+    (query_service.PROCESSED_DIR / "broken.csv").write_text("a,b\n1,2,3\n")
+    resp = client.post("/api/v1/query", json={"source": "broken.csv"})
+    assert resp.status_code == 400 and "broken.csv" in resp.json()["detail"]
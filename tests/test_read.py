@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import load, read
+
+
+@pytest.fixture
+def swaps(tmp_path, monkeypatch):
+    monkeypatch.setattr(load, 'PROCESSED_DIR', str(tmp_path))
+    n = 6000
+    rng = np.random.default_rng(0)
+    # 90 dias ordenados por tiempo, como llegan los chunks de pool_swaps
+    dates = pd.Timestamp('2025-06-01') + pd.to_timedelta(np.sort(rng.uniform(0, 90 * 86400, size=n)), unit='s')
+    return pd.DataFrame({
+        'date': dates.floor('s'),
+        'pool_address': [f'pool{i % 7}' for i in range(n)],
+        'volume_usd': rng.lognormal(3, 1, size=n),
+        'slot': np.arange(n),
+    })
+
+
+def _write(df, name, granularity, row_group_size=100, chunk_rows=1000):
+    with load.PartitionedParquetWriter(name, granularity=granularity, row_group_size=row_group_size) as writer:
+        for start in range(0, len(df), chunk_rows):
+            writer.write(df.iloc[start:start + chunk_rows])
+    return writer.path
+
+
+def test_daily_partitions_prune_and_project(swaps):
+    path = _write(swaps, 'swaps.parquet', 'day')
+    out = read.read_partitioned('swaps.parquet', start='2025-07-01', end='2025-07-08',
+                                columns=['date', 'volume_usd'])
+    expected = swaps[(swaps['date'] >= '2025-07-01') & (swaps['date'] < '2025-07-08')]
+    assert list(out.columns) == ['date', 'volume_usd']
+    np.testing.assert_allclose(out['volume_usd'].to_numpy(), expected['volume_usd'].to_numpy())
+
+    info = read.explain(path, start='2025-07-01', end='2025-07-08')
+    assert info['partitions_total'] == 90
+    assert info['partitions_selected'] == 8  # 7 dias + el del limite end (exclusivo)
+
+
+def test_monthly_partitions_prune_row_groups(swaps):
+    _write(swaps, 'swaps_m.parquet', 'month')
+    info = read.explain('swaps_m.parquet', start='2025-07-10', end='2025-07-12')
+    assert info['partitions_selected'] == 1 < info['partitions_total']
+    # las estadisticas min/max de date descartan casi todos los row groups del mes
+    assert info['row_groups_selected'] < info['row_groups_total'] / 5
+
+    import pyarrow.dataset as ds
+    out = read.read_partitioned('swaps_m.parquet', start='2025-07-10', end='2025-07-12',
+                                filter=ds.field('pool_address') == 'pool3')
+    expected = swaps[(swaps['date'] >= '2025-07-10') & (swaps['date'] < '2025-07-12')
+                     & (swaps['pool_address'] == 'pool3')]
+    assert out['slot'].tolist() == expected['slot'].tolist()
+    assert set(out['month']) == {'2025-07'}
+
+
+def test_commit_replaces_previous_output(swaps):
+    _write(swaps, 'swaps.parquet', 'day')
+    _write(swaps.iloc[:10], 'swaps.parquet', 'day')
+    assert len(read.read_partitioned('swaps.parquet')) == 10
+
+
+def test_later_chunks_widen_the_schema(swaps):
+    first = swaps.iloc[:3].assign(slot=[1, 2, 3], fee=None)
+    second = swaps.iloc[3:6].assign(slot=[4.5, 5.5, 6.5], fee=[0.1, 0.2, 0.3])
+    with load.PartitionedParquetWriter('swaps.parquet') as writer:
+        writer.write(first)
+        writer.write(second)
+    out = read.read_partitioned('swaps.parquet')
+    assert out['slot'].tolist() == [1, 2, 3, 4.5, 5.5, 6.5]
+    assert out['fee'].tolist()[3:] == [0.1, 0.2, 0.3] and out['fee'].isna().sum() == 3
@@ -0,0 +1,97 @@
+import os
+import shutil
+from dataclasses import replace
+
+import pandas as pd
+import pytest
+
+from etl import extract, load, pipeline, read, run_etl
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SAMPLE = os.path.join(ROOT, 'reports', 'sample_pool_swaps.csv.csv')
+
+
+@pytest.fixture(params=['partitioned', 'csv'])
+def data_dirs(request, data_dir, monkeypatch):
+    processed = data_dir / 'processed'
+    shutil.copy(SAMPLE, data_dir / 'pool_swaps.csv')
+    if request.param == 'csv':
+        specs = [replace(s, output='pool_swaps.processed.csv', partition_by=None) if s.name == 'pool_swaps' else s
+                 for s in pipeline.DEFAULT_SPECS]
+        monkeypatch.setattr(pipeline, 'DEFAULT_SPECS', specs)
+    return processed
+
+
+def _output(processed):
+    if (processed / 'pool_swaps.processed.csv').exists():
+        return (processed / 'pool_swaps.processed.csv').read_bytes()
+    return read.read_partitioned('pool_swaps.processed.parquet')
+
+
+def _simulate_partial_chunk(output, chunk_index):
+    if os.path.isdir(output):
+        partition = sorted(p for p in os.listdir(output) if '=' in p)[-1]
+        with open(os.path.join(output, partition, f'part-{chunk_index:05d}.parquet'), 'wb') as f:
+            f.write(b'PAR1 partial')
+    else:
+        with open(output, 'ab') as f:
+            f.write(b'partial,row')
+
+
+def _assert_same(a, b):
+    if isinstance(a, bytes):
+        assert a == b
+    else:
+        pd.testing.assert_frame_equal(a, b)
+
+
+def test_pool_swaps_resumes_from_last_checkpoint(data_dirs):
+    run_etl.etl_pool_swaps(chunksize=60)
+    expected = _output(data_dirs)
+    expected_rollup = (data_dirs / 'pool_swaps.daily_rollup.csv').read_bytes()
+
+    checkpoints = {}
+
+    def failing_cb(run_id, stage, info):
+        if 'checkpoint' in info:
+            checkpoints[stage] = info['checkpoint']
+        if info.get('chunk_index') == 2:
+            # simulate a crash after a half-written third chunk
+            _simulate_partial_chunk(info['checkpoint']['output'], 3)
+            raise RuntimeError('boom')
+
+    with pytest.raises(RuntimeError):
+        run_etl.etl_pool_swaps(chunksize=60, progress_callback=failing_cb)
+    assert checkpoints['pool_swaps']['rows'] == 120
+
+    events = []
+    run_etl.etl_pool_swaps(chunksize=60, checkpoint=checkpoints['pool_swaps'],
+                           progress_callback=lambda rid, stage, info: events.append(info))
+    assert events[0]['status'] == 'resumed'
+    assert events[-1]['total_rows'] == 200
+    _assert_same(_output(data_dirs), expected)
+    assert (data_dirs / 'pool_swaps.daily_rollup.csv').read_bytes() == expected_rollup
+
+
+def test_pool_swaps_reports_step_metrics(data_dirs):
+    from etl import metrics
+
+    finished = {}
+
+    def cb(run_id, stage, info):
+        if info.get('status') == 'finished':
+            finished.update(info)
+
+    run_etl.etl_pool_swaps(chunksize=60, progress_callback=cb)
+    steps = finished['metrics']
+    out = finished['output']
+    write_step = 'load.PartitionedParquetWriter.write' if os.path.isdir(out) else 'load.ProcessedWriter.write'
+    assert set(steps) == {'extract.read_csv_chunks', 'transform.transform_pool_swaps_chunk', write_step,
+                          'rollup.pool_swaps_daily'}
+    assert steps['transform.transform_pool_swaps_chunk']['rows'] == finished['total_rows']
+    assert steps['extract.read_csv_chunks']['bytes_read'] == os.path.getsize(extract.path_for('pool_swaps.csv'))
+    size = (sum(os.path.getsize(os.path.join(r, f)) for r, _, files in os.walk(out) for f in files)
+            if os.path.isdir(out) else os.path.getsize(out))
+    assert steps[write_step]['bytes_written'] == size
+    text = metrics.render_prometheus()
+    assert 'etl_step_rows_total{stage="pool_swaps",step="transform.transform_pool_swaps_chunk"}' in text
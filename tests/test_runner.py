@@ -0,0 +1,251 @@
+import json
+
+import pytest
+
+from api import runner
+
+
+@pytest.fixture
+def runs_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(runner, 'ETL_RUNS_DIR', str(tmp_path))
+    monkeypatch.setattr(runner, 'PERSIST_MIN_INTERVAL', 3600.0)
+    monkeypatch.setattr(runner, 'PERSIST_MAX_EVENTS', 1000)
+    return tmp_path
+
+
+def _on_disk(runs_dir, run_id):
+    return json.loads((runs_dir / f'{run_id}.json').read_text(encoding='utf8'))
+
+
+def test_progress_events_are_coalesced_and_aggregated(runs_dir):
+    run_id = runner.create_run(['pool_swaps.csv'])
+    runner._mark_started(run_id)
+    runner._progress_callback(run_id, 'pool_swaps', {'status': 'started'})
+    for i in range(1, 6):
+        runner._progress_callback(run_id, 'pool_swaps', {'status': 'chunk_processed', 'chunk_index': i,
+                                                        'chunk_rows': 10 * i, 'total_rows': 0})
+    # debounced: nothing beyond the synchronous start has reached disk yet
+    assert _on_disk(runs_dir, run_id)['stages'] == {}
+
+    runner._mark_finished(run_id)
+    stage = _on_disk(runs_dir, run_id)['stages']['pool_swaps']
+    assert stage['events'] == 6
+    assert stage['status_counts'] == {'started': 1, 'chunk_processed': 5}
+    assert stage['chunk_rows'] == {'count': 5, 'sum': 150, 'min': 10, 'max': 50}
+    assert stage['last']['chunk_index'] == 5
+    runner.runs.pop(run_id, None)
+
+
+def test_scheduler_limits_concurrency_and_respects_priority():
+    import threading
+    import time
+    from api.scheduler import RunScheduler
+
+    scheduler = RunScheduler(max_concurrent=1)
+    gate = threading.Event()
+    order = []
+
+    def job(name):
+        def run(stop_event):
+            if name == 'first':
+                gate.wait(5)
+            order.append(name)
+        return run
+
+    scheduler.submit('first', job('first'))
+    time.sleep(0.05)
+    scheduler.submit('low', job('low'), priority=5)
+    scheduler.submit('high', job('high'), priority=0)
+    assert scheduler.queued() == ['high', 'low']
+    gate.set()
+    assert scheduler.shutdown(drain=True, timeout=5) == []
+    assert order == ['first', 'high', 'low']
+
+
+def test_shutdown_interrupts_running_job_at_checkpoint():
+    import threading
+    from api.scheduler import RunScheduler
+
+    scheduler = RunScheduler(max_concurrent=1)
+    started = threading.Event()
+    result = {}
+
+    def run(stop_event):
+        started.set()
+        result['stopped'] = stop_event.wait(5)
+
+    scheduler.submit('a', run)
+    scheduler.submit('b', run)
+    started.wait(5)
+    assert scheduler.shutdown(drain=False, timeout=5) == ['b']
+    assert result['stopped'] is True
+
+
+def test_run_events_stream_and_resume_from_last_event_id(runs_dir):
+    from fastapi.testclient import TestClient
+    from api.app import app
+
+    run_id = runner.create_run(['x.csv'])
+    runner._mark_started(run_id)
+    runner._progress_callback(run_id, 'pool_swaps', {'status': 'chunk_processed', 'chunk_rows': 5})
+    runner._mark_finished(run_id)
+
+    client = TestClient(app)
+    body = client.get(f'/runs/{run_id}/events').text
+    assert body.startswith('event: snapshot')
+    assert 'event: stage' in body and body.rstrip().endswith('}')
+    ids = [int(line[4:]) for line in body.splitlines() if line.startswith('id: ')]
+    assert ids == sorted(ids) and len(ids) == 4
+
+    replay = client.get(f'/runs/{run_id}/events', headers={'Last-Event-ID': str(ids[1])}).text
+    assert 'snapshot' not in replay
+    assert [int(line[4:]) for line in replay.splitlines() if line.startswith('id: ')] == ids[2:]
+    runner.runs.pop(run_id, None)
+
+
+def test_run_index_pagination_filters_and_lru(runs_dir, monkeypatch):
+    legacy = {'run_id': 'old', 'status': 'failed', 'created_at': '2025-01-01T00:00:00Z', 'files': []}
+    (runs_dir / 'old.json').write_text(json.dumps(legacy), encoding='utf8')
+    (runs_dir / 'meta.json').write_text(json.dumps({'etl_run_id': 'x'}), encoding='utf8')
+    monkeypatch.setattr(runner, '_index_cache', {'dir': None, 'entries': {}})
+    monkeypatch.setattr(runner, 'RUN_CACHE_SIZE', 1)
+
+    created = [runner.create_run([f'{i}.csv']) for i in range(3)]
+    for run_id in created:
+        runner._mark_finished(run_id)
+
+    page = runner.list_runs(limit=2)
+    assert page['total'] == 4
+    assert [r['run_id'] for r in page['items']] == created[::-1][:2]
+    assert runner.list_runs(status=['failed'])['items'][0]['run_id'] == 'old'
+    assert runner.list_runs(created_before='2026-01-01')['total'] == 1
+    assert json.loads((runs_dir / '_index.json').read_text(encoding='utf8'))['old']['status'] == 'failed'
+
+    assert runner.get_run('old')['status'] == 'failed'
+    assert len(runner.runs) <= 1
+
+
+def test_in_flight_runs_survive_eviction_after_their_event_log_is_dropped(runs_dir, monkeypatch):
+    from api.events import RunEventBus
+
+    monkeypatch.setattr(runner, '_index_cache', {'dir': None, 'entries': {}})
+    monkeypatch.setattr(runner, 'RUN_CACHE_SIZE', 1)
+    monkeypatch.setattr(runner, 'events', RunEventBus(max_runs=1))
+    queued = runner.create_run(['a.csv'])
+    later = [runner.create_run([f'{i}.csv']) for i in range(3)]
+    for run_id in later:
+        runner._mark_finished(run_id)
+    runner._evict()
+    assert not runner.events.known(queued)
+    assert queued in runner.runs and len(runner.runs) == 1
+
+    # its worker still finds it
+    runner._mark_started(queued)
+    runner._progress_callback(queued, 'pool_swaps', {'status': 'started'})
+    runner._mark_finished(queued)
+    assert _on_disk(runs_dir, queued)['status'] == 'finished'
+    for run_id in [queued] + later:
+        runner.runs.pop(run_id, None)
+
+
+def test_profiled_run_writes_folded_stacks(runs_dir, monkeypatch):
+    import time
+
+    def busy_run_all(**kwargs):
+        deadline = time.perf_counter() + 0.3
+        while time.perf_counter() < deadline:
+            sum(range(1000))
+
+    from etl import run_etl
+
+    monkeypatch.setattr(run_etl, 'run_all', busy_run_all)
+    run_id = runner.create_run(['pool_swaps.csv'])
+    runner.start_run(run_id, profile=True)
+    for _ in range(100):
+        if runner.get_run(run_id)['status'] == 'finished':
+            break
+        time.sleep(0.05)
+
+    record = _on_disk(runs_dir, run_id)
+    assert record['status'] == 'finished'
+    assert record['profile_path'] == str(runs_dir / f'{run_id}.profile.folded')
+    assert record['profile']['samples'] > 0
+    lines = (runs_dir / f'{run_id}.profile.folded').read_text(encoding='utf8').splitlines()
+    assert any('busy_run_all' in line.rsplit(' ', 1)[0] for line in lines)
+    assert all(line.rsplit(' ', 1)[1].isdigit() for line in lines)
+    runner.runs.pop(run_id, None)
+
+
+def test_runs_left_in_flight_by_a_dead_process_become_interrupted(runs_dir, monkeypatch):
+    monkeypatch.setattr(runner, '_index_cache', {'dir': None, 'entries': {}})
+    queued = runner.create_run(['a.csv'])
+    running = runner.create_run(['b.csv'])
+    runner._mark_started(running)
+    done = runner.create_run(['c.csv'])
+    runner._mark_finished(done)
+    # a new process: nothing in memory, the records only on disk
+    for run_id in (queued, running, done):
+        runner.runs.pop(run_id, None)
+
+    assert sorted(runner.recover_orphaned_runs()) == sorted([queued, running])
+    assert _on_disk(runs_dir, queued)['status'] == 'interrupted'
+    assert _on_disk(runs_dir, running)['status'] == 'interrupted'
+    assert _on_disk(runs_dir, done)['status'] == 'finished'
+    assert runner.list_runs(status=['interrupted'])['total'] == 2
+    for run_id in (queued, running, done):
+        runner.runs.pop(run_id, None)
+
+
+def test_run_records_are_written_without_holding_the_runner_lock(runs_dir, monkeypatch):
+    import os
+    import threading
+
+    real_replace = os.replace
+    acquired = []
+
+    def try_lock():
+        ok = runner._lock.acquire(timeout=1)
+        if ok:
+            runner._lock.release()
+        acquired.append(ok)
+
+    def replace(src, dst):
+        # another thread (a progress callback, an API read) must get the lock meanwhile
+        t = threading.Thread(target=try_lock)
+        t.start()
+        t.join()
+        real_replace(src, dst)
+
+    runner.list_runs()  # the one-off index rebuild for this directory
+
+    monkeypatch.setattr(runner.os, 'replace', replace)
+    run_id = runner.create_run(['a.csv'])
+    runner._mark_started(run_id)
+    runner._mark_finished(run_id)
+    assert acquired and all(acquired)
+    assert _on_disk(runs_dir, run_id)['status'] == 'finished'
+    runner.runs.pop(run_id, None)
+
+
+def test_index_file_is_rewritten_only_on_status_transitions(runs_dir, monkeypatch):
+    monkeypatch.setattr(runner, '_index_cache', {'dir': None, 'entries': {}})
+    runner.list_runs()  # the one-off index rebuild for this directory
+    writes = []
+    real_write = runner._write_index
+    monkeypatch.setattr(runner, '_write_index', lambda: writes.append(1) or real_write())
+
+    run_id = runner.create_run(['a.csv'])
+    runner._mark_started(run_id)
+    for status in ('started', 'chunk_processed', 'chunk_processed', 'finished'):
+        runner._progress_callback(run_id, 'pool_swaps', {'status': status})
+        runner._persist_run(run_id)
+    assert len(writes) == 2  # created (queued) and running
+    # the in-memory index is current even when the file lags
+    assert runner.list_runs()['items'][0]['stages'] == {'pool_swaps': 'finished'}
+
+    runner._mark_finished(run_id)
+    assert len(writes) == 3
+    on_disk = json.loads((runs_dir / '_index.json').read_text(encoding='utf8'))
+    assert on_disk[run_id]['status'] == 'finished'
+    assert on_disk[run_id]['stages'] == {'pool_swaps': 'finished'}
+    runner.runs.pop(run_id, None)
@@ -0,0 +1,80 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from etl import transform
+
+
+def test_clean_numeric_column_strips_separators_and_leading_zeros():
+    s = pd.Series([' 1,234.5 ', '04.06', '12 ', None, 'abc', '', '0.5'], dtype=object)
+    out = transform.clean_numeric_column(s)
+    expected = [1234.5, 4.06, 12.0, np.nan, np.nan, np.nan, 0.5]
+    np.testing.assert_allclose(out.to_numpy(dtype=float), expected)
+
+
+def test_clean_numeric_column_short_circuits_numeric_input():
+    s = pd.Series([1, 2, 3])
+    out = transform.clean_numeric_column(s)
+    assert out is not s and out.equals(s)
+    out.iloc[0] = 10
+    assert s.iloc[0] == 1
+    assert transform.clean_numeric_column(pd.Series(['1', '2'], dtype=object)).dtype == np.int64
+
+
+@pytest.fixture
+def formats():
+    # a run's scope: detected formats never outlive the test
+    with transform.datetime_format_cache() as cache:
+        yield cache
+
+
+def test_parse_datetime_column_caches_format_and_handles_epoch(formats):
+    values = ['24/01/2017', '25/01/2017', '26/01/2017', '27/01/2017', '30/01/2017', 'bad']
+    parsed = transform.parse_datetime_column(pd.Series(values), key='test.Date', dayfirst=True)
+    assert parsed.dtype.kind == 'M'
+    assert parsed.iloc[0] == pd.Timestamp('2017-01-24')
+    assert pd.isna(parsed.iloc[-1])
+    assert formats[('test.Date', True)] == '%d/%m/%Y'
+
+    epoch = transform.parse_datetime_column(pd.Series([1760458842, None]), key='test.block_time')
+    assert epoch.iloc[0] == pd.Timestamp('2025-10-14 16:20:42')
+
+
+def test_datetime_formats_are_scoped_and_junk_is_parsed_once(formats, monkeypatch):
+    transform.parse_datetime_column(pd.Series(['2025-01-02', '2025-01-03']), key='date')
+    assert formats == {('date', False): '%Y-%m-%d'}
+    # another file (outside the run's scope) with a 'date' column detects its own format
+    with transform.datetime_format_cache() as other:
+        transform.parse_datetime_column(pd.Series(['01/02/2025', '01/03/2025']), key='date')
+        assert other == {('date', False): '%m/%d/%Y'}
+    assert formats == {('date', False): '%Y-%m-%d'}
+
+    calls = []
+    to_datetime = pd.to_datetime
+    monkeypatch.setattr(pd, 'to_datetime', lambda *a, **k: calls.append(k.get('format')) or to_datetime(*a, **k))
+    chunk = pd.Series([f'2025-02-{d:02d}' for d in range(1, 10)] + ['junk'])
+    parsed = transform.parse_datetime_column(chunk, key='date')
+    assert calls == ['%Y-%m-%d'] and parsed.isna().sum() == 1
+    assert formats == {('date', False): '%Y-%m-%d'}
+
+
+def test_transform_tata_keeps_date_as_datetime64():
+    df = pd.DataFrame({'timestamp': ['2025-07-14 09:15:00+05:30'], 'date': ['2025-07-14'], 'open': ['680.8']})
+    out = transform.transform_tata(df)
+    assert out['date'].dtype.kind == 'M'
+    assert str(out['timestamp'].dt.tz) == 'UTC+05:30'
+
+
+def test_transform_generic_decides_types_from_the_first_chunk():
+    first = pd.DataFrame({'amount': ['1,200', '3'], 'code': ['A1', 'B2'], 'created_date': ['2025-01-02', '2025-01-03'],
+                          'note': [None, None]})
+    second = pd.DataFrame({'amount': ['n/a', '7'], 'code': [10, 20], 'created_date': ['2025-01-04', None],
+                           'note': ['x', 'y']})
+    with transform.column_type_cache() as types:
+        a, b = transform.transform_generic(first), transform.transform_generic(second)
+    assert types == {'amount': 'numeric', 'code': None, 'created_date': 'datetime', 'note': None}
+    assert b['amount'].dtype.kind in 'if' and pd.isna(b['amount'].iloc[0])
+    assert b['created_date'].dtype.kind == 'M' and b['created_date'].iloc[0] == pd.Timestamp('2025-01-04')
+    assert b['code'].tolist() == ['10', '20']
+    # outside a run each call decides on its own
+    assert transform.transform_generic(second)['amount'].tolist() == ['n/a', '7']
@@ -0,0 +1,82 @@
+import os
+
+import pytest
+
+from etl import run_etl, watermarks
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SOURCES = {
+    'bank': ('Bank_Price_Data_China new.csv', 'Bank_Price_Data_China_new.processed.csv', run_etl.etl_bank_prices),
+    'tata': ('final_dataset_tata_motors.csv', 'final_dataset_tata_motors.processed.csv', run_etl.etl_tata),
+}
+
+
+@pytest.fixture(params=sorted(SOURCES))
+def source(request, data_dir):
+    name, output, run = SOURCES[request.param]
+    with open(os.path.join(ROOT, 'data', name), 'rb') as f:
+        lines = f.read().splitlines(keepends=True)
+    return data_dir / name, data_dir / 'processed' / output, run, lines
+
+
+def _events(run, **kwargs):
+    events = []
+    run(progress_callback=lambda rid, stage, info: events.append(info), **kwargs)
+    return events
+
+
+def test_appended_rows_are_processed_incrementally(source):
+    src, out, run, lines = source
+    src.write_bytes(b''.join(lines[:1001]))
+    assert _events(run)[0]['mode'] == 'full'
+
+    src.write_bytes(b''.join(lines))
+    events = _events(run)
+    assert events[0]['mode'] == 'incremental'
+    # el CSV de bank_prices termina sin salto de linea: su ultima fila tambien entra
+    assert events[-1]['rows'] == len(lines) - 1001
+    steps = events[-1]['metrics']
+    assert steps['extract.read_csv_tail']['bytes_read'] == len(b''.join(lines[1001:]))
+    incremental = out.read_bytes()
+
+    # sin datos nuevos no se anexa nada
+    assert _events(run)[-1]['rows'] == 0
+    assert out.read_bytes() == incremental
+
+    _events(run, full_refresh=True)
+    assert out.read_bytes() == incremental
+
+
+def test_rewritten_source_falls_back_to_full_run(source):
+    src, out, run, lines = source
+    src.write_bytes(b''.join(lines[:1001]))
+    run()
+    src.write_bytes(b''.join(lines[:1] + lines[2:]))
+    assert _events(run)[0]['mode'] == 'full'
+
+
+def test_crash_after_append_does_not_duplicate_rows(source):
+    src, out, run, lines = source
+    src.write_bytes(b''.join(lines[:1001]))
+    run()
+    expected_start = out.read_bytes()
+    with open(out, 'ab') as f:
+        f.write(b'half,written,row\n')
+    src.write_bytes(b''.join(lines[:1001]))
+    assert _events(run)[0]['mode'] == 'incremental'
+    assert out.read_bytes() == expected_start
+    assert watermarks.load_watermark(out.name)['rows'] == 1000
+
+
+def test_chunked_rewrite_drops_the_watermark(source):
+    from etl import pipeline
+
+    src, out, run, lines = source
+    src.write_bytes(b''.join(lines[:1001]))
+    run()
+    assert watermarks.load_watermark(out.name) is not None
+    src.write_bytes(b''.join(lines))
+    pipeline.run_pipeline(pipeline.spec_for_file(src.name), mode='chunked')
+    assert watermarks.load_watermark(out.name) is None
+    # the next run starts over instead of appending to the rewritten output
+    assert _events(run)[0]['mode'] == 'full'